@@ -1,12 +1,17 @@
+import asyncio
+from concurrent.futures import wait
+
 import streamlit as st
-from services.ai_service import AIService
+from services.registry import start_ai_service
+from utils.metrics import metrics
 
 st.set_page_config(page_title="Chat", page_icon="💬")
 
 st.title("💬 Chat with Your Documents")
 
-if "ai_service" not in st.session_state:
-    st.session_state.ai_service = AIService()
+# Models and index load in the background; the page renders meanwhile
+ai_service_future = start_ai_service()
+metrics.start_file_export()
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -15,6 +20,51 @@ for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
+if not ai_service_future.done():
+    st.chat_input("Warming up, one moment...", disabled=True)
+    with st.spinner("Loading the language model and document index..."):
+        wait([ai_service_future])
+    st.rerun()
+
+if ai_service_future.exception() is not None:
+    st.error(f"The chat service failed to start: {ai_service_future.exception()}")
+    st.stop()
+
+ai_service = ai_service_future.result()
+# The service is shared by every browser tab; each keeps its own conversation
+if "chat_session" not in st.session_state:
+    st.session_state.chat_session = ai_service.new_session()
+chat_session = st.session_state.chat_session
+
+with st.sidebar:
+    collection_names = ai_service.collections.names()
+    # Collections deleted since the last rerun are no longer valid options
+    chat_session.collections = st.multiselect(
+        "Search collections",
+        collection_names,
+        default=[name for name in chat_session.collections if name in collection_names],
+    ) or [ai_service.collections.default_collection]
+
+
+def retrieval_caption(retrieval) -> str:
+    # Dense scores are cosine similarities; hybrid and lexical results are
+    # ranked by reciprocal-rank fusion and reranked ones by the cross-encoder
+    if retrieval.reranked_from:
+        label = f"reranked from {retrieval.reranked_from}, rerank scores"
+        precision = 2
+    elif retrieval.mode == "dense":
+        label = f"of {len(retrieval.candidate_scores)} dense candidates, similarity"
+        precision = 2
+    else:
+        label = (
+            f"from {len(retrieval.candidate_scores)} dense and "
+            f"{retrieval.lexical_matches} lexical candidates, fused rank scores"
+        )
+        precision = 4
+    scores = ", ".join(f"{score:.{precision}f}" for score in retrieval.scores)
+    return f"Used {len(retrieval.documents)} chunks ({label}: {scores or 'none'})"
+
+
 if prompt := st.chat_input("What would you like to know?"):
     st.session_state.messages.append({"role": "user", "content": prompt})
     with st.chat_message("user"):
@@ -24,33 +74,21 @@ if prompt := st.chat_input("What would you like to know?"):
         message_placeholder = st.empty()
         full_response = ""
 
-        if st.session_state.ai_service.retriever is None:
+        if ai_service.collections.is_empty(chat_session.collections):
             full_response = "I'm sorry, but I don't have any documents to reference. Please upload some documents or URLs first."
             message_placeholder.markdown(full_response)
 
         else:
-            for chunk in st.session_state.ai_service.chain.stream(
-                {
-                    "question": prompt,
-                    "context": "\n\n".join(
-                        [
-                            doc.page_content
-                            for doc in st.session_state.ai_service.retriever.get_relevant_documents(
-                                prompt
-                            )
-                        ]
-                    ),
-                    "chat_history": st.session_state.ai_service.chat_history,
-                }
-            ):
-                full_response += chunk.content
-                message_placeholder.markdown(full_response + "▌")
 
+            async def render_stream() -> str:
+                response = ""
+                async for token in ai_service.astream_chat(prompt, chat_session):
+                    response += token
+                    message_placeholder.markdown(response + "▌")
+                return response
+
+            full_response = asyncio.run(render_stream())
             message_placeholder.markdown(full_response)
+            st.caption(retrieval_caption(chat_session.last_retrieval))
 
     st.session_state.messages.append({"role": "assistant", "content": full_response})
-
-    st.session_state.ai_service.chat_history.append({"role": "user", "content": prompt})
-    st.session_state.ai_service.chat_history.append(
-        {"role": "assistant", "content": full_response}
-    )
@@ -7,6 +7,89 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_PRECISION: str = "fp32"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_MAX_SEQ_LENGTH: int = 256
+    EMBEDDING_THREADS: int = 0
+    CHUNK_SPLITTER: str = "recursive"
+    CHUNK_SIZE: int = 200
+    CHUNK_OVERLAP: int = 40
+    EXTRACTION_WORKERS: int = max(1, (os.cpu_count() or 1) - 1)
+    PARSED_CACHE_DIR: str = "data/cache/parsed"
+    URL_FETCH_CONCURRENCY: int = 8
+    URL_FETCH_TIMEOUT: float = 10.0
+    URL_FETCH_RETRIES: int = 2
+    WEB_CACHE_DIR: str = "data/cache/web"
+    WEB_CACHE_TTL: float = 300.0
+    INGEST_QUEUE_PATH: str = "data/cache/ingest_jobs.sqlite3"
+    INGEST_WORKERS: int = 2
+    INGEST_PARSE_BATCH: int = 8
+    INGEST_EMBED_BATCH: int = 256
+    INGEST_PIPELINE_DEPTH: int = 4
+    INGEST_JOB_RETENTION: int = 200
+    INGEST_POLL_INTERVAL: float = 1.0
+    INGEST_HEARTBEAT_INTERVAL: float = 10.0
+    INGEST_HEARTBEAT_TIMEOUT: float = 60.0
+    INGEST_RETRY_BACKOFF: float = 1.0
+    DEDUP_ENABLED: bool = True
+    DEDUP_NEAR_THRESHOLD: float = 0.85
+    DEDUP_NUM_PERM: int = 64
+    DEDUP_BANDS: int = 8
+    DEDUP_SHINGLE_SIZE: int = 5
+    RETRIEVAL_TOP_K: int = 4
+    RETRIEVAL_MIN_SIMILARITY: float = 0.3
+    RETRIEVAL_SCORE_DROP_OFF: float = 0.15
+    RETRIEVAL_WORKERS: int = 4
+    RETRIEVAL_MODE: str = "hybrid"
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_LATENCY_BUDGET_MS: float = 150.0
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_DEVICE: str = "cpu"
+    RERANK_CACHE_SIZE: int = 4096
+    QUERY_CACHE_SIZE: int = 1024
+    QUERY_CACHE_TTL: float = 600.0
+    QUERY_BATCH_MAX_SIZE: int = 32
+    QUERY_BATCH_MAX_WAIT_MS: float = 2.0
+    PROMPT_CONTEXT_TOKEN_BUDGET: int = 1500
+    PROMPT_HISTORY_TOKEN_BUDGET: int = 800
+    HISTORY_WINDOW_TURNS: int = 4
+    HISTORY_SUMMARY_TOKEN_BUDGET: int = 200
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_PATH: str = "data/cache/responses.sqlite3"
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_MIN_SIMILARITY: float = 0.95
+    RESPONSE_CACHE_TTL: float = 7 * 24 * 3600.0
+    INDEX_DIR: str = "data/index"
+    COLLECTIONS_DIR: str = "data/collections"
+    DEFAULT_COLLECTION: str = "default"
+    COLLECTION_SEARCH_WORKERS: int = 4
+    INDEX_TYPE: str = "auto"
+    INDEX_AUTO_FLAT_MAX: int = 50_000
+    INDEX_AUTO_IVF_FLAT_MAX: int = 1_000_000
+    INDEX_VECTOR_ENCODING: str = "fp32"
+    INDEX_NPROBE: int = 16
+    INDEX_EF_SEARCH: int = 64
+    INDEX_HNSW_M: int = 32
+    INDEX_PQ_M: int = 48
+    INDEX_TRAIN_SAMPLE_SIZE: int = 100_000
+    INDEX_MMAP: bool = True
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_MAX_SESSIONS: int = 1000
+    SERVER_SESSION_TTL: float = 3600.0
+    METRICS_ENABLED: bool = True
+    METRICS_EXPORT_PATH: str = ""
+    METRICS_EXPORT_INTERVAL: float = 15.0
+    PROFILE_STAGES: str = ""
+    PROFILE_DIR: str = "data/profiles"
     GOOGLE_API_KEY: str
     LANGSMITH_TRACING: str
     LANGSMITH_ENDPOINT: str
@@ -1 +1,13 @@
 # app/constants.py
+
+INDEX_MANIFEST_VERSION = 4
+INDEX_MANIFEST_FILE = "manifest.json"
+INDEX_FAISS_FILE = "index.faiss"
+INDEX_CHUNK_TEXT_FILE = "chunks.bin"
+INDEX_CHUNK_META_FILE = "chunk_meta.bin"
+INDEX_CHUNK_OFFSETS_FILE = "chunk_offsets.npz"
+INDEX_BM25_FILE = "bm25.npz"
+INDEX_DEDUP_FILE = "dedup.npz"
+
+FILE_SOURCE_PREFIX = "file:"
+URL_SOURCE_PREFIX = "url:"
@@ -3,13 +3,15 @@
 import os
 
 import streamlit as st
-from services.document_manager import DocumentManager
-from services.vector_db_manager import VectorDBManager
+from services.registry import get_ingestion_queue
+from ui.components import collection_picker, indexing_jobs, refresh_while_running
 
 st.title("📄 Upload Documents")
 
-document_manager = DocumentManager()
-vector_db = VectorDBManager()
+collection = collection_picker()
+document_manager = collection.document_manager
+vector_db = collection.vector_db
+ingestion_queue = get_ingestion_queue()
 
 st.header("Upload Documents")
 uploaded_files = st.file_uploader(
@@ -18,24 +20,28 @@ uploaded_files = st.file_uploader(
 
 if uploaded_files:
     if st.button("Upload"):
-        with st.spinner("Processing files..."):
-            for uploaded_file in uploaded_files:
-                file_path = os.path.join(
-                    document_manager.upload_folder, uploaded_file.name
-                )
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-
-                st.success(f"Uploaded: {uploaded_file.name}")
-
-            documents = document_manager.read_uploaded_documents()
-            if documents:
-                embeddings, metadata = vector_db.compute_embeddings(documents)
-                vector_db.metadata = metadata
-                vector_db.build_faiss_index(embeddings)
-                st.success("Documents processed successfully!")
+        pending = []
+        for uploaded_file in uploaded_files:
+            file_path = os.path.join(document_manager.upload_folder, uploaded_file.name)
+            with open(file_path, "wb") as f:
+                f.write(uploaded_file.getbuffer())
+
+            st.success(f"Uploaded: {uploaded_file.name}")
+
+            source_id = document_manager.file_source_id(uploaded_file.name)
+            content_hash = document_manager.get_source_hash(source_id)
+            if vector_db.is_source_current(source_id, content_hash):
+                st.info(f"Already indexed: {uploaded_file.name}")
             else:
-                st.error("No valid documents found in the uploaded files.")
+                pending.append(source_id)
+
+        # Parsing, embedding and indexing happen in the background; the chat
+        # keeps answering from the current index until the job swaps it
+        if pending:
+            ingestion_queue.submit(collection.name, pending)
+            st.info(f"Queued {len(pending)} files for indexing")
+
+jobs = indexing_jobs(ingestion_queue, collection)
 
 st.header("Current Documents")
 if os.path.exists(document_manager.upload_folder):
@@ -49,9 +55,15 @@ if os.path.exists(document_manager.upload_folder):
                 if st.button("Delete", key=f"delete_{file}"):
                     file_path = os.path.join(document_manager.upload_folder, file)
                     if document_manager.delete_file(file_path):
+                        # The index drops the file in the background, like ingestion
+                        ingestion_queue.submit(
+                            collection.name, [document_manager.file_source_id(file)]
+                        )
                         st.success(f"Deleted: {file}")
                         st.rerun()
     else:
         st.info("No documents uploaded yet.")
 else:
     st.info("No documents uploaded yet.")
+
+refresh_while_running(jobs)
@@ -3,44 +3,29 @@
 import os
 
 import streamlit as st
-from services.document_manager import DocumentManager
-from services.vector_db_manager import VectorDBManager
+from services.registry import get_ingestion_queue
+from ui.components import collection_picker, indexing_jobs, refresh_while_running
 
 st.title("🌐 Manage URLs")
 
-document_manager = DocumentManager()
-vector_db = VectorDBManager()
+collection = collection_picker()
+document_manager = collection.document_manager
+ingestion_queue = get_ingestion_queue()
 
 st.header("Add URL")
 url = st.text_input("Enter URL to add", placeholder="https://example.com")
 
 if url and st.button("Add URL"):
-    with st.spinner("Processing URL..."):
-        new_docs = document_manager.fetch_documents_from_url(url)
-
-        if new_docs:
-            if os.path.exists(document_manager.url_file):
-                with open(document_manager.url_file, "r", encoding="utf-8") as f:
-                    existing_urls = f.read().splitlines()
-            else:
-                existing_urls = []
-
-            if url not in existing_urls:
-                existing_urls.append(url)
-                document_manager.save_url_list(existing_urls)
-
-            documents = document_manager.read_uploaded_documents()
-            documents.extend(new_docs)
-
-            if documents:
-                embeddings, metadata = vector_db.compute_embeddings(documents)
-                vector_db.metadata = metadata
-                vector_db.build_faiss_index(embeddings)
-                st.success("URL processed successfully!")
-            else:
-                st.error("No valid documents found from the URL.")
-        else:
-            st.error("Could not fetch content from the URL.")
+    urls = document_manager.read_url_list()
+    if url not in urls:
+        document_manager.save_url_list(urls + [url])
+
+    # The URL is fetched, parsed and indexed in the background; the chat
+    # keeps answering from the current index until the job swaps it
+    ingestion_queue.submit(collection.name, [document_manager.url_source_id(url)])
+    st.info("URL queued for indexing.")
+
+jobs = indexing_jobs(ingestion_queue, collection)
 
 st.header("Current URLs")
 if os.path.exists(document_manager.url_file):
@@ -55,9 +40,15 @@ if os.path.exists(document_manager.url_file):
             with col2:
                 if st.button("Delete", key=f"delete_{url}"):
                     if document_manager.delete_url(url, urls):
+                        # The index drops the URL in the background, like ingestion
+                        ingestion_queue.submit(
+                            collection.name, [document_manager.url_source_id(url)]
+                        )
                         st.success(f"Deleted: {url}")
                         st.rerun()
     else:
         st.info("No URLs added yet.")
 else:
     st.info("No URLs added yet.")
+
+refresh_while_running(jobs)
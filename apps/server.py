@@ -0,0 +1,299 @@
+# app/server.py
+#
+# Headless HTTP entry point sharing one AIService across all requests:
+#
+#   python apps/server.py            (or: uvicorn server:app --app-dir apps)
+#
+# The port opens right away; the model and index warm up in the background
+# and requests get a 503 until they are ready.
+
+import asyncio
+import base64
+import binascii
+import json
+import os
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, List, Optional
+
+import uvicorn
+from config import settings
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from services import registry
+from utils.logger import logger
+from utils.lru_cache import LRUCache
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from services.ai_service import AIService, ChatSession
+    from services.collection_manager import Collection
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(min_length=1)
+    session_id: Optional[str] = None
+    # Defaults to the session's collections, or the default one for new sessions
+    collections: Optional[List[str]] = None
+
+
+class IngestFile(BaseModel):
+    filename: str
+    content_base64: str
+
+
+class IngestRequest(BaseModel):
+    collection: str = settings.DEFAULT_COLLECTION
+    files: List[IngestFile] = []
+    urls: List[str] = []
+    # False returns 202 with the queued job right away; poll GET /jobs/{id}
+    wait: bool = True
+
+
+class ServerState:
+    def __init__(self):
+        self.ai_service_future: Optional[Future] = None
+        self.sessions = LRUCache(
+            settings.SERVER_MAX_SESSIONS, settings.SERVER_SESSION_TTL
+        )
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+
+    def service(self) -> "AIService":
+        future = self.ai_service_future
+        if future is None or not future.done():
+            raise HTTPException(status_code=503, detail="Service is warming up")
+        if future.exception() is not None:
+            raise HTTPException(
+                status_code=503, detail=f"Service failed to start: {future.exception()}"
+            )
+        return future.result()
+
+    def session(
+        self, session_id: Optional[str], collections: Optional[List[str]] = None
+    ) -> "ChatSession":
+        if session_id is None:
+            return self.service().new_session(collections)
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.service().new_session(collections)
+        elif collections:
+            session.collections = collections
+        # Re-inserting refreshes the TTL of active conversations
+        self.sessions.put(session_id, session)
+        return session
+
+
+state = ServerState()
+
+
+def _on_ready(future: Future):
+    if future.exception() is None:
+        state.ready_at = time.time()
+        logger.info(f"✅ Server ready in {state.ready_at - state.started_at:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    state.ai_service_future = registry.start_ai_service()
+    state.ai_service_future.add_done_callback(_on_ready)
+    metrics.start_file_export()
+    yield
+
+
+app = FastAPI(title="RAG Chatbot", lifespan=lifespan)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _collection_stats(collection: "Collection") -> dict:
+    vector_db = collection.vector_db
+    return {
+        "vectors": vector_db.index.ntotal if vector_db.index is not None else 0,
+        "sources": len(vector_db.sources),
+        "index_version": vector_db.index_version,
+        "dedup": vector_db.dedup_stats,
+    }
+
+
+def _get_collection(ai_service: "AIService", name: str) -> "Collection":
+    try:
+        return ai_service.collections.get(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {name}")
+
+
+@app.get("/health")
+async def health():
+    ai_service = state.service()
+    vector_db = ai_service.vector_db
+    # Only collections that are already open; listing never loads a shard
+    loaded = {
+        collection.name: _collection_stats(collection)
+        for collection in ai_service.collections.loaded()
+    }
+    return {
+        "status": "ok",
+        # The ready callback can still be pending right after the future completes
+        "uptime_seconds": (
+            round(time.time() - state.ready_at, 1)
+            if state.ready_at is not None
+            else 0.0
+        ),
+        "vectors": sum(stats["vectors"] for stats in loaded.values()),
+        "sources": sum(stats["sources"] for stats in loaded.values()),
+        "collections": {
+            name: loaded.get(name) for name in ai_service.collections.names()
+        },
+        "sessions": len(state.sessions),
+        "query_cache": vector_db.cache_stats,
+        "query_batching": {
+            "batches": vector_db.query_batcher.batches,
+            "mean_batch_size": round(vector_db.query_batcher.mean_batch_size, 2),
+        },
+        "response_cache": (
+            ai_service.response_cache.stats if ai_service.response_cache else None
+        ),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/collections")
+async def list_collections():
+    ai_service = state.service()
+    return {"collections": ai_service.collections.names()}
+
+
+@app.post("/query")
+async def query(request: QueryRequest):
+    ai_service = state.service()
+    if request.collections:
+        # Opening a collection for the first time loads its shard from disk
+        await asyncio.to_thread(
+            lambda: [_get_collection(ai_service, name) for name in request.collections]
+        )
+    session = state.session(request.session_id, request.collections)
+    # A resumed session may still name a collection deleted since
+    await asyncio.to_thread(
+        lambda: [_get_collection(ai_service, name) for name in session.collections]
+    )
+    if ai_service.collections.is_empty(session.collections):
+        raise HTTPException(
+            status_code=409, detail="No documents indexed yet. Ingest some first."
+        )
+
+    async def events():
+        # A client disconnect cancels this generator and with it the LLM stream
+        async for token in ai_service.astream_chat(request.query, session):
+            yield _sse("token", {"text": token})
+
+        retrieval = session.last_retrieval
+        yield _sse(
+            "done",
+            {
+                "session_id": request.session_id,
+                "ttft_ms": session.last_ttft_ms,
+                "sources": [
+                    doc.metadata.get("chunk_key") for doc in retrieval.documents
+                ],
+                "retrieval": retrieval.to_dict(),
+            },
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _store_sources(ai_service: "AIService", request: IngestRequest) -> List[str]:
+    try:
+        collection = ai_service.collections.create(request.collection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    document_manager = collection.document_manager
+    source_ids = []
+
+    for file in request.files:
+        filename = os.path.basename(file.filename)
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise HTTPException(
+                status_code=400, detail=f"Unsupported file type: {file.filename}"
+            )
+        try:
+            content = base64.b64decode(file.content_base64, validate=True)
+        except binascii.Error:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid base64 content: {file.filename}"
+            )
+        with open(os.path.join(document_manager.upload_folder, filename), "wb") as f:
+            f.write(content)
+        source_ids.append(document_manager.file_source_id(filename))
+
+    if request.urls:
+        urls = document_manager.read_url_list()
+        new_urls = [url for url in request.urls if url not in urls]
+        if new_urls:
+            document_manager.save_url_list(urls + new_urls)
+        source_ids.extend(document_manager.url_source_id(url) for url in request.urls)
+
+    return source_ids
+
+
+@app.post("/ingest")
+async def ingest(request: IngestRequest):
+    ai_service = state.service()
+    if not request.files and not request.urls:
+        raise HTTPException(status_code=400, detail="Nothing to ingest")
+    source_ids = await asyncio.to_thread(_store_sources, ai_service, request)
+    ingestion_queue = registry.get_ingestion_queue()
+    job = ingestion_queue.submit(request.collection, source_ids)
+    if not request.wait:
+        return JSONResponse({"job": job.to_dict()}, status_code=202)
+
+    job = await asyncio.to_thread(ingestion_queue.wait, job.id)
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=f"Ingestion failed: {job.error}")
+    collection = ai_service.collections.get(request.collection)
+    return {
+        "collection": collection.name,
+        "sources": {
+            source_id: job.result["added"].get(source_id, 0)
+            for source_id in job.source_ids
+        },
+        "index_version": collection.vector_db.index_version,
+        "job": job.to_dict(),
+    }
+
+
+@app.get("/jobs")
+async def list_jobs(collection: Optional[str] = None, limit: int = 20):
+    state.service()
+    jobs = registry.get_ingestion_queue().jobs(collection, limit)
+    return {"jobs": [job.to_dict() for job in jobs]}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    state.service()
+    job = registry.get_ingestion_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=settings.SERVER_HOST, port=settings.SERVER_PORT)
@@ -1,71 +1,87 @@
 # app/services/ai_service.py
 
-from typing import Dict, List
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
-import torch
 from config import settings
-from langchain.schema.messages import AIMessage, HumanMessage, SystemMessage
-from langchain.vectorstores.base import VectorStoreRetriever
-from langchain_community.vectorstores import FAISS
+from langchain.schema.messages import BaseMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import Runnable
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from services.document_manager import DocumentManager
-from services.vector_db_manager import VectorDBManager
+from services.context_builder import ContextBuilder, ConversationMemory, TokenCounter
+from services.registry import get_collections, get_vector_db
+from services.reranker import Reranker
+from services.response_cache import ResponseCache, replay
+from services.retrieval import RetrievalResult
 from utils.logger import logger
+from utils.metrics import metrics
+from utils.process_stats import get_rss_mb
+
+
+class ChatSession:
+    def __init__(
+        self, memory: ConversationMemory, collections: Optional[List[str]] = None
+    ):
+        self.memory = memory
+        self.collections = collections or [settings.DEFAULT_COLLECTION]
+        self.last_retrieval: Optional[RetrievalResult] = None
+        self.last_ttft_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._active_stream: Optional[threading.Event] = None
+
+    def start_stream(self) -> threading.Event:
+        # A new message supersedes whatever answer is still streaming
+        self.cancel_active_stream()
+        cancelled = threading.Event()
+        with self._lock:
+            self._active_stream = cancelled
+        return cancelled
+
+    def end_stream(self, cancelled: threading.Event):
+        with self._lock:
+            if self._active_stream is cancelled:
+                self._active_stream = None
+
+    def cancel_active_stream(self):
+        with self._lock:
+            if self._active_stream is not None:
+                logger.info("⏹️ Cancelling the previous response stream")
+                self._active_stream.set()
+                self._active_stream = None
 
 
 class AIService:
     def __init__(self):
         logger.info("🔄 Initializing AIService...")
+        start_time = time.perf_counter()
 
-        self.document_manager = DocumentManager()
         self._initialize_services()
-        logger.info("✅ AIService initialized successfully")
+        logger.info(
+            f"✅ AIService initialized successfully in {time.perf_counter() - start_time:.2f}s "
+            f"(RSS: {get_rss_mb():.0f} MB)"
+        )
 
     def _initialize_services(self):
         logger.info("Initializing AI services...")
-        documents = self.document_manager.read_all_documents()
-
-        if documents:
-            logger.info(f"🔎 Processing {len(documents)} documents...")
-
-            self.vector_db = VectorDBManager()
-            embeddings, metadata = self.vector_db.compute_embeddings(documents)
-            self.vector_db.metadata = metadata
-            self.index = self.vector_db.build_faiss_index(embeddings)
-
-            device = "cpu"
-            if torch.backends.mps.is_available():
-                device = "mps"
-                logger.info("Using MPS (Metal Performance Shaders) for acceleration")
-            elif torch.cuda.is_available():
-                device = "cuda"
-                logger.info("Using CUDA for acceleration")
-            else:
-                logger.info("Using CPU for processing")
-
-            logger.info("Creating FAISS vector store...")
-            self.faiss_vectorstore = FAISS.from_texts(
-                texts=[doc.page_content for doc in documents],
-                embedding=HuggingFaceEmbeddings(
-                    model_name="sentence-transformers/all-MiniLM-L6-v2",
-                    model_kwargs={"device": device},
-                ),
-                metadatas=[doc.metadata for doc in documents],
-            )
-
-            self.retriever = self.faiss_vectorstore.as_retriever(
-                search_type="similarity", k=4
-            )
-            logger.info("Vector store and retriever initialized successfully")
-        else:
+        self.collections = get_collections()
+        # The default collection's shard also provides the shared embedding model
+        self.vector_db = get_vector_db()
+        self.retriever = self.vector_db.as_retriever()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.RETRIEVAL_WORKERS, thread_name_prefix="retrieval"
+        )
+        self.response_cache = (
+            ResponseCache() if settings.RESPONSE_CACHE_ENABLED else None
+        )
+        self.reranker = Reranker() if settings.RERANK_ENABLED else None
+        if self.vector_db.is_empty():
             logger.info(
                 "No documents or URLs found. Vector store will be initialized when content is added."
             )
-            self.faiss_vectorstore = None
-            self.retriever = None
 
         logger.info("Initializing language model...")
         self.llm = ChatGoogleGenerativeAI(
@@ -104,55 +120,275 @@ class AIService:
         )
 
         self.chain: Runnable = self.prompt | self.llm
-        self.chat_history: List[Dict[str, str]] = []
+        self.summary_chain: Runnable = (
+            ChatPromptTemplate.from_template(
+                "Progressively summarize the conversation, adding onto the previous "
+                "summary and keeping names, facts and open questions.\n\n"
+                "Previous summary:\n{summary}\n\nNew lines:\n{transcript}\n\n"
+                "New summary:"
+            )
+            | self.llm
+        )
         logger.info("Chat prompt template and chain setup completed")
 
-    def chat(self, query: str):
-        logger.info(f"💬 Processing query: {query[:50]}...")
+        # Token counts use the embedding tokenizer, which is already loaded and
+        # close enough to the LLM's own to keep prompts within budget
+        self.token_counter = TokenCounter(self.vector_db.embedding_engine.tokenizer)
+        self.context_builder = ContextBuilder(self.token_counter)
+        self.session = self.new_session()
+
+    def new_session(self, collections: Optional[List[str]] = None) -> ChatSession:
+        return ChatSession(
+            ConversationMemory(self.token_counter, summarizer=self._summarize_history),
+            collections,
+        )
+
+    @property
+    def memory(self) -> ConversationMemory:
+        return self.session.memory
+
+    @property
+    def last_retrieval(self) -> Optional[RetrievalResult]:
+        return self.session.last_retrieval
 
-        if not self.retriever:
+    @property
+    def last_ttft_ms(self) -> Optional[float]:
+        return self.session.last_ttft_ms
+
+    def _summarize_history(self, summary: str, messages: List[BaseMessage]) -> str:
+        transcript = "\n".join(
+            f"{message.type}: {message.content}" for message in messages
+        )
+        response = self.summary_chain.invoke(
+            {"summary": summary or "(none)", "transcript": transcript}
+        )
+        return response.content
+
+    def retrieve(
+        self, query: str, session: Optional[ChatSession] = None
+    ) -> RetrievalResult:
+        session = session or self.session
+        if self.collections.is_empty(session.collections):
             logger.warning("No documents available for context retrieval")
-            context = ""
-        elif isinstance(self.retriever, VectorStoreRetriever):
-            logger.info("Retrieving relevant documents...")
-            results_with_scores = (
-                self.retriever.vectorstore.similarity_search_with_score(query, k=3)
+            session.last_retrieval = RetrievalResult(query=query)
+            return session.last_retrieval
+
+        logger.info(f"Retrieving relevant documents from {session.collections}...")
+        with metrics.span("retrieval"):
+            if self.reranker is None:
+                result = self.collections.retrieve(query, session.collections)
+            else:
+                # Cheap first stage over a wider candidate set, capped so the
+                # cross-encoder stays within its latency budget
+                top_k = settings.RETRIEVAL_TOP_K
+                candidates = self.collections.retrieve(
+                    query,
+                    session.collections,
+                    top_k=self.reranker.candidate_cap(top_k),
+                )
+                result = self.reranker.rerank(query, candidates, top_k)
+        if not result.documents:
+            logger.warning("⚠️ No results passed the similarity threshold")
+        for doc, score in zip(result.documents, result.scores):
+            logger.debug(
+                f"[{score:.4f}] {doc.metadata.get('source_file') or doc.metadata.get('source_url')}"
             )
-            filtered_results = [(doc, score) for doc, score in results_with_scores]
+            logger.debug(f"{doc.page_content[:200]} ...")
+        logger.info(f"Retrieved {len(result.documents)} relevant documents")
+        logger.info(f"Retrieval stats: {result.to_dict()}")
+        logger.debug(f"Query cache stats: {self.vector_db.cache_stats}")
 
-            retrieved_docs = []
+        session.last_retrieval = result
+        return result
 
-            if not filtered_results:
-                logger.warning("⚠️ No results passed the similarity threshold")
-                retrieved_docs = []
-            else:
-                for doc, score in filtered_results:
-                    logger.debug(
-                        f"[{score:.4f}] {doc.metadata.get('source_file') or doc.metadata.get('source_url')}"
-                    )
-                    logger.debug(f"{doc.page_content[:200]} ...")
+    def _prepare_inputs(
+        self,
+        query: str,
+        retrieval: RetrievalResult,
+        session: ChatSession,
+        chat_history: List[BaseMessage],
+    ) -> dict:
+        logger.debug("Assembling context within the token budget")
+        with metrics.span("context_build"):
+            built = self.context_builder.build(retrieval.documents)
+        inputs = {
+            "question": query,
+            "context": built.text,
+            "chat_history": chat_history,
+        }
+        prompt_tokens = sum(
+            self.token_counter.count(message.content)
+            for message in self.prompt.format_messages(**inputs)
+        )
+        logger.info(
+            f"📏 Prompt tokens: {prompt_tokens} (context: {built.tokens} from "
+            f"{len(built.documents)} chunks, history: {session.memory.tokens()}; "
+            f"{built.duplicates_removed} duplicates, {built.overlap_chars_removed} "
+            f"overlap chars, {built.truncated} truncated, {built.dropped} dropped)"
+        )
+        return inputs
 
-                retrieved_docs = [doc for doc, _ in filtered_results]
-                logger.info(f"Retrieved {len(retrieved_docs)} relevant documents")
+    def _lookup_cached_answer(
+        self, query: str, retrieval: RetrievalResult
+    ) -> Tuple[Optional[str], Optional[tuple]]:
+        if self.response_cache is None or not retrieval.documents:
+            return None, None
+        query_embedding = self.vector_db.encode_query(query)
+        context_key = ResponseCache.context_key(
+            retrieval.documents, retrieval.index_version
+        )
+        cache_entry = (query, query_embedding, context_key)
+        with metrics.span("response_cache_lookup"):
+            answer = self.response_cache.lookup(query_embedding, context_key)
+        if answer is not None:
+            metrics.increment("response_cache_hits_total")
+        return answer, cache_entry
 
-        else:
-            logger.info("Using custom retriever to get relevant documents")
-            retrieved_docs = self.retriever.get_relevant_documents(query)
+    def _finish_turn(
+        self,
+        session: ChatSession,
+        query: str,
+        answer: str,
+        cache_entry: Optional[tuple],
+        cached: bool,
+    ):
+        if cache_entry is not None and not cached:
+            self.response_cache.store(*cache_entry, answer)
+        session.memory.add_turn(query, answer)
 
-        if self.retriever:
-            logger.debug("Combining retrieved documents into context")
-            context = "\n\n".join([doc.page_content for doc in retrieved_docs])
-            logger.debug(f"Context length: {len(context)} characters")
+    def stream_answer(
+        self,
+        query: str,
+        retrieval: RetrievalResult,
+        session: Optional[ChatSession] = None,
+    ) -> Iterator[str]:
+        session = session or self.session
+        inputs = self._prepare_inputs(
+            query, retrieval, session, session.memory.messages()
+        )
+        answer, cache_entry = self._lookup_cached_answer(query, retrieval)
+        cached = answer is not None
+        if cached:
+            yield from replay(answer)
         else:
-            context = ""
+            logger.info("🧠 Generating response...")
+            answer = ""
+            start_time = time.perf_counter()
+            first_token = True
+            for chunk in self.chain.stream(inputs):
+                logger.debug(f"Generated chunk: {chunk.content[:50]}...")
+                if first_token and chunk.content:
+                    _observe_llm_first_token(start_time)
+                    first_token = False
+                answer += chunk.content
+                yield chunk.content
+            metrics.observe(
+                "stage_duration_seconds", time.perf_counter() - start_time, "llm"
+            )
 
-        logger.info("🧠 Generating response...")
+        self._finish_turn(session, query, answer, cache_entry, cached)
 
-        for chunk in self.chain.stream(
-            {"question": query, "context": context, "chat_history": self.chat_history}
-        ):
-            logger.debug(f"Generated chunk: {chunk.content[:50]}...")
+    def chat(self, query: str, session: Optional[ChatSession] = None):
+        logger.info(f"💬 Processing query: {query[:50]}...")
+        metrics.increment("queries_total")
 
-        self.chat_history.append(HumanMessage(content=query))
-        self.chat_history.append(AIMessage(content=chunk.content))
+        with metrics.span("chat"):
+            retrieval = self.retrieve(query, session)
+            answer = "".join(self.stream_answer(query, retrieval, session))
         logger.info("✅ Response generated and chat history updated")
+        return answer
+
+    async def astream_chat(
+        self, query: str, session: Optional[ChatSession] = None
+    ) -> AsyncIterator[str]:
+        logger.info(f"💬 Processing query (async): {query[:50]}...")
+        metrics.increment("queries_total")
+        start_time = time.perf_counter()
+        session = session or self.session
+        cancelled = session.start_stream()
+
+        loop = asyncio.get_running_loop()
+        # Retrieval (query embedding + index search) runs off the event loop
+        # while the history half of the prompt is prepared here
+        retrieval_future = loop.run_in_executor(
+            self._executor, self.retrieve, query, session
+        )
+        chat_history = session.memory.messages()
+        retrieval = await retrieval_future
+        inputs = await loop.run_in_executor(
+            self._executor,
+            self._prepare_inputs,
+            query,
+            retrieval,
+            session,
+            chat_history,
+        )
+        answer, cache_entry = await loop.run_in_executor(
+            self._executor, self._lookup_cached_answer, query, retrieval
+        )
+        cached = answer is not None
+        stream = _aiter_strings(replay(answer)) if cached else self._astream_llm(inputs)
+
+        answer = ""
+        first_token = True
+        try:
+            async with aclosing(stream):
+                async for token in stream:
+                    if cancelled.is_set():
+                        logger.info("Response stream cancelled by a newer message")
+                        return
+                    if first_token and token:
+                        first_token = False
+                        session.last_ttft_ms = (time.perf_counter() - start_time) * 1000
+                        metrics.observe(
+                            "time_to_first_token_seconds",
+                            session.last_ttft_ms / 1000,
+                        )
+                        logger.info(
+                            f"⚡ Time to first token: {session.last_ttft_ms:.0f} ms"
+                        )
+                    answer += token
+                    yield token
+        except asyncio.CancelledError:
+            logger.info("Response stream cancelled")
+            raise
+        finally:
+            session.end_stream(cancelled)
+
+        await loop.run_in_executor(
+            self._executor,
+            self._finish_turn,
+            session,
+            query,
+            answer,
+            cache_entry,
+            cached,
+        )
+        elapsed = time.perf_counter() - start_time
+        metrics.observe("stage_duration_seconds", elapsed, "chat")
+        logger.info(f"✅ Response streamed in {elapsed:.2f}s and chat history updated")
+
+    async def _astream_llm(self, inputs: dict) -> AsyncIterator[str]:
+        logger.info("🧠 Generating response...")
+        start_time = time.perf_counter()
+        first = True
+        async for chunk in self.chain.astream(inputs):
+            logger.debug(f"Generated chunk: {chunk.content[:50]}...")
+            if first and chunk.content:
+                _observe_llm_first_token(start_time)
+                first = False
+            yield chunk.content
+        metrics.observe(
+            "stage_duration_seconds", time.perf_counter() - start_time, "llm"
+        )
+
+
+def _observe_llm_first_token(start_time: float):
+    metrics.observe(
+        "stage_duration_seconds", time.perf_counter() - start_time, "llm_first_token"
+    )
+
+
+async def _aiter_strings(strings: Iterator[str]) -> AsyncIterator[str]:
+    for string in strings:
+        yield string
@@ -0,0 +1,203 @@
+# app/services/bm25_index.py
+
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Set, Tuple
+
+import numpy as np
+from config import settings
+from utils.logger import logger
+
+# Keeps codes like "E-4821", "RC-123456" or "v2.1" together as single terms
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+# Tombstoned postings are compacted away once they outnumber this share of docs
+COMPACT_RATIO = 0.25
+MIN_COMPACT_DOCS = 1000
+# Function words match nearly every chunk and would turn any question into a
+# lexical hit on unrelated text
+STOPWORDS = frozenset(
+    "a about above after again against all am an and any are as at be because "
+    "been before being below between both but by can could did do does doing "
+    "down during each few for from further had has have having he her here hers "
+    "him his how i if in into is it its itself just me more most my no nor not "
+    "of off on once only or other our ours out over own same she should so some "
+    "such than that the their theirs them then there these they this those "
+    "through to too under until up very was we were what when where which while "
+    "who whom why will with would you your yours".split()
+)
+
+
+def analyze(text: str) -> Counter:
+    terms = Counter()
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms[token] += 1
+        # Compound codes also match on their parts ("E-4821" -> "e", "4821")
+        if not token.isalnum():
+            terms.update(part for part in re.split(r"[-./]", token) if part)
+    return terms
+
+
+def exact_match_terms(terms: Counter) -> Counter:
+    # Part numbers, error codes and versions: terms dense retrieval misses
+    return Counter(
+        {term: tf for term, tf in terms.items() if any(c.isdigit() for c in term)}
+    )
+
+
+class BM25Index:
+    def __init__(self, k1: float = settings.BM25_K1, b: float = settings.BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        self.doc_freqs = array("I")
+        # Postings are parallel, append-only arrays per term; chunk IDs only
+        # grow, so each list stays sorted without any re-sorting
+        self.posting_ids: List[array] = []
+        self.posting_tfs: List[array] = []
+        self.doc_lengths = array("I")
+        self.removed: Set[int] = set()
+        self.num_docs = 0
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def add(self, chunk_id: int, terms: Counter):
+        if chunk_id >= len(self.doc_lengths):
+            self.doc_lengths.extend([0] * (chunk_id + 1 - len(self.doc_lengths)))
+        length = sum(terms.values())
+        self.doc_lengths[chunk_id] = length
+        self.num_docs += 1
+        self.total_length += length
+
+        for term, tf in terms.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                term_id = len(self.vocabulary)
+                self.vocabulary[term] = term_id
+                self.doc_freqs.append(0)
+                self.posting_ids.append(array("q"))
+                self.posting_tfs.append(array("I"))
+            self.doc_freqs[term_id] += 1
+            self.posting_ids[term_id].append(chunk_id)
+            self.posting_tfs[term_id].append(tf)
+
+    def remove(self, chunk_id: int, terms: Counter):
+        if chunk_id >= len(self.doc_lengths) or chunk_id in self.removed:
+            return
+        # Postings keep the entry as a tombstone; statistics update right away
+        self.removed.add(chunk_id)
+        self.num_docs -= 1
+        self.total_length -= self.doc_lengths[chunk_id]
+        self.doc_lengths[chunk_id] = 0
+        for term in terms:
+            term_id = self.vocabulary.get(term)
+            if term_id is not None:
+                self.doc_freqs[term_id] -= 1
+
+        if len(self.removed) > max(MIN_COMPACT_DOCS, COMPACT_RATIO * self.num_docs):
+            self.compact()
+
+    def _live_postings(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        removed = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+        for ids, tfs in zip(self.posting_ids, self.posting_tfs):
+            ids_view = np.frombuffer(ids, dtype=np.int64)
+            tfs_view = np.frombuffer(tfs, dtype=np.uint32)
+            if len(removed):
+                keep = ~np.isin(ids_view, removed)
+                ids_view, tfs_view = ids_view[keep], tfs_view[keep]
+            yield ids_view, tfs_view
+
+    def compact(self):
+        logger.info(f"Compacting BM25 postings ({len(self.removed)} removed chunks)")
+        postings = list(self._live_postings())
+        self.posting_ids = [array("q", ids.tobytes()) for ids, _ in postings]
+        self.posting_tfs = [array("I", tfs.tobytes()) for _, tfs in postings]
+        self.removed.clear()
+
+    def search(self, terms: Counter, k: int) -> List[Tuple[int, float]]:
+        if not self.num_docs:
+            return []
+        avg_length = self.total_length / self.num_docs
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32)
+
+        ids_parts, score_parts = [], []
+        for term in terms:
+            term_id = self.vocabulary.get(term)
+            if term_id is None or not self.doc_freqs[term_id]:
+                continue
+            df = self.doc_freqs[term_id]
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            ids = np.frombuffer(self.posting_ids[term_id], dtype=np.int64)
+            tfs = np.frombuffer(self.posting_tfs[term_id], dtype=np.uint32).astype(
+                np.float32
+            )
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[ids] / avg_length)
+            ids_parts.append(ids)
+            score_parts.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not ids_parts:
+            return []
+
+        ids, inverse = np.unique(np.concatenate(ids_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        if self.removed:
+            alive = ~np.isin(ids, list(self.removed))
+            ids, scores = ids[alive], scores[alive]
+        if len(ids) > k:
+            top = np.argpartition(-scores, k)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        # Tombstones are dropped on export without mutating the live index,
+        # which may be searched concurrently
+        postings = list(self._live_postings())
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        lengths = np.array([len(ids) for ids, _ in postings], dtype=np.int64)
+        return {
+            "params": np.array(
+                [self.k1, self.b, self.num_docs, self.total_length], dtype=np.float64
+            ),
+            "terms": np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            "doc_freqs": np.array(self.doc_freqs, dtype=np.uint32),
+            "offsets": np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            "posting_ids": np.concatenate(
+                [ids for ids, _ in postings] or [np.empty(0, dtype=np.int64)]
+            ),
+            "posting_tfs": np.concatenate(
+                [tfs for _, tfs in postings] or [np.empty(0, dtype=np.uint32)]
+            ),
+            "doc_lengths": np.array(self.doc_lengths, dtype=np.uint32),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "BM25Index":
+        k1, b, num_docs, total_length = arrays["params"].tolist()
+        index = cls(k1=k1, b=b)
+        terms = bytes(arrays["terms"]).decode("utf-8")
+        index.vocabulary = {
+            term: term_id
+            for term_id, term in enumerate(terms.split("\n") if terms else [])
+        }
+        index.doc_freqs = array("I", arrays["doc_freqs"].tobytes())
+        offsets = arrays["offsets"]
+        posting_ids, posting_tfs = arrays["posting_ids"], arrays["posting_tfs"]
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            index.posting_ids.append(array("q", posting_ids[start:end].tobytes()))
+            index.posting_tfs.append(array("I", posting_tfs[start:end].tobytes()))
+        index.doc_lengths = array("I", arrays["doc_lengths"].tobytes())
+        index.num_docs = int(num_docs)
+        index.total_length = int(total_length)
+        return index
+
+    @classmethod
+    def build(cls, documents: Dict[int, str]) -> "BM25Index":
+        index = cls()
+        for chunk_id in sorted(documents):
+            index.add(chunk_id, analyze(documents[chunk_id]))
+        return index
@@ -0,0 +1,181 @@
+# app/services/chunk_store.py
+
+import json
+import os
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def _read_blob(path: str, use_mmap: bool):
+    if os.path.getsize(path) == 0:
+        return b""
+    if use_mmap:
+        # Pages are only faulted in for the chunks that are actually read
+        return np.memmap(path, dtype=np.uint8, mode="r")
+    return np.fromfile(path, dtype=np.uint8)
+
+
+class _Blob:
+    # A read-only (possibly memory-mapped) base segment plus an in-memory tail
+    # for everything appended since the store was loaded
+    def __init__(self, base=b""):
+        self.base = base
+        self.base_size = len(base)
+        self.tail = bytearray()
+
+    def __len__(self) -> int:
+        return self.base_size + len(self.tail)
+
+    def append(self, data: bytes):
+        self.tail += data
+
+    def read(self, start: int, end: int) -> bytes:
+        if start >= self.base_size:
+            return bytes(self.tail[start - self.base_size : end - self.base_size])
+        return bytes(self.base[start:end])
+
+
+class ChunkStore:
+    # Columnar chunk storage addressed by integer chunk ID: chunk texts and
+    # JSON metadata live back to back in two byte blobs, located through
+    # offset arrays. Rows are appended in chunk ID order, so lookups bisect
+    # the ID column; removed rows are masked until the next save compacts them.
+    def __init__(self):
+        self.ids = array("q")
+        self.text_offsets = array("q", [0])
+        self.meta_offsets = array("q", [0])
+        self.alive = bytearray()
+        self.texts = _Blob()
+        self.metas = _Blob()
+        # Blobs are append-only, so replaced metadata is kept per row until
+        # the next save writes it in place
+        self.replaced_metas: Dict[int, bytes] = {}
+        self.num_live = 0
+
+    def __len__(self) -> int:
+        return self.num_live
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return self._row(chunk_id) is not None
+
+    def _row(self, chunk_id: int) -> Optional[int]:
+        row = bisect_left(self.ids, chunk_id)
+        if row < len(self.ids) and self.ids[row] == chunk_id and self.alive[row]:
+            return row
+        return None
+
+    def add(self, chunk_id: int, text: str, metadata: dict):
+        if self.ids and chunk_id <= self.ids[-1]:
+            raise ValueError(f"Chunk IDs must increase, got {chunk_id}")
+        encoded_text = text.encode("utf-8")
+        encoded_meta = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+        self.texts.append(encoded_text)
+        self.metas.append(encoded_meta)
+        self.text_offsets.append(len(self.texts))
+        self.meta_offsets.append(len(self.metas))
+        self.alive.append(1)
+        # The ID goes in last so concurrent readers never see a partial row
+        self.ids.append(chunk_id)
+        self.num_live += 1
+
+    def remove(self, chunk_id: int) -> Optional[str]:
+        row = self._row(chunk_id)
+        if row is None:
+            return None
+        text = self._text(row)
+        self.alive[row] = 0
+        self.replaced_metas.pop(row, None)
+        self.num_live -= 1
+        return text
+
+    def _text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return self.texts.read(start, end).decode("utf-8")
+
+    def _meta(self, row: int) -> bytes:
+        meta = self.replaced_metas.get(row)
+        if meta is None:
+            meta = self.metas.read(self.meta_offsets[row], self.meta_offsets[row + 1])
+        return meta
+
+    def _document(self, row: int) -> Document:
+        return Document(
+            page_content=self._text(row), metadata=json.loads(self._meta(row))
+        )
+
+    def replace_metadata(self, chunk_id: int, metadata: dict) -> bool:
+        row = self._row(chunk_id)
+        if row is None:
+            return False
+        self.replaced_metas[row] = json.dumps(metadata, ensure_ascii=False).encode(
+            "utf-8"
+        )
+        return True
+
+    def get(self, chunk_id: int) -> Optional[Document]:
+        row = self._row(chunk_id)
+        return self._document(row) if row is not None else None
+
+    def get_text(self, chunk_id: int) -> Optional[str]:
+        row = self._row(chunk_id)
+        return self._text(row) if row is not None else None
+
+    def items(self) -> Iterator[Tuple[int, Document]]:
+        for row, chunk_id in enumerate(self.ids):
+            if self.alive[row]:
+                yield chunk_id, self._document(row)
+
+    def texts_by_id(self) -> Iterator[Tuple[int, str]]:
+        for row, chunk_id in enumerate(self.ids):
+            if self.alive[row]:
+                yield chunk_id, self._text(row)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            len(self.texts)
+            + len(self.metas)
+            + 8 * (len(self.ids) + len(self.text_offsets) + len(self.meta_offsets))
+            + len(self.alive)
+            + sum(len(meta) for meta in self.replaced_metas.values())
+        )
+
+    def write(self, text_path: str, meta_path: str, offsets_path: str):
+        # Live rows only, so removed chunks are compacted away on every save
+        live = [row for row in range(len(self.ids)) if self.alive[row]]
+        text_offsets, meta_offsets = [0], [0]
+        with open(text_path, "wb") as texts, open(meta_path, "wb") as metas:
+            for row in live:
+                text = self.texts.read(
+                    self.text_offsets[row], self.text_offsets[row + 1]
+                )
+                meta = self._meta(row)
+                texts.write(text)
+                metas.write(meta)
+                text_offsets.append(text_offsets[-1] + len(text))
+                meta_offsets.append(meta_offsets[-1] + len(meta))
+        np.savez(
+            offsets_path,
+            ids=np.array([self.ids[row] for row in live], dtype=np.int64),
+            text_offsets=np.array(text_offsets, dtype=np.int64),
+            meta_offsets=np.array(meta_offsets, dtype=np.int64),
+        )
+
+    @classmethod
+    def read(
+        cls, text_path: str, meta_path: str, offsets_path: str, use_mmap: bool = True
+    ) -> "ChunkStore":
+        store = cls()
+        with np.load(offsets_path) as data:
+            store.ids = array("q", data["ids"].tobytes())
+            store.text_offsets = array("q", data["text_offsets"].tobytes())
+            store.meta_offsets = array("q", data["meta_offsets"].tobytes())
+        store.alive = bytearray(b"\x01" * len(store.ids))
+        store.texts = _Blob(_read_blob(text_path, use_mmap))
+        store.metas = _Blob(_read_blob(meta_path, use_mmap))
+        store.num_live = len(store.ids)
+        return store
@@ -0,0 +1,95 @@
+# app/services/chunker.py
+
+from typing import List, Optional
+
+from config import settings
+from langchain_core.documents import Document
+from langchain_text_splitters import (
+    CharacterTextSplitter,
+    RecursiveCharacterTextSplitter,
+    TextSplitter,
+)
+from utils.logger import logger
+from utils.thread_tokenizer import ThreadLocalTokenizer
+
+SPLITTERS = ("recursive", "character", "none")
+
+
+class DocumentChunker:
+    def __init__(
+        self,
+        tokenizer,
+        splitter: str = settings.CHUNK_SPLITTER,
+        chunk_size: int = settings.CHUNK_SIZE,
+        chunk_overlap: int = settings.CHUNK_OVERLAP,
+    ):
+        if splitter not in SPLITTERS:
+            raise ValueError(
+                f"Unknown chunk splitter '{splitter}'. Expected one of {SPLITTERS}."
+            )
+        logger.info(
+            f"Initializing DocumentChunker with splitter: {splitter}, "
+            f"chunk_size: {chunk_size} tokens, chunk_overlap: {chunk_overlap} tokens"
+        )
+        self.splitter_name = splitter
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.splitter = self._create_splitter(tokenizer)
+
+    def _create_splitter(self, tokenizer) -> Optional[TextSplitter]:
+        if self.splitter_name == "none":
+            return None
+        splitter_class = (
+            RecursiveCharacterTextSplitter
+            if self.splitter_name == "recursive"
+            else CharacterTextSplitter
+        )
+        # Lengths are measured with the embedding model's own tokenizer so
+        # chunks fit inside its max_seq_length instead of being truncated.
+        # Ingest workers chunk while queries encode, so each thread counts
+        # with a private copy rather than the instance the model uses.
+        tokenizers = ThreadLocalTokenizer(tokenizer)
+        return splitter_class(
+            length_function=lambda text: len(tokenizers.get().tokenize(text)),
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+        )
+
+    @property
+    def config(self) -> dict:
+        return {
+            "splitter": self.splitter_name,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
+
+    def split_documents(
+        self, documents: List[Document], source_id: str
+    ) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            page = doc.metadata.get("page")
+            texts = (
+                [doc.page_content]
+                if self.splitter is None
+                else self.splitter.split_text(doc.page_content)
+            )
+            for text in texts:
+                chunk_index = len(chunks)
+                chunk_key = (
+                    f"{source_id}#p{page}#c{chunk_index}"
+                    if page is not None
+                    else f"{source_id}#c{chunk_index}"
+                )
+                metadata = {
+                    **doc.metadata,
+                    "source_id": source_id,
+                    "chunk_index": chunk_index,
+                    "chunk_key": chunk_key,
+                }
+                chunks.append(Document(page_content=text, metadata=metadata))
+
+        logger.info(
+            f"Split {len(documents)} documents from {source_id} into {len(chunks)} chunks"
+        )
+        return chunks
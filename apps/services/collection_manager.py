@@ -0,0 +1,226 @@
+# app/services/collection_manager.py
+
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import settings
+from services.document_cache import ParsedDocumentCache
+from services.document_manager import DocumentManager
+from services.embedding_engine import EmbeddingEngine
+from services.index_store import IndexStore
+from services.retrieval import RetrievalResult
+from services.vector_db_manager import VectorDBManager
+from services.web_fetcher import WebFetcher
+from utils.logger import logger
+from utils.lru_cache import LRUCache
+from utils.metrics import metrics
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+class Collection:
+    def __init__(
+        self, name: str, document_manager: DocumentManager, vector_db: VectorDBManager
+    ):
+        self.name = name
+        self.document_manager = document_manager
+        self.vector_db = vector_db
+
+
+class CollectionManager:
+    # Each collection has its own documents, URL list and persisted index
+    # shard. The default collection keeps the original single-index paths.
+    def __init__(
+        self,
+        collections_dir: str = settings.COLLECTIONS_DIR,
+        default_collection: str = settings.DEFAULT_COLLECTION,
+        search_workers: int = settings.COLLECTION_SEARCH_WORKERS,
+    ):
+        logger.info(f"Initializing CollectionManager with {collections_dir}")
+        self.collections_dir = collections_dir
+        self.default_collection = default_collection
+        self._collections: Dict[str, Collection] = {}
+        self._lock = threading.Lock()
+        # Opening runs a full sync, so it is serialized per collection only
+        self._open_locks: Dict[str, threading.Lock] = {}
+        self._engine_lock = threading.Lock()
+        self._embedding_engine: Optional[EmbeddingEngine] = None
+        self._document_cache = ParsedDocumentCache()
+        self._web_fetcher = WebFetcher()
+        self._embedding_cache = LRUCache(
+            settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL
+        )
+        # FAISS releases the GIL during search, so shards run truly in parallel
+        self._executor = ThreadPoolExecutor(
+            max_workers=search_workers, thread_name_prefix="shard-search"
+        )
+        os.makedirs(self.collections_dir, exist_ok=True)
+
+    def names(self) -> List[str]:
+        names = {self.default_collection}
+        names.update(
+            entry
+            for entry in os.listdir(self.collections_dir)
+            if os.path.isdir(os.path.join(self.collections_dir, entry))
+        )
+        return sorted(names)
+
+    def exists(self, name: str) -> bool:
+        return name in self.names()
+
+    def loaded(self) -> List[Collection]:
+        with self._lock:
+            return list(self._collections.values())
+
+    def _paths(self, name: str) -> Dict[str, str]:
+        if name == self.default_collection:
+            return {
+                "upload_folder": "data/documents",
+                "url_file": "data/urls/urls.txt",
+                "index_dir": settings.INDEX_DIR,
+            }
+        root = os.path.join(self.collections_dir, name)
+        return {
+            "upload_folder": os.path.join(root, "documents"),
+            "url_file": os.path.join(root, "urls", "urls.txt"),
+            "index_dir": os.path.join(root, "index"),
+        }
+
+    def create(self, name: str) -> Collection:
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(
+                f"Invalid collection name '{name}'. Use lowercase letters, digits, "
+                "'-' and '_' (up to 64 characters)."
+            )
+        if name != self.default_collection:
+            os.makedirs(os.path.join(self.collections_dir, name), exist_ok=True)
+        return self.get(name)
+
+    def delete(self, name: str):
+        if name == self.default_collection:
+            raise ValueError("The default collection cannot be deleted")
+        # Callers with an ingestion queue go through
+        # IngestionQueue.delete_collection, so no job writes into it meanwhile
+        with self._lock:
+            self._collections.pop(name, None)
+            self._open_locks.pop(name, None)
+            shutil.rmtree(os.path.join(self.collections_dir, name), ignore_errors=True)
+        logger.info(f"🗑️ Deleted collection {name}")
+
+    def get(self, name: str) -> Collection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is not None:
+                return collection
+            open_lock = self._open_locks.setdefault(name, threading.Lock())
+
+        with open_lock:
+            with self._lock:
+                collection = self._collections.get(name)
+            if collection is None:
+                if not self.exists(name):
+                    raise KeyError(f"Unknown collection: {name}")
+                collection = self._open(name)
+                with self._lock:
+                    self._collections[name] = collection
+            return collection
+
+    def _get_embedding_engine(self) -> EmbeddingEngine:
+        # The first shard loads the model; the rest reuse it
+        with self._engine_lock:
+            if self._embedding_engine is None:
+                self._embedding_engine = EmbeddingEngine(settings.EMBEDDING_MODEL)
+            return self._embedding_engine
+
+    def _open(self, name: str) -> Collection:
+        logger.info(f"🔄 Opening collection {name}...")
+        paths = self._paths(name)
+        document_manager = DocumentManager(
+            upload_folder=paths["upload_folder"],
+            url_file=paths["url_file"],
+            collection=name,
+            document_cache=self._document_cache,
+            web_fetcher=self._web_fetcher,
+        )
+        vector_db = VectorDBManager(
+            IndexStore(paths["index_dir"]),
+            embedding_engine=self._get_embedding_engine(),
+            embedding_cache=self._embedding_cache,
+        )
+        vector_db.load()
+        if vector_db.sync_sources(
+            document_manager.list_sources(), document_manager.load_sources
+        ):
+            vector_db.save()
+        logger.info(f"✅ Collection {name} ready")
+        return Collection(name, document_manager, vector_db)
+
+    def is_empty(self, names: List[str]) -> bool:
+        return all(self.get(name).vector_db.is_empty() for name in names)
+
+    def retrieve(self, query: str, names: List[str], **kwargs) -> RetrievalResult:
+        shards = [self.get(name).vector_db for name in names]
+        shards = [shard for shard in shards if not shard.is_empty()]
+        if len(shards) <= 1:
+            if not shards:
+                return RetrievalResult(query=query)
+            return shards[0].retrieve(query, **kwargs)
+
+        start_time = time.perf_counter()
+        # One encode up front; every shard then finds it in the shared cache
+        shards[0].encode_query(query)
+        with metrics.span("fan_out") as span:
+            results = list(
+                self._executor.map(
+                    lambda shard: shard.retrieve(query, **kwargs), shards
+                )
+            )
+        merged = merge_results(query, results, kwargs.get("top_k"))
+        merged.timings_ms["fan_out"] = span.elapsed_ms
+        merged.elapsed_ms = (time.perf_counter() - start_time) * 1000
+        return merged
+
+
+def merge_results(
+    query: str, results: List[RetrievalResult], top_k: Optional[int] = None
+) -> RetrievalResult:
+    # Dense scores are cosine similarities and hybrid scores are RRF values
+    # over same-sized candidate lists, so both compare across shards; BM25
+    # scores in lexical mode use per-shard IDF and only approximately do
+    top_k = top_k or settings.RETRIEVAL_TOP_K
+    hits = sorted(
+        (
+            (score, doc)
+            for result in results
+            for doc, score in zip(result.documents, result.scores)
+        ),
+        key=lambda hit: hit[0],
+        reverse=True,
+    )[:top_k]
+    timings = {}
+    for result in results:
+        for stage, elapsed in result.timings_ms.items():
+            # Shards run concurrently, so the slowest one bounds each stage
+            timings[stage] = max(timings.get(stage, 0.0), elapsed)
+    return RetrievalResult(
+        query=query,
+        documents=[doc for _, doc in hits],
+        scores=[score for score, _ in hits],
+        candidate_scores=sorted(
+            (score for result in results for score in result.candidate_scores),
+            reverse=True,
+        ),
+        dropped_below_threshold=sum(r.dropped_below_threshold for r in results),
+        dropped_by_drop_off=sum(r.dropped_by_drop_off for r in results),
+        cached=all(result.cached for result in results),
+        # Per-shard versions, so no two different shard states can collide
+        index_version=tuple(result.index_version for result in results),
+        mode=results[0].mode,
+        lexical_matches=sum(result.lexical_matches for result in results),
+        timings_ms=timings,
+    )
@@ -0,0 +1,203 @@
+# app/services/context_builder.py
+
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from config import settings
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from utils.logger import logger
+from utils.thread_tokenizer import ThreadLocalTokenizer
+
+# Overlaps shorter than this are treated as coincidental rather than shared text
+MIN_OVERLAP_CHARS = 20
+# Trimming a chunk below this many tokens leaves nothing useful to cite
+MIN_TRIMMED_CHUNK_TOKENS = 32
+
+
+class TokenCounter:
+    def __init__(self, tokenizer):
+        # Counting runs on request threads while the embedding model encodes
+        # on others, so it never touches the model's own tokenizer instance
+        self._tokenizers = ThreadLocalTokenizer(tokenizer)
+
+    @property
+    def tokenizer(self):
+        return self._tokenizers.get()
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        encoding = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        offsets = encoding["offset_mapping"]
+        if len(offsets) <= max_tokens:
+            return text
+        return text[: offsets[max_tokens - 1][1]]
+
+
+@dataclass
+class BuiltContext:
+    text: str = ""
+    documents: List[Document] = field(default_factory=list)
+    tokens: int = 0
+    duplicates_removed: int = 0
+    overlap_chars_removed: int = 0
+    truncated: int = 0
+    dropped: int = 0
+
+
+class ContextBuilder:
+    def __init__(
+        self,
+        counter: TokenCounter,
+        token_budget: int = settings.PROMPT_CONTEXT_TOKEN_BUDGET,
+    ):
+        self.counter = counter
+        self.token_budget = token_budget
+
+    @staticmethod
+    def _overlap(previous: str, text: str) -> int:
+        # Longest suffix of previous that is also a prefix of text
+        for size in range(min(len(previous), len(text)), MIN_OVERLAP_CHARS - 1, -1):
+            if previous.endswith(text[:size]):
+                return size
+        return 0
+
+    def _deduplicate(self, documents: List[Document], built: BuiltContext):
+        kept: List[Tuple[Document, str]] = []
+        for doc in documents:
+            text = doc.page_content.strip()
+            if any(text in other for _, other in kept):
+                built.duplicates_removed += 1
+                continue
+
+            # Neighbouring chunks of one source share CHUNK_OVERLAP tokens
+            source_id = doc.metadata.get("source_id")
+            chunk_index = doc.metadata.get("chunk_index")
+            for other_doc, other in kept:
+                if (
+                    source_id is None
+                    or chunk_index is None
+                    or other_doc.metadata.get("source_id") != source_id
+                ):
+                    continue
+                other_index = other_doc.metadata.get("chunk_index")
+                if other_index == chunk_index - 1:
+                    overlap = self._overlap(other, text)
+                    text = text[overlap:].lstrip()
+                    built.overlap_chars_removed += overlap
+                elif other_index == chunk_index + 1:
+                    overlap = self._overlap(text, other)
+                    text = text[: len(text) - overlap].rstrip()
+                    built.overlap_chars_removed += overlap
+            if text:
+                kept.append((doc, text))
+        return kept
+
+    def build(self, documents: List[Document]) -> BuiltContext:
+        built = BuiltContext()
+        parts = []
+        remaining = self.token_budget
+
+        # Documents arrive in relevance order, so the budget is spent on the best first
+        for doc, text in self._deduplicate(documents, built):
+            tokens = self.counter.count(text)
+            if tokens > remaining:
+                if remaining < MIN_TRIMMED_CHUNK_TOKENS:
+                    built.dropped += 1
+                    continue
+                text = self.counter.truncate(text, remaining)
+                tokens = self.counter.count(text)
+                built.truncated += 1
+            parts.append(text)
+            built.documents.append(doc)
+            remaining -= tokens
+
+        built.text = "\n\n".join(parts)
+        built.tokens = self.token_budget - remaining
+        return built
+
+
+class ConversationMemory:
+    def __init__(
+        self,
+        counter: TokenCounter,
+        summarizer: Optional[Callable[[str, List[BaseMessage]], str]] = None,
+        window_turns: int = settings.HISTORY_WINDOW_TURNS,
+        token_budget: int = settings.PROMPT_HISTORY_TOKEN_BUDGET,
+        summary_token_budget: int = settings.HISTORY_SUMMARY_TOKEN_BUDGET,
+    ):
+        self.counter = counter
+        self.summarizer = summarizer
+        self.window_turns = window_turns
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.turns: List[Tuple[HumanMessage, AIMessage]] = []
+        self.summary = ""
+
+    def _turn_tokens(self, turn: Tuple[HumanMessage, AIMessage]) -> int:
+        return sum(self.counter.count(message.content) for message in turn)
+
+    def window_tokens(self) -> int:
+        return sum(self._turn_tokens(turn) for turn in self.turns)
+
+    def add_turn(self, question: str, answer: str):
+        self.turns.append((HumanMessage(content=question), AIMessage(content=answer)))
+
+        evicted: List[BaseMessage] = []
+        while self.turns and (
+            len(self.turns) > self.window_turns
+            or self.window_tokens() > self.token_budget - self.summary_token_budget
+        ):
+            evicted.extend(self.turns.pop(0))
+        if evicted:
+            self._update_summary(evicted)
+
+    def _update_summary(self, evicted: List[BaseMessage]):
+        # Only the evicted turns are folded in, so each update costs one short call
+        logger.info(f"Folding {len(evicted) // 2} old turns into the history summary")
+        summary = None
+        if self.summarizer is not None:
+            try:
+                summary = self.summarizer(self.summary, evicted)
+            except Exception as e:
+                logger.warning(f"History summarization failed, appending instead: {e}")
+        if summary is None:
+            lines = [f"{message.type}: {message.content}" for message in evicted]
+            summary = "\n".join(filter(None, [self.summary, *lines]))
+        self.summary = self._keep_tail(summary)
+
+    def _keep_tail(self, text: str) -> str:
+        # Older context matters least, so an over-long summary keeps its end
+        if self.counter.count(text) <= self.summary_token_budget:
+            return text
+        words = text.split()
+        while words and self.counter.count(" ".join(words)) > self.summary_token_budget:
+            words = words[max(1, len(words) // 10) :]
+        return " ".join(words)
+
+    def messages(self) -> List[BaseMessage]:
+        messages: List[BaseMessage] = []
+        if self.summary:
+            messages.append(
+                SystemMessage(
+                    content=f"Summary of the earlier conversation:\n{self.summary}"
+                )
+            )
+        for turn in self.turns:
+            messages.extend(turn)
+        return messages
+
+    def tokens(self) -> int:
+        return self.counter.count(self.summary) + self.window_tokens()
+
+    def clear(self):
+        self.turns = []
+        self.summary = ""
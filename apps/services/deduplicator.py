@@ -0,0 +1,307 @@
+# app/services/deduplicator.py
+
+import hashlib
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from config import settings
+from langchain_core.documents import Document
+from services.bm25_index import TOKEN_PATTERN
+
+WORD_PATTERN = re.compile(r"\w+")
+# Fixed so that band keys persisted with the index stay valid across restarts
+MINHASH_SEED = 17
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def text_key(text: str) -> int:
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    words = WORD_PATTERN.findall(text.casefold())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def codes(text: str) -> Set[str]:
+    # Error codes, part numbers, versions and values: chunks that differ in
+    # any of these are never merged, however similar the rest of the text is
+    return {
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if any(c.isdigit() for c in token)
+    }
+
+
+@dataclass
+class Fingerprint:
+    exact: int
+    bands: List[int]
+    shingles: Set[int]
+    codes: Set[str]
+    normalized: str
+
+
+class MinHasher:
+    def __init__(
+        self,
+        num_perm: int = settings.DEDUP_NUM_PERM,
+        bands: int = settings.DEDUP_BANDS,
+        shingle_size: int = settings.DEDUP_SHINGLE_SIZE,
+    ):
+        if num_perm % bands:
+            raise ValueError(
+                f"DEDUP_NUM_PERM ({num_perm}) must be a multiple of DEDUP_BANDS ({bands})"
+            )
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(MINHASH_SEED)
+        # Multiply-shift hashing; uint64 products wrap, the high bits are the hash
+        self.a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    @property
+    def params(self) -> List[int]:
+        return [self.num_perm, self.bands, self.shingle_size, MINHASH_SEED]
+
+    def fingerprint(self, text: str) -> Fingerprint:
+        shingle_set = shingles(text, self.shingle_size)
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        hashed = (np.multiply.outer(self.a, values) + self.b[:, None]) >> np.uint64(32)
+        signature = hashed.min(axis=1).astype(np.uint32)
+        bands = [
+            int.from_bytes(
+                hashlib.blake2b(
+                    row.tobytes(), digest_size=8, salt=band.to_bytes(8, "little")
+                ).digest(),
+                "little",
+            )
+            for band, row in enumerate(signature.reshape(self.bands, -1))
+        ]
+        normalized = normalize_text(text)
+        return Fingerprint(
+            exact=text_key(text),
+            bands=bands,
+            shingles=shingle_set,
+            codes=codes(text),
+            normalized=normalized,
+        )
+
+
+class _KeyTable:
+    # Sorted keys loaded from disk plus a dict for everything added since;
+    # the dict shadows the arrays, so a key can be re-pointed without a rewrite
+    def __init__(
+        self, keys: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None
+    ):
+        self.keys = keys if keys is not None else np.empty(0, dtype=np.uint64)
+        self.values = values if values is not None else np.empty(0, dtype=np.int64)
+        self.tail: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.tail)
+
+    def get(self, key: int) -> Optional[int]:
+        value = self.tail.get(key)
+        if value is not None:
+            return value
+        position = int(np.searchsorted(self.keys, np.uint64(key)))
+        if position < len(self.keys) and int(self.keys[position]) == key:
+            return int(self.values[position])
+        return None
+
+    def put(self, key: int, value: int):
+        self.tail[key] = value
+
+    def to_arrays(self, alive: Callable[[int], bool]) -> Tuple[np.ndarray, np.ndarray]:
+        merged = dict(zip(self.keys.tolist(), self.values.tolist()))
+        merged.update(self.tail)
+        live = sorted((key, value) for key, value in merged.items() if alive(value))
+        keys = np.array([key for key, _ in live], dtype=np.uint64)
+        values = np.array([value for _, value in live], dtype=np.int64)
+        return keys, values
+
+
+class DedupIndex:
+    # Exact hashes and MinHash LSH bands of canonical chunks. Each key points
+    # at one chunk; entries of removed chunks are skipped on lookup, since
+    # every candidate is verified against its stored text anyway.
+    def __init__(
+        self,
+        hasher: Optional[MinHasher] = None,
+        threshold: float = settings.DEDUP_NEAR_THRESHOLD,
+    ):
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold
+        self.exact = _KeyTable()
+        self.bands = _KeyTable()
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def empty_like(self) -> "DedupIndex":
+        return DedupIndex(self.hasher, self.threshold)
+
+    def fingerprint(self, text: str) -> Fingerprint:
+        return self.hasher.fingerprint(text)
+
+    def is_near_duplicate(self, fingerprint: Fingerprint, text: str) -> bool:
+        if codes(text) != fingerprint.codes:
+            return False
+        other = shingles(text, self.hasher.shingle_size)
+        union = len(fingerprint.shingles | other)
+        return union > 0 and len(fingerprint.shingles & other) / union >= self.threshold
+
+    def find(
+        self, fingerprint: Fingerprint, get_text: Callable[[int], Optional[str]]
+    ) -> Optional[Tuple[int, bool]]:
+        # Returns the canonical chunk ID and whether it is an exact duplicate
+        candidate = self.exact.get(fingerprint.exact)
+        if candidate is not None:
+            text = get_text(candidate)
+            if text is not None and normalize_text(text) == fingerprint.normalized:
+                return candidate, True
+
+        checked = set()
+        for key in fingerprint.bands:
+            candidate = self.bands.get(key)
+            if candidate is None or candidate in checked:
+                continue
+            checked.add(candidate)
+            text = get_text(candidate)
+            if text is not None and self.is_near_duplicate(fingerprint, text):
+                return candidate, False
+        return None
+
+    def add(self, chunk_id: int, fingerprint: Fingerprint):
+        self.exact.put(fingerprint.exact, chunk_id)
+        for key in fingerprint.bands:
+            self.bands.put(key, chunk_id)
+
+    def to_arrays(self, alive: Callable[[int], bool]) -> Dict[str, np.ndarray]:
+        exact_keys, exact_ids = self.exact.to_arrays(alive)
+        band_keys, band_ids = self.bands.to_arrays(alive)
+        return {
+            "params": np.array(self.hasher.params, dtype=np.int64),
+            "exact_keys": exact_keys,
+            "exact_ids": exact_ids,
+            "band_keys": band_keys,
+            "band_ids": band_ids,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> Optional["DedupIndex"]:
+        index = cls()
+        if arrays["params"].tolist() != index.hasher.params:
+            return None
+        index.exact = _KeyTable(arrays["exact_keys"], arrays["exact_ids"])
+        index.bands = _KeyTable(arrays["band_keys"], arrays["band_ids"])
+        return index
+
+    @classmethod
+    def build(cls, texts: Dict[int, str]) -> "DedupIndex":
+        index = cls()
+        for chunk_id in sorted(texts):
+            index.add(chunk_id, index.fingerprint(texts[chunk_id]))
+        return index
+
+
+@dataclass
+class DedupStats:
+    chunks: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    text_bytes_saved: int = 0
+
+    @property
+    def duplicates(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    def merge(self, other: "DedupStats"):
+        self.chunks += other.chunks
+        self.exact_duplicates += other.exact_duplicates
+        self.near_duplicates += other.near_duplicates
+        self.text_bytes_saved += other.text_bytes_saved
+
+    def to_dict(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "embeddings_saved": self.duplicates,
+            "text_bytes_saved": self.text_bytes_saved,
+        }
+
+
+@dataclass
+class SourceLayout:
+    # Positions of the new canonical chunks this source maps to
+    new: Set[int] = field(default_factory=set)
+    # Canonical chunks already in the index, with the duplicate that matched
+    # each, so it can be indexed after all if the canonical one goes away
+    existing: Dict[int, Document] = field(default_factory=dict)
+
+
+class DedupSession:
+    # Sorts the chunks of one ingest into new canonical chunks, which get
+    # embedded, and references to canonical chunks that already exist in the
+    # index or earlier in the same ingest
+    def __init__(
+        self,
+        index: Optional[DedupIndex],
+        get_text: Callable[[int], Optional[str]],
+    ):
+        self.index = index
+        self.get_text = get_text
+        self.pending = index.empty_like() if index is not None else None
+        self.unique: List[Document] = []
+        self.fingerprints: List[Optional[Fingerprint]] = []
+        self.layout: Dict[str, SourceLayout] = {}
+        self.stats = DedupStats()
+
+    def _pending_text(self, position: int) -> str:
+        return self.unique[position].page_content
+
+    def _count(self, chunk: Document, exact: bool):
+        if exact:
+            self.stats.exact_duplicates += 1
+        else:
+            self.stats.near_duplicates += 1
+        self.stats.text_bytes_saved += len(chunk.page_content.encode("utf-8"))
+
+    def add(self, source_id: str, chunks: List[Document]):
+        # Called under the index's read lock; sources without chunks get an
+        # empty layout so that committing them removes the old version
+        layout = self.layout.setdefault(source_id, SourceLayout())
+        for chunk in chunks:
+            self.stats.chunks += 1
+            fingerprint = None
+            if self.index is not None:
+                fingerprint = self.index.fingerprint(chunk.page_content)
+                match = self.pending.find(fingerprint, self._pending_text)
+                if match is not None:
+                    layout.new.add(match[0])
+                    self._count(chunk, match[1])
+                    continue
+                match = self.index.find(fingerprint, self.get_text)
+                if match is not None:
+                    layout.existing.setdefault(match[0], chunk)
+                    self._count(chunk, match[1])
+                    continue
+                self.pending.add(len(self.unique), fingerprint)
+            layout.new.add(len(self.unique))
+            self.unique.append(chunk)
+            self.fingerprints.append(fingerprint)
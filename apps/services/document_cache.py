@@ -0,0 +1,128 @@
+# app/services/document_cache.py
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from config import settings
+from langchain_core.documents import Document
+from utils.hashing import sha256_file, sha256_text
+from utils.logger import logger
+
+CACHE_INDEX_FILE = "index.json"
+
+
+class ParsedDocumentCache:
+    def __init__(self, cache_dir: str = settings.PARSED_CACHE_DIR):
+        logger.info(f"Initializing ParsedDocumentCache with cache_dir: {cache_dir}")
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries: Dict[str, dict] = self._read_index()
+
+    def _read_index(self) -> Dict[str, dict]:
+        index_path = os.path.join(self.cache_dir, CACHE_INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {}
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parsed document cache index: {e}")
+            return {}
+
+    def _write_index(self):
+        index_path = os.path.join(self.cache_dir, CACHE_INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, index_path)
+
+    def _documents_path(self, filepath: str, content_hash: str) -> str:
+        key = sha256_text(f"{os.path.abspath(filepath)}:{content_hash}")
+        return os.path.join(self.cache_dir, f"{key}.jsonl")
+
+    def _lookup(self, filepath: str) -> Optional[dict]:
+        # A stat() is enough to trust the cached hash while size and mtime match
+        try:
+            stat = os.stat(filepath)
+        except OSError as e:
+            # Deleted since it was listed; the caller parses it or skips it
+            logger.warning(f"Parsed document cache miss for {filepath}: {e}")
+            return None
+        entry = self._entries.get(os.path.abspath(filepath))
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return entry
+        return None
+
+    def get_content_hash(self, filepath: str) -> str:
+        entry = self._lookup(filepath)
+        if entry is not None:
+            return entry["content_hash"]
+
+        stat = os.stat(filepath)
+        content_hash = sha256_file(filepath)
+        with self._lock:
+            self._remove_documents(filepath)
+            self._entries[os.path.abspath(filepath)] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "content_hash": content_hash,
+            }
+            self._write_index()
+        return content_hash
+
+    def load(self, filepath: str) -> Optional[List[Document]]:
+        entry = self._lookup(filepath)
+        if entry is None:
+            return None
+
+        documents_path = self._documents_path(filepath, entry["content_hash"])
+        if not os.path.exists(documents_path):
+            return None
+
+        documents = []
+        with open(documents_path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                documents.append(
+                    Document(
+                        page_content=record["page_content"],
+                        metadata=record["metadata"],
+                    )
+                )
+        logger.debug(f"Parsed document cache hit: {filepath}")
+        return documents
+
+    def store(self, filepath: str, documents: List[Document]):
+        try:
+            content_hash = self.get_content_hash(filepath)
+        except OSError as e:
+            logger.warning(f"Not caching parsed documents of {filepath}: {e}")
+            return
+        documents_path = self._documents_path(filepath, content_hash)
+        tmp_path = f"{documents_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc in documents:
+                record = {"page_content": doc.page_content, "metadata": doc.metadata}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, documents_path)
+
+    def evict(self, filepath: str):
+        with self._lock:
+            self._remove_documents(filepath)
+            if self._entries.pop(os.path.abspath(filepath), None) is not None:
+                self._write_index()
+
+    def _remove_documents(self, filepath: str):
+        entry = self._entries.get(os.path.abspath(filepath))
+        if entry is None:
+            return
+        documents_path = self._documents_path(filepath, entry["content_hash"])
+        if os.path.exists(documents_path):
+            os.remove(documents_path)
@@ -1,24 +1,102 @@
 # app/services/document_manager.py
 
+import multiprocessing
 import os
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, WebBaseLoader
+from config import settings
+from constants import FILE_SOURCE_PREFIX, URL_SOURCE_PREFIX
 from langchain_core.documents import Document
+from services.document_cache import ParsedDocumentCache
+from services.web_fetcher import WebFetcher
+from utils.hashing import sha256_text
 from utils.logger import logger
 
 
+def extract_file(filepath: str) -> List[Document]:
+    # Module-level so ProcessPoolExecutor workers can unpickle it. The loaders
+    # pull in transformers, so they are only imported once there is work
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+    _, ext = os.path.splitext(filepath)
+    ext = ext.lower()
+    logger.info(f"Extracting documents from file: {filepath}")
+
+    try:
+        if ext == ".pdf":
+            logger.debug("Using PyPDFLoader for PDF file")
+            loader = PyPDFLoader(filepath)
+        elif ext == ".txt":
+            logger.debug("Using TextLoader for text file")
+            loader = TextLoader(filepath, encoding="utf-8")
+        else:
+            logger.warning(f"Unsupported file type: {ext} for file {filepath}")
+            return []
+
+        documents = loader.load()
+        for doc in documents:
+            doc.metadata["source_file"] = os.path.basename(filepath)
+        logger.info(
+            f"Successfully extracted {len(documents)} documents from {filepath}"
+        )
+        return documents
+
+    except Exception as e:
+        logger.error(f"Error loading {filepath}: {e}")
+        return []
+
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(workers: int) -> ProcessPoolExecutor:
+    # One long-lived pool per process. Workers are spawned, not forked:
+    # forking a process that has torch loaded and several threads running
+    # (query batcher, warm-up, ingestion workers) can deadlock the child
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extraction_pool
+
+
+def _reset_extraction_pool(pool: ProcessPoolExecutor):
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is pool:
+            _extraction_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
 class DocumentManager:
     def __init__(
         self,
         upload_folder: str = "data/documents",
         url_file: str = "data/urls/urls.txt",
+        extraction_workers: int = settings.EXTRACTION_WORKERS,
+        collection: str = settings.DEFAULT_COLLECTION,
+        document_cache: Optional[ParsedDocumentCache] = None,
+        web_fetcher: Optional[WebFetcher] = None,
     ):
         logger.info(
             f"Initializing DocumentManager with upload_folder: {upload_folder}, url_file: {url_file}"
         )
+        self.collection = collection
         self.upload_folder = upload_folder
         self.url_file = url_file
+        # Collections share one fetcher and one cache, since they share the
+        # web cache directory and the parsed cache's index file
+        self.web_fetcher = web_fetcher if web_fetcher is not None else WebFetcher()
+        self.document_cache = (
+            document_cache if document_cache is not None else ParsedDocumentCache()
+        )
+        self.extraction_workers = extraction_workers
 
         if not os.path.exists(self.upload_folder):
             logger.info(f"Creating upload folder: {self.upload_folder}")
@@ -37,54 +115,67 @@ class DocumentManager:
         logger.info("DocumentManager initialized successfully")
 
     def extract_documents_from_file(self, filepath: str) -> List[Document]:
-        _, ext = os.path.splitext(filepath)
-        ext = ext.lower()
-        logger.info(f"Extracting documents from file: {filepath}")
+        return self.extract_documents_from_files([filepath])[filepath]
 
-        try:
-            if ext == ".pdf":
-                logger.debug("Using PyPDFLoader for PDF file")
-                loader = PyPDFLoader(filepath)
-            elif ext == ".txt":
-                logger.debug("Using TextLoader for text file")
-                loader = TextLoader(filepath, encoding="utf-8")
+    def extract_documents_from_files(
+        self, filepaths: List[str]
+    ) -> Dict[str, List[Document]]:
+        results = {}
+        pending = []
+        for filepath in filepaths:
+            cached = self.document_cache.load(filepath)
+            if cached is not None:
+                results[filepath] = cached
             else:
-                logger.warning(f"Unsupported file type: {ext} for file {filepath}")
-                return []
+                pending.append(filepath)
 
-            documents = loader.load()
-            for doc in documents:
-                doc.metadata["source_file"] = os.path.basename(filepath)
-            logger.info(
-                f"Successfully extracted {len(documents)} documents from {filepath}"
-            )
-            return documents
+        logger.info(
+            f"Extracting {len(pending)} files ({len(results)} served from parse cache)"
+        )
+        if len(pending) > 1 and self.extraction_workers > 1:
+            pool = get_extraction_pool(self.extraction_workers)
+            try:
+                results.update(zip(pending, pool.map(extract_file, pending)))
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory); the next call gets a
+                # fresh pool and this one falls back to parsing in-process
+                logger.warning(f"Extraction pool broke, parsing in-process: {e}")
+                _reset_extraction_pool(pool)
+                results.update(
+                    (filepath, extract_file(filepath)) for filepath in pending
+                )
+        else:
+            results.update((filepath, extract_file(filepath)) for filepath in pending)
 
-        except Exception as e:
-            logger.error(f"Error loading {filepath}: {e}")
-            return []
+        for filepath in pending:
+            if results[filepath]:
+                self.document_cache.store(filepath, results[filepath])
+        return results
 
     def read_uploaded_documents(self) -> List[Document]:
         logger.info(f"Reading documents from upload folder: {self.upload_folder}")
+        filepaths = [
+            os.path.join(self.upload_folder, filename)
+            for filename in os.listdir(self.upload_folder)
+        ]
         all_documents = []
-        for filename in os.listdir(self.upload_folder):
-            filepath = os.path.join(self.upload_folder, filename)
-            docs = self.extract_documents_from_file(filepath)
+        for docs in self.extract_documents_from_files(filepaths).values():
             all_documents.extend(docs)
         logger.info(f"Total documents read from upload folder: {len(all_documents)}")
         return all_documents
 
+    def read_url_list(self) -> List[str]:
+        with open(self.url_file, "r", encoding="utf-8") as f:
+            return [url.strip() for url in f.readlines() if url.strip()]
+
     def read_url_documents(self) -> List[Document]:
         logger.info("Reading documents from URLs...")
         all_documents = []
         try:
-            with open(self.url_file, "r", encoding="utf-8") as f:
-                urls = [url.strip() for url in f.readlines() if url.strip()]
+            urls = self.read_url_list()
             logger.info(f"Found {len(urls)} URLs to process")
 
-            for url in urls:
-                logger.info(f"Fetching documents from URL: {url}")
-                url_docs = self.fetch_documents_from_url(url)
+            for url_docs in self.web_fetcher.fetch_all(urls).values():
                 all_documents.extend(url_docs)
         except Exception as e:
             logger.error(f"Error loading URLs: {e}")
@@ -99,18 +190,84 @@ class DocumentManager:
         logger.info(f"Total documents read: {len(documents)}")
         return documents
 
+    def file_source_id(self, filename: str) -> str:
+        return f"{FILE_SOURCE_PREFIX}{filename}"
+
+    def url_source_id(self, url: str) -> str:
+        return f"{URL_SOURCE_PREFIX}{url}"
+
+    def get_source_hash(self, source_id: str) -> str:
+        if source_id.startswith(FILE_SOURCE_PREFIX):
+            return self.document_cache.get_content_hash(self._source_path(source_id))
+        # Until a URL has been fetched its content is unknown, so key it by address
+        url = source_id[len(URL_SOURCE_PREFIX) :]
+        return self.web_fetcher.get_content_hash(url) or sha256_text(source_id)
+
+    def list_sources(self) -> Dict[str, str]:
+        logger.info("Listing document sources...")
+        sources = {}
+        for filename in sorted(os.listdir(self.upload_folder)):
+            source_id = self.file_source_id(filename)
+            try:
+                sources[source_id] = self.get_source_hash(source_id)
+            except OSError as e:
+                logger.error(f"Error hashing {filename}: {e}")
+
+        try:
+            urls = self.read_url_list()
+        except Exception as e:
+            logger.error(f"Error reading URL list: {e}")
+            urls = []
+        # Conditional GETs refresh the cached content hashes; unchanged pages 304
+        self.web_fetcher.prefetch(urls)
+        for url in urls:
+            source_id = self.url_source_id(url)
+            sources[source_id] = self.get_source_hash(source_id)
+
+        logger.info(f"Found {len(sources)} sources")
+        return sources
+
+    def _source_path(self, source_id: str) -> str:
+        return os.path.join(self.upload_folder, source_id[len(FILE_SOURCE_PREFIX) :])
+
+    def source_exists(self, source_id: str) -> bool:
+        if source_id.startswith(FILE_SOURCE_PREFIX):
+            return os.path.exists(self._source_path(source_id))
+        return source_id[len(URL_SOURCE_PREFIX) :] in self.read_url_list()
+
+    def load_source(self, source_id: str) -> List[Document]:
+        return self.load_sources([source_id])[source_id]
+
+    def load_sources(self, source_ids: List[str]) -> Dict[str, List[Document]]:
+        file_ids = [sid for sid in source_ids if sid.startswith(FILE_SOURCE_PREFIX)]
+        url_ids = [sid for sid in source_ids if sid.startswith(URL_SOURCE_PREFIX)]
+        for source_id in set(source_ids) - set(file_ids) - set(url_ids):
+            logger.warning(f"Unknown source type: {source_id}")
+
+        results = {source_id: [] for source_id in source_ids}
+        parsed = self.extract_documents_from_files(
+            [self._source_path(source_id) for source_id in file_ids]
+        )
+        for source_id in file_ids:
+            results[source_id] = parsed[self._source_path(source_id)]
+
+        fetched = self.web_fetcher.fetch_all(
+            [source_id[len(URL_SOURCE_PREFIX) :] for source_id in url_ids]
+        )
+        for source_id in url_ids:
+            results[source_id] = fetched[source_id[len(URL_SOURCE_PREFIX) :]]
+
+        for documents in results.values():
+            for doc in documents:
+                doc.metadata["collection"] = self.collection
+        return results
+
     def fetch_documents_from_url(self, url: str) -> List[Document]:
         logger.info(f"Fetching documents from URL: {url}")
-        try:
-            loader = WebBaseLoader([url])
-            docs = loader.load()
-            for doc in docs:
-                doc.metadata["source_url"] = url
+        docs = self.web_fetcher.fetch_documents(url)
+        if docs:
             logger.info(f"Successfully fetched {len(docs)} documents from URL")
-            return docs
-        except Exception as e:
-            logger.error(f"Error loading URL {url}: {e}")
-            return []
+        return docs
 
     def save_url_list(self, url_list: List[str]):
         logger.info(f"Saving {len(url_list)} URLs to file")
@@ -126,6 +283,7 @@ class DocumentManager:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
+                self.document_cache.evict(file_path)
                 logger.info(f"Successfully deleted file: {file_path}")
                 return True
             else:
@@ -0,0 +1,155 @@
+# app/services/embedding_engine.py
+
+import threading
+import time
+from typing import List
+
+import numpy as np
+import torch
+from config import settings
+from sentence_transformers import SentenceTransformer
+from utils.logger import logger
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+PRECISIONS = ("fp32", "fp16")
+
+
+class EmbeddingEngine:
+    def __init__(
+        self,
+        model_name: str = settings.EMBEDDING_MODEL,
+        backend: str = settings.EMBEDDING_BACKEND,
+        precision: str = settings.EMBEDDING_PRECISION,
+        batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+        max_seq_length: int = settings.EMBEDDING_MAX_SEQ_LENGTH,
+        num_threads: int = settings.EMBEDDING_THREADS,
+        normalize: bool = True,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown embedding backend '{backend}'. Expected one of {BACKENDS}."
+            )
+        if precision not in PRECISIONS:
+            raise ValueError(
+                f"Unknown embedding precision '{precision}'. Expected one of {PRECISIONS}."
+            )
+        logger.info(
+            f"Initializing EmbeddingEngine with model: {model_name}, backend: {backend}, "
+            f"precision: {precision}, batch_size: {batch_size}"
+        )
+        self.model_name = model_name
+        self.backend = backend
+        self.precision = precision
+        self.batch_size = batch_size
+        self.normalize = normalize
+
+        if num_threads > 0:
+            logger.info(f"Limiting torch to {num_threads} threads")
+            torch.set_num_threads(num_threads)
+
+        self.device = self._detect_device()
+        self.model = self._load_model()
+        self._serialize_tokenization()
+        if max_seq_length > 0:
+            self.model.max_seq_length = max_seq_length
+
+        self.total_texts = 0
+        self.total_seconds = 0.0
+        logger.info("EmbeddingEngine initialized successfully")
+
+    def _detect_device(self) -> str:
+        if self.backend != "torch":
+            logger.info(f"Using CPU for the {self.backend} backend")
+            return "cpu"
+        if torch.backends.mps.is_available():
+            logger.info("Using MPS (Metal Performance Shaders) for acceleration")
+            return "mps"
+        if torch.cuda.is_available():
+            logger.info("Using CUDA for acceleration")
+            return "cuda"
+        logger.info("Using CPU for processing")
+        return "cpu"
+
+    def _load_model(self) -> SentenceTransformer:
+        if self.backend == "onnx":
+            # Needs the optional optimum[onnxruntime] extra
+            return SentenceTransformer(
+                self.model_name, device=self.device, backend="onnx"
+            )
+
+        model = SentenceTransformer(self.model_name, device=self.device)
+        if self.backend == "torch-int8":
+            logger.info("Applying dynamic int8 quantization to linear layers")
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        elif self.precision == "fp16":
+            if self.device == "cpu":
+                logger.warning("fp16 is not supported on CPU, keeping fp32")
+            else:
+                model = model.half()
+        return model
+
+    def _serialize_tokenization(self):
+        # Query batchers and ingest workers encode at the same time, and the
+        # fast tokenizer resets its shared padding and truncation state on
+        # every call. Only tokenizing is serialized; forward passes overlap.
+        lock = threading.RLock()
+        for name in ("preprocess", "tokenize"):
+            method = getattr(self.model, name, None)
+            if method is None:
+                continue
+
+            def locked(*args, _method=method, **kwargs):
+                with lock:
+                    return _method(*args, **kwargs)
+
+            setattr(self.model, name, locked)
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def config(self) -> dict:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "precision": self.precision,
+            "max_seq_length": self.model.max_seq_length,
+            "normalize": self.normalize,
+        }
+
+    @property
+    def throughput(self) -> float:
+        return self.total_texts / self.total_seconds if self.total_seconds else 0.0
+
+    def encode(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        if not texts:
+            return np.empty(
+                (0, self.model.get_sentence_embedding_dimension()), dtype=np.float32
+            )
+
+        # Longest first so each batch pads to similar lengths; restored below
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        start_time = time.perf_counter()
+        sorted_embeddings = self.model.encode(
+            [texts[i] for i in order],
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=self.normalize,
+            show_progress_bar=show_progress_bar,
+        )
+        elapsed = time.perf_counter() - start_time
+
+        embeddings = np.empty_like(sorted_embeddings, dtype=np.float32)
+        embeddings[order] = sorted_embeddings
+
+        self.total_texts += len(texts)
+        self.total_seconds += elapsed
+        if len(texts) > 1:
+            logger.info(
+                f"Encoded {len(texts)} texts in {elapsed:.2f}s "
+                f"({len(texts) / elapsed:.1f} chunks/s)"
+            )
+        return embeddings
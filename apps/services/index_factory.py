@@ -0,0 +1,190 @@
+# app/services/index_factory.py
+
+import math
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+from config import settings
+from utils.logger import logger
+
+INDEX_TYPES = ("auto", "flat", "ivf_flat", "ivf_pq", "hnsw")
+# How flat, IVF-flat and HNSW store raw vectors; IVF-PQ always uses PQ codes
+VECTOR_ENCODINGS = {
+    "fp32": None,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Below these sizes k-means/PQ training is unreliable, so flat is used instead
+MIN_IVF_VECTORS = 2_000
+MIN_IVF_PQ_VECTORS = 10_000
+
+
+class IndexFactory:
+    def __init__(
+        self,
+        index_type: str = settings.INDEX_TYPE,
+        vector_encoding: str = settings.INDEX_VECTOR_ENCODING,
+        metric: int = faiss.METRIC_INNER_PRODUCT,
+        nprobe: int = settings.INDEX_NPROBE,
+        ef_search: int = settings.INDEX_EF_SEARCH,
+        hnsw_m: int = settings.INDEX_HNSW_M,
+        pq_m: int = settings.INDEX_PQ_M,
+        train_sample_size: int = settings.INDEX_TRAIN_SAMPLE_SIZE,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}."
+            )
+        if vector_encoding not in VECTOR_ENCODINGS:
+            raise ValueError(
+                f"Unknown vector encoding '{vector_encoding}'. "
+                f"Expected one of {tuple(VECTOR_ENCODINGS)}."
+            )
+        self.index_type = index_type
+        self.vector_encoding = vector_encoding
+        self.metric = metric
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hnsw_m = hnsw_m
+        self.pq_m = pq_m
+        self.train_sample_size = train_sample_size
+
+    def resolve_type(self, num_vectors: int) -> str:
+        index_type = self.index_type
+        if index_type == "auto":
+            if num_vectors < settings.INDEX_AUTO_FLAT_MAX:
+                index_type = "flat"
+            elif num_vectors < settings.INDEX_AUTO_IVF_FLAT_MAX:
+                index_type = "ivf_flat"
+            else:
+                index_type = "ivf_pq"
+
+        if index_type == "ivf_pq" and num_vectors < MIN_IVF_PQ_VECTORS:
+            index_type = "ivf_flat"
+        if index_type == "ivf_flat" and num_vectors < MIN_IVF_VECTORS:
+            index_type = "flat"
+        return index_type
+
+    def resolve_encoding(self, index_type: str) -> str:
+        return "pq" if index_type == "ivf_pq" else self.vector_encoding
+
+    def build(
+        self,
+        embeddings: np.ndarray,
+        ids: np.ndarray,
+        index_type: Optional[str] = None,
+    ) -> faiss.IndexIDMap2:
+        num_vectors, dim = embeddings.shape
+        index_type = index_type or self.resolve_type(num_vectors)
+        logger.info(
+            f"Building {index_type} index for {num_vectors} vectors "
+            f"({self.resolve_encoding(index_type)})"
+        )
+
+        inner = self._create(index_type, dim, num_vectors)
+        if not inner.is_trained:
+            inner.train(self._training_sample(embeddings))
+
+        index = faiss.IndexIDMap2(inner)
+        index.add_with_ids(embeddings, ids)
+        self.configure_search(index)
+        return index
+
+    def _create(self, index_type: str, dim: int, num_vectors: int) -> faiss.Index:
+        qtype = VECTOR_ENCODINGS[self.vector_encoding]
+        if index_type == "flat":
+            if qtype is None:
+                return faiss.IndexFlat(dim, self.metric)
+            return faiss.IndexScalarQuantizer(dim, qtype, self.metric)
+        if index_type == "hnsw":
+            if qtype is None:
+                index = faiss.IndexHNSWFlat(dim, self.hnsw_m, self.metric)
+            else:
+                index = faiss.IndexHNSWSQ(dim, qtype, self.hnsw_m, self.metric)
+            index.hnsw.efConstruction = max(40, 2 * self.hnsw_m)
+            return index
+
+        nlist = max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // 39))
+        quantizer = faiss.IndexFlat(dim, self.metric)
+        if index_type == "ivf_flat":
+            if qtype is None:
+                return faiss.IndexIVFFlat(quantizer, dim, nlist, self.metric)
+            return faiss.IndexIVFScalarQuantizer(
+                quantizer, dim, nlist, qtype, self.metric
+            )
+
+        # PQ sub-quantizers must divide the dimension evenly
+        pq_m = max(m for m in range(1, self.pq_m + 1) if dim % m == 0)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, 8, self.metric)
+
+    def _training_sample(self, embeddings: np.ndarray) -> np.ndarray:
+        if len(embeddings) <= self.train_sample_size:
+            return embeddings
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(embeddings), self.train_sample_size, replace=False)
+        return embeddings[np.sort(sample)]
+
+    def configure_search(self, index: faiss.Index):
+        inner = faiss.downcast_index(index.index)
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            ivf.nprobe = min(self.nprobe, ivf.nlist)
+        elif isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.ef_search
+
+    @staticmethod
+    def describe(index: faiss.Index) -> str:
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivf_flat"
+        return "flat"
+
+    @staticmethod
+    def describe_encoding(index: faiss.Index) -> str:
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexIVFPQ):
+            return "pq"
+        if isinstance(inner, faiss.IndexHNSW):
+            inner = faiss.downcast_index(inner.storage)
+        if isinstance(
+            inner, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)
+        ):
+            for encoding, qtype in VECTOR_ENCODINGS.items():
+                if qtype == inner.sq.qtype:
+                    return encoding
+        return "fp32"
+
+    @staticmethod
+    def bytes_per_vector(index: faiss.Index) -> int:
+        # Encoded vector plus its ID in the IDMap; HNSW adds its level-0 links
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            storage = faiss.downcast_index(inner.storage)
+            return storage.code_size + 4 * inner.hnsw.nb_neighbors(0) + 8
+        return inner.code_size + 8
+
+    @staticmethod
+    def supports_removal(index: faiss.Index) -> bool:
+        return not isinstance(faiss.downcast_index(index.index), faiss.IndexHNSW)
+
+    @staticmethod
+    def extract_vectors(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+        ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+        inner = faiss.downcast_index(index.index)
+        if inner.ntotal == 0:
+            return ids, np.empty((0, inner.d), dtype=np.float32)
+
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            ivf.make_direct_map()
+        vectors = inner.reconstruct_n(0, inner.ntotal)
+        if ivf is not None:
+            # An array direct map blocks remove_ids, so drop it again
+            ivf.make_direct_map(False)
+        return ids, vectors
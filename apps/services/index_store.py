@@ -0,0 +1,202 @@
+# app/services/index_store.py
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from config import settings
+from constants import (
+    INDEX_BM25_FILE,
+    INDEX_CHUNK_META_FILE,
+    INDEX_CHUNK_OFFSETS_FILE,
+    INDEX_CHUNK_TEXT_FILE,
+    INDEX_DEDUP_FILE,
+    INDEX_FAISS_FILE,
+    INDEX_MANIFEST_FILE,
+    INDEX_MANIFEST_VERSION,
+)
+from services.chunk_store import ChunkStore
+from utils.logger import logger
+
+
+class IndexStore:
+    def __init__(
+        self, index_dir: str = settings.INDEX_DIR, use_mmap: bool = settings.INDEX_MMAP
+    ):
+        logger.info(f"Initializing IndexStore with index_dir: {index_dir}")
+        self.index_dir = index_dir
+        self.use_mmap = use_mmap
+        self._save_lock = threading.Lock()
+
+    def read_manifest(self) -> Optional[dict]:
+        manifest_path = os.path.join(self.index_dir, INDEX_MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading index manifest {manifest_path}: {e}")
+            return None
+
+    def is_compatible(self, manifest: dict, config: dict) -> bool:
+        if manifest.get("version") != INDEX_MANIFEST_VERSION:
+            logger.info("Persisted index manifest version changed, rebuild required")
+            return False
+        if manifest.get("config") != config:
+            logger.info(
+                "Embedding or chunking settings changed since the index was persisted"
+            )
+            return False
+        return True
+
+    def save(
+        self,
+        index: Optional[faiss.Index],
+        chunks: ChunkStore,
+        sources: Dict[str, dict],
+        next_chunk_id: int,
+        config: dict,
+        index_version: int = 0,
+        lexical_arrays: Optional[Dict[str, np.ndarray]] = None,
+        dedup_arrays: Optional[Dict[str, np.ndarray]] = None,
+        shared_chunks: Optional[Dict[int, List[str]]] = None,
+    ):
+        with self._save_lock:
+            self._write(
+                index,
+                chunks,
+                sources,
+                next_chunk_id,
+                config,
+                index_version,
+                lexical_arrays,
+                dedup_arrays,
+                shared_chunks or {},
+            )
+
+    def _write(
+        self,
+        index: Optional[faiss.Index],
+        chunks: ChunkStore,
+        sources: Dict[str, dict],
+        next_chunk_id: int,
+        config: dict,
+        index_version: int,
+        lexical_arrays: Optional[Dict[str, np.ndarray]],
+        dedup_arrays: Optional[Dict[str, np.ndarray]],
+        shared_chunks: Dict[int, List[str]],
+    ):
+        num_vectors = index.ntotal if index is not None else 0
+        logger.info(
+            f"💾 Persisting index with {num_vectors} vectors to {self.index_dir}"
+        )
+        tmp_dir = f"{self.index_dir}.tmp"
+        old_dir = f"{self.index_dir}.old"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        if index is not None:
+            faiss.write_index(index, os.path.join(tmp_dir, INDEX_FAISS_FILE))
+        if lexical_arrays is not None:
+            np.savez(os.path.join(tmp_dir, INDEX_BM25_FILE), **lexical_arrays)
+        if dedup_arrays is not None:
+            np.savez(os.path.join(tmp_dir, INDEX_DEDUP_FILE), **dedup_arrays)
+
+        chunks.write(*self._chunk_paths(tmp_dir))
+
+        # The manifest is written last so a partially written store is never loaded
+        manifest = {
+            "version": INDEX_MANIFEST_VERSION,
+            "created_at": time.time(),
+            "config": config,
+            "num_vectors": num_vectors,
+            "dimension": index.d if index is not None else None,
+            "next_chunk_id": next_chunk_id,
+            "index_version": index_version,
+            "sources": sources,
+            "shared_chunks": {
+                str(chunk_id): source_ids
+                for chunk_id, source_ids in shared_chunks.items()
+            },
+        }
+        with open(
+            os.path.join(tmp_dir, INDEX_MANIFEST_FILE), "w", encoding="utf-8"
+        ) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.index_dir):
+            os.replace(self.index_dir, old_dir)
+        os.replace(tmp_dir, self.index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        logger.info("Index persisted successfully")
+
+    def load(self, config: dict) -> Optional[dict]:
+        manifest = self.read_manifest()
+        if manifest is None:
+            logger.info("No persisted index manifest found")
+            return None
+        if not self.is_compatible(manifest, config):
+            return None
+
+        logger.info(f"📦 Loading persisted index from {self.index_dir}")
+        index_path = os.path.join(self.index_dir, INDEX_FAISS_FILE)
+        index = self._read_index(index_path) if os.path.exists(index_path) else None
+
+        lexical_arrays = self._read_arrays(INDEX_BM25_FILE)
+        dedup_arrays = self._read_arrays(INDEX_DEDUP_FILE)
+
+        chunks = ChunkStore.read(
+            *self._chunk_paths(self.index_dir), use_mmap=self.use_mmap
+        )
+
+        logger.info(
+            f"Loaded index with {manifest['num_vectors']} vectors, "
+            f"{len(chunks)} chunks and {len(manifest['sources'])} sources"
+        )
+        return {
+            "index": index,
+            "chunks": chunks,
+            "sources": manifest["sources"],
+            "next_chunk_id": manifest["next_chunk_id"],
+            "index_version": manifest.get("index_version", 0),
+            "lexical_arrays": lexical_arrays,
+            "dedup_arrays": dedup_arrays,
+            "shared_chunks": {
+                int(chunk_id): source_ids
+                for chunk_id, source_ids in manifest.get("shared_chunks", {}).items()
+            },
+        }
+
+    def _read_arrays(self, filename: str) -> Optional[Dict[str, np.ndarray]]:
+        path = os.path.join(self.index_dir, filename)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+
+    @staticmethod
+    def _chunk_paths(directory: str) -> Tuple[str, str, str]:
+        return (
+            os.path.join(directory, INDEX_CHUNK_TEXT_FILE),
+            os.path.join(directory, INDEX_CHUNK_META_FILE),
+            os.path.join(directory, INDEX_CHUNK_OFFSETS_FILE),
+        )
+
+    def _read_index(self, path: str) -> faiss.Index:
+        if self.use_mmap:
+            try:
+                return faiss.read_index(
+                    path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+            except RuntimeError as e:
+                logger.warning(
+                    f"Memory-mapped load not supported, reading into RAM: {e}"
+                )
+        return faiss.read_index(path)
@@ -0,0 +1,584 @@
+# app/services/ingestion_queue.py
+
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from config import settings
+from services.collection_manager import Collection, CollectionManager
+from utils.logger import logger
+from utils.metrics import metrics
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+
+
+@dataclass
+class IngestionJob:
+    id: str
+    collection: str
+    source_ids: List[str]
+    status: str = JOB_QUEUED
+    stage: str = ""
+    sources_parsed: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    # {"added": {source_id: chunks}, "unchanged": [...], "removed": [...],
+    #  "empty": [...]}
+    result: dict = field(default_factory=dict)
+    error: str = ""
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # "host:pid" of the process running the job, and its last sign of life
+    owner: str = ""
+    heartbeat_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self) -> float:
+        if self.status == JOB_DONE:
+            return 1.0
+        parsed = self.sources_parsed / len(self.source_ids) if self.source_ids else 0
+        embedded = (
+            self.chunks_embedded / self.chunks_total if self.chunks_total else parsed
+        )
+        # Parsing and embedding dominate; the index swap and save get the rest
+        return min(0.3 * parsed + 0.6 * embedded, 0.95)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "collection": self.collection,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "sources": len(self.source_ids),
+            "sources_parsed": self.sources_parsed,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionQueue:
+    # Jobs are persisted in SQLite and run by a small worker pool. Jobs of one
+    # collection run one at a time and in order; different collections ingest
+    # in parallel. Within a job, parsing runs ahead of embedding on its own
+    # thread, and the result is committed to the index in a single swap.
+    def __init__(
+        self,
+        collections: CollectionManager,
+        db_path: str = settings.INGEST_QUEUE_PATH,
+        workers: int = settings.INGEST_WORKERS,
+        parse_batch: int = settings.INGEST_PARSE_BATCH,
+        embed_batch: int = settings.INGEST_EMBED_BATCH,
+        pipeline_depth: int = settings.INGEST_PIPELINE_DEPTH,
+        retention: int = settings.INGEST_JOB_RETENTION,
+        heartbeat_interval: float = settings.INGEST_HEARTBEAT_INTERVAL,
+        heartbeat_timeout: float = settings.INGEST_HEARTBEAT_TIMEOUT,
+        retry_backoff: float = settings.INGEST_RETRY_BACKOFF,
+    ):
+        logger.info(f"Initializing IngestionQueue at {db_path} (workers: {workers})")
+        self.collections = collections
+        self.db_path = db_path
+        self.num_workers = workers
+        self.parse_batch = parse_batch
+        self.embed_batch = embed_batch
+        self.pipeline_depth = pipeline_depth
+        self.retention = retention
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.retry_backoff = retry_backoff
+        # A job writes into the in-memory index of the process that runs it,
+        # so each process only runs the jobs it submitted or adopted
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._condition = threading.Condition()
+        self._active_collections: Set[str] = set()
+        self._deleting: Set[str] = set()
+        self._workers: List[threading.Thread] = []
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    source_ids TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL DEFAULT '',
+                    sources_parsed INTEGER NOT NULL DEFAULT 0,
+                    chunks_total INTEGER NOT NULL DEFAULT 0,
+                    chunks_embedded INTEGER NOT NULL DEFAULT 0,
+                    result TEXT NOT NULL DEFAULT '{}',
+                    error TEXT NOT NULL DEFAULT '',
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT NOT NULL DEFAULT '',
+                    heartbeat_at REAL
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute(
+                    "ALTER TABLE jobs ADD COLUMN owner TEXT NOT NULL DEFAULT ''"
+                )
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+            )
+        self._recover()
+
+    def _owner_alive(self, owner: str) -> bool:
+        host, _, pid = owner.rpartition(":")
+        # Processes on other hosts can only be judged by their heartbeat
+        if host != socket.gethostname() or not pid.isdigit():
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _recover(self) -> int:
+        # Jobs whose process died are adopted and run again; ingestion is
+        # idempotent since unchanged sources are skipped by content hash
+        now = time.time()
+        stale_before = now - self.heartbeat_timeout
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner, heartbeat_at FROM jobs WHERE status IN (?, ?) "
+                "AND owner != ?",
+                (JOB_QUEUED, JOB_RUNNING, self.owner),
+            ).fetchall()
+            adopted = 0
+            for job_id, owner, heartbeat_at in rows:
+                if (
+                    heartbeat_at is not None
+                    and heartbeat_at >= stale_before
+                    and self._owner_alive(owner)
+                ):
+                    continue
+                adopted += conn.execute(
+                    "UPDATE jobs SET status = ?, stage = '', sources_parsed = 0, "
+                    "chunks_total = 0, chunks_embedded = 0, owner = ?, "
+                    "heartbeat_at = ? WHERE id = ? AND status IN (?, ?) "
+                    "AND owner = ?",
+                    (
+                        JOB_QUEUED,
+                        self.owner,
+                        now,
+                        job_id,
+                        JOB_QUEUED,
+                        JOB_RUNNING,
+                        owner,
+                    ),
+                ).rowcount
+        if adopted:
+            logger.info(f"🔁 Adopted {adopted} ingestion jobs of exited processes")
+        return adopted
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> IngestionJob:
+        values = dict(row)
+        values["source_ids"] = json.loads(values["source_ids"])
+        values["result"] = json.loads(values["result"])
+        return IngestionJob(**values)
+
+    def start(self):
+        with self._condition:
+            if self._workers:
+                return
+            for number in range(self.num_workers):
+                worker = threading.Thread(
+                    target=self._work, name=f"ingest-{number}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            threading.Thread(
+                target=self._heartbeat, name="ingest-heartbeat", daemon=True
+            ).start()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE status IN (?, ?) "
+                        "AND owner = ?",
+                        (time.time(), JOB_QUEUED, JOB_RUNNING, self.owner),
+                    )
+                self._recover()
+            except sqlite3.Error as e:
+                logger.warning(f"Ingestion heartbeat failed: {e}")
+            # Also picks up jobs adopted here
+            with self._condition:
+                self._condition.notify_all()
+
+    def submit(self, collection: str, source_ids: List[str]) -> IngestionJob:
+        source_ids = list(dict.fromkeys(source_ids))
+        if not source_ids:
+            raise ValueError("An ingestion job needs at least one source")
+        job = IngestionJob(
+            id=uuid.uuid4().hex,
+            collection=collection,
+            source_ids=source_ids,
+            created_at=time.time(),
+            owner=self.owner,
+        )
+        job.heartbeat_at = job.created_at
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, collection, source_ids, status, created_at, "
+                "owner, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    collection,
+                    json.dumps(source_ids),
+                    JOB_QUEUED,
+                    job.created_at,
+                    job.owner,
+                    job.heartbeat_at,
+                ),
+            )
+        logger.info(
+            f"📥 Queued ingestion job {job.id[:8]} for {len(source_ids)} sources "
+            f"in collection {collection}"
+        )
+        with self._condition:
+            self._condition.notify_all()
+        return job
+
+    def _select(self, where: str = "", params: tuple = (), limit: int = -1):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC, rowid DESC "
+                "LIMIT ?",
+                params + (limit,),
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        jobs = self._select("WHERE id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def jobs(
+        self, collection: Optional[str] = None, limit: int = 20
+    ) -> List[IngestionJob]:
+        if collection is None:
+            return self._select(limit=limit)
+        return self._select("WHERE collection = ?", (collection,), limit)
+
+    def wait(
+        self, job_id: str, timeout: Optional[float] = None
+    ) -> Optional[IngestionJob]:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: (job := self.get(job_id)) is None or job.finished, timeout
+            )
+        return self.get(job_id)
+
+    def delete_collection(self, name: str):
+        # Queued jobs of the collection fail, the running one finishes first,
+        # and no new job starts until the directory is gone
+        with self._condition:
+            self._deleting.add(name)
+        try:
+            with self._connect() as conn:
+                cancelled = conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE collection = ? AND status = ? AND owner = ?",
+                    (
+                        JOB_FAILED,
+                        f"Collection {name} was deleted",
+                        time.time(),
+                        name,
+                        JOB_QUEUED,
+                        self.owner,
+                    ),
+                ).rowcount
+            if cancelled:
+                logger.info(f"🚫 Cancelled {cancelled} ingestion jobs of {name}")
+            with self._condition:
+                self._condition.wait_for(lambda: name not in self._active_collections)
+            self.collections.delete(name)
+        finally:
+            with self._condition:
+                self._deleting.discard(name)
+                self._condition.notify_all()
+
+    def _update(self, job_id: str, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                tuple(fields.values()) + (job_id,),
+            )
+
+    def _claim(self) -> Optional[IngestionJob]:
+        # Called with the condition held; the oldest job of an idle collection wins
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND owner = ? "
+                "ORDER BY created_at, rowid",
+                (JOB_QUEUED, self.owner),
+            ).fetchall()
+            for row in rows:
+                if (
+                    row["collection"] in self._active_collections
+                    or row["collection"] in self._deleting
+                ):
+                    continue
+                started_at = time.time()
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ? "
+                    "WHERE id = ? AND status = ? AND owner = ?",
+                    (
+                        JOB_RUNNING,
+                        started_at,
+                        started_at,
+                        row["id"],
+                        JOB_QUEUED,
+                        self.owner,
+                    ),
+                ).rowcount
+                if claimed:
+                    self._active_collections.add(row["collection"])
+                    job = self._from_row(row)
+                    job.status, job.started_at = JOB_RUNNING, started_at
+                    job.heartbeat_at = started_at
+                    return job
+        return None
+
+    def _work(self):
+        failures = 0
+        while True:
+            job = None
+            try:
+                with self._condition:
+                    job = self._claim()
+                    while job is None:
+                        self._condition.wait()
+                        job = self._claim()
+                self._run(job)
+                failures = 0
+            except Exception as e:
+                # e.g. "database is locked" while another process writes; the
+                # worker must outlive it or the queue silently stops
+                failures += 1
+                backoff = min(self.retry_backoff * 2 ** (failures - 1), 30.0)
+                logger.error(f"Ingestion worker error, retrying in {backoff:.1f}s: {e}")
+                time.sleep(backoff)
+                if job is not None:
+                    self._requeue(job)
+
+    def _requeue(self, job: IngestionJob):
+        # A job whose final status could not be written runs again rather than
+        # staying "running" under this live owner forever
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, stage = '', sources_parsed = 0, "
+                    "chunks_total = 0, chunks_embedded = 0 WHERE id = ? "
+                    "AND status = ? AND owner = ?",
+                    (JOB_QUEUED, job.id, JOB_RUNNING, self.owner),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not re-queue ingestion job {job.id[:8]}: {e}")
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self, job: IngestionJob):
+        logger.info(f"⚙️ Running ingestion job {job.id[:8]} ({job.collection})")
+        try:
+            with metrics.span("ingest_job") as span:
+                result = self._ingest(job, self.collections.get(job.collection))
+            self._update(
+                job.id,
+                status=JOB_DONE,
+                stage=JOB_DONE,
+                result=result,
+                finished_at=time.time(),
+            )
+            logger.info(
+                f"✅ Ingestion job {job.id[:8]} finished in {span.elapsed:.2f}s "
+                f"({sum(result['added'].values())} chunks)"
+            )
+        except Exception as e:
+            logger.error(f"Error running ingestion job {job.id[:8]}: {e}")
+            self._update(
+                job.id, status=JOB_FAILED, error=str(e), finished_at=time.time()
+            )
+        finally:
+            with self._condition:
+                self._active_collections.discard(job.collection)
+                self._condition.notify_all()
+        self._prune()
+
+    def _ingest(self, job: IngestionJob, collection: Collection) -> dict:
+        document_manager = collection.document_manager
+        vector_db = collection.vector_db
+        stages: queue.Queue = queue.Queue(maxsize=self.pipeline_depth)
+        stop = threading.Event()
+        done = object()
+
+        def parse():
+            # Fetching and parsing run ahead of chunking and embedding, bounded by
+            # the queue size so a large job never holds every page in memory
+            try:
+                for start in range(0, len(job.source_ids), self.parse_batch):
+                    if stop.is_set():
+                        break
+                    group = job.source_ids[start : start + self.parse_batch]
+                    present = [
+                        sid for sid in group if document_manager.source_exists(sid)
+                    ]
+                    loaded = document_manager.load_sources(present)
+                    batch = {}
+                    for source_id in group:
+                        # URL hashes are only known once fetched, so hash after
+                        # loading. Deleted sources, also those removed while
+                        # parsing, commit without chunks, which removes them
+                        documents, content_hash = loaded.get(source_id, []), ""
+                        if source_id in loaded:
+                            try:
+                                content_hash = document_manager.get_source_hash(
+                                    source_id
+                                )
+                            except OSError as e:
+                                logger.warning(f"Source {source_id} is gone: {e}")
+                                documents = []
+                        batch[source_id] = (documents, content_hash)
+                    stages.put((len(group), batch))
+                stages.put(done)
+            except Exception as e:
+                stages.put(e)
+
+        self._update(job.id, stage="parsing")
+        threading.Thread(target=parse, name=f"parse-{job.id[:8]}", daemon=True).start()
+
+        # One session for the whole job, so duplicates across its batches are
+        # embedded once too
+        session = vector_db.new_dedup_session()
+        content_hashes: Dict[str, str] = {}
+        result = {"added": {}, "unchanged": [], "removed": [], "empty": []}
+        embeddings, lexical_terms = [], []
+
+        def embed(end: int):
+            chunks = session.unique[job.chunks_embedded : end]
+            batch_embeddings, batch_terms = vector_db.embed_chunks(chunks)
+            embeddings.append(batch_embeddings)
+            lexical_terms.extend(batch_terms)
+            job.chunks_embedded += len(chunks)
+            self._update(job.id, stage="embedding", chunks_embedded=job.chunks_embedded)
+
+        try:
+            while (item := stages.get()) is not done:
+                if isinstance(item, Exception):
+                    raise item
+                parsed_count, batch = item
+                batch_chunked = vector_db.chunk_sources(batch)
+                result["unchanged"].extend(
+                    source_id
+                    for source_id, (_, content_hash) in batch.items()
+                    if vector_db.is_source_current(source_id, content_hash)
+                )
+                # Only deleted sources come without a content hash
+                result["removed"].extend(
+                    source_id for source_id in batch_chunked if not batch[source_id][1]
+                )
+                vector_db.deduplicate(session, batch_chunked)
+                for source_id in batch_chunked:
+                    content_hashes[source_id] = batch[source_id][1]
+                job.sources_parsed += parsed_count
+                job.chunks_total = len(session.unique)
+                self._update(
+                    job.id,
+                    sources_parsed=job.sources_parsed,
+                    chunks_total=job.chunks_total,
+                )
+                while job.chunks_total - job.chunks_embedded >= self.embed_batch:
+                    embed(job.chunks_embedded + self.embed_batch)
+        except Exception:
+            stop.set()
+            # Drain so a parser blocked on the full queue can finish and exit
+            while item is not done and not isinstance(item, Exception):
+                item = stages.get()
+            raise
+        if job.chunks_embedded < job.chunks_total:
+            embed(job.chunks_total)
+
+        self._update(job.id, stage="indexing")
+        added = vector_db.commit_sources(
+            session,
+            content_hashes,
+            np.vstack(embeddings) if embeddings else None,
+            lexical_terms,
+        )
+        if added:
+            self._update(job.id, stage="saving")
+            vector_db.save()
+        result["added"] = {
+            source_id: count for source_id, count in added.items() if count
+        }
+        result["empty"] = [
+            source_id
+            for source_id in job.source_ids
+            if source_id not in result["added"]
+            and source_id not in result["unchanged"]
+            and source_id not in result["removed"]
+        ]
+        result["dedup"] = vector_db.dedup_report(session.stats)
+        if session.stats.duplicates:
+            logger.info(
+                f"♻️ Skipped {session.stats.duplicates} duplicate chunks of "
+                f"{session.stats.chunks} in job {job.id[:8]}"
+            )
+        return result
+
+    def _prune(self):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status IN (?, ?) "
+                "ORDER BY finished_at DESC LIMIT ?)",
+                FINISHED_STATUSES + FINISHED_STATUSES + (self.retention,),
+            )
@@ -0,0 +1,97 @@
+# app/services/registry.py
+#
+# Process-wide service instances. Heavy modules (torch, faiss,
+# sentence_transformers, langchain) are imported on first use so that pages
+# importing this module render right away.
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Optional
+
+from utils.logger import logger
+
+if TYPE_CHECKING:
+    from services.ai_service import AIService
+    from services.collection_manager import CollectionManager
+    from services.ingestion_queue import IngestionQueue
+    from services.vector_db_manager import VectorDBManager
+
+_collections: Optional["CollectionManager"] = None
+_collections_lock = threading.Lock()
+_ingestion_queue: Optional["IngestionQueue"] = None
+_ingestion_queue_lock = threading.Lock()
+_ai_service_future: Optional[Future] = None
+_ai_service_lock = threading.Lock()
+
+
+def get_collections() -> "CollectionManager":
+    global _collections
+    with _collections_lock:
+        if _collections is None:
+            from services.collection_manager import CollectionManager
+
+            logger.info("🔄 Creating shared CollectionManager...")
+            _collections = CollectionManager()
+        return _collections
+
+
+def get_vector_db() -> "VectorDBManager":
+    # The default collection's shard, i.e. the original single index
+    collections = get_collections()
+    return collections.get(collections.default_collection).vector_db
+
+
+def get_ingestion_queue() -> "IngestionQueue":
+    # Starting the workers also resumes jobs left over from a previous run
+    global _ingestion_queue
+    with _ingestion_queue_lock:
+        if _ingestion_queue is None:
+            from services.ingestion_queue import IngestionQueue
+
+            _ingestion_queue = IngestionQueue(get_collections())
+            _ingestion_queue.start()
+        return _ingestion_queue
+
+
+def _create_ai_service() -> "AIService":
+    start_time = time.perf_counter()
+    from services.ai_service import AIService
+
+    logger.info(
+        f"📦 Service modules imported in {time.perf_counter() - start_time:.2f}s"
+    )
+    ai_service = AIService()
+    # One query end to end loads lazy kernels and pages in the index
+    logger.info("🔥 Warming up model and index...")
+    ai_service.vector_db.encode_query("warm up")
+    if ai_service.reranker is not None:
+        ai_service.reranker.warm_up()
+    if not ai_service.vector_db.is_empty():
+        ai_service.vector_db.retrieve("warm up")
+    get_ingestion_queue()
+    logger.info(f"✅ AIService warmed up in {time.perf_counter() - start_time:.2f}s")
+    return ai_service
+
+
+def start_ai_service() -> Future:
+    # Idempotent: every caller shares the same background warm-up
+    global _ai_service_future
+    with _ai_service_lock:
+        if _ai_service_future is None:
+            future: Future = Future()
+
+            def run():
+                try:
+                    future.set_result(_create_ai_service())
+                except Exception as e:
+                    logger.error(f"Error warming up AIService: {e}")
+                    future.set_exception(e)
+
+            threading.Thread(target=run, name="warm-up", daemon=True).start()
+            _ai_service_future = future
+        return _ai_service_future
+
+
+def get_ai_service(timeout: Optional[float] = None) -> "AIService":
+    return start_ai_service().result(timeout)
@@ -0,0 +1,111 @@
+# app/services/reranker.py
+
+import dataclasses
+import threading
+import time
+from typing import List, Optional
+
+from config import settings
+from langchain_core.documents import Document
+from sentence_transformers import CrossEncoder
+from services.retrieval import RetrievalResult, normalize_query
+from utils.hashing import sha256_text
+from utils.logger import logger
+from utils.lru_cache import LRUCache
+from utils.metrics import metrics
+
+# Weight of the newest measurement in the per-pair latency estimate
+LATENCY_SMOOTHING = 0.2
+
+
+class Reranker:
+    def __init__(
+        self,
+        model_name: str = settings.RERANK_MODEL,
+        max_candidates: int = settings.RERANK_CANDIDATES,
+        latency_budget_ms: float = settings.RERANK_LATENCY_BUDGET_MS,
+        batch_size: int = settings.RERANK_BATCH_SIZE,
+        device: str = settings.RERANK_DEVICE,
+    ):
+        logger.info(f"Initializing Reranker with model: {model_name} on {device}")
+        self.model_name = model_name
+        self.max_candidates = max_candidates
+        self.latency_budget_ms = latency_budget_ms
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, device=device)
+        self.score_cache = LRUCache(
+            settings.RERANK_CACHE_SIZE, settings.QUERY_CACHE_TTL
+        )
+        self.ms_per_pair: Optional[float] = None
+        self._lock = threading.Lock()
+        self._warmed_up = False
+
+    def candidate_cap(self, top_k: int) -> int:
+        # Until a latency has been measured the configured maximum is trusted
+        if self.ms_per_pair is None or self.latency_budget_ms <= 0:
+            return max(top_k, self.max_candidates)
+        affordable = int(self.latency_budget_ms / self.ms_per_pair)
+        return max(top_k, min(self.max_candidates, affordable))
+
+    def _record_latency(self, elapsed_ms: float, pairs: int):
+        with self._lock:
+            if not self._warmed_up:
+                # The first call pays for lazy kernel initialization
+                self._warmed_up = True
+                return
+            per_pair = elapsed_ms / pairs
+            if self.ms_per_pair is None:
+                self.ms_per_pair = per_pair
+            else:
+                self.ms_per_pair += LATENCY_SMOOTHING * (per_pair - self.ms_per_pair)
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        query_key = normalize_query(query)
+        keys = [(query_key, sha256_text(text)) for text in texts]
+        scores = [self.score_cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            start_time = time.perf_counter()
+            predicted = self.model.predict(
+                [(query, texts[i]) for i in missing],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            self._record_latency(
+                (time.perf_counter() - start_time) * 1000, len(missing)
+            )
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                self.score_cache.put(keys[i], scores[i])
+        return scores
+
+    def warm_up(self):
+        self.score("warm up", ["warm up"])
+
+    def rerank(
+        self, query: str, candidates: RetrievalResult, top_k: int
+    ) -> RetrievalResult:
+        if not candidates.documents:
+            return candidates
+
+        with metrics.span("rerank") as span:
+            texts = [doc.page_content for doc in candidates.documents]
+            scores = self.score(query, texts)
+            order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        elapsed_ms = span.elapsed_ms
+
+        documents: List[Document] = [candidates.documents[i] for i in order[:top_k]]
+        logger.debug(
+            f"Reranked {len(scores)} candidates in {elapsed_ms:.1f} ms "
+            f"(estimate: {self.ms_per_pair or 0:.2f} ms/pair)"
+        )
+        # Candidate results may be shared through the results cache, so the
+        # reranked view is a copy
+        return dataclasses.replace(
+            candidates,
+            documents=documents,
+            scores=[scores[i] for i in order[:top_k]],
+            reranked_from=len(scores),
+            timings_ms={**candidates.timings_ms, "rerank": elapsed_ms},
+            elapsed_ms=candidates.elapsed_ms + elapsed_ms,
+        )
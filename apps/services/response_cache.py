@@ -0,0 +1,153 @@
+# app/services/response_cache.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from config import settings
+from langchain_core.documents import Document
+from utils.hashing import sha256_text
+from utils.logger import logger
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        db_path: str = settings.RESPONSE_CACHE_PATH,
+        max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES,
+        min_similarity: float = settings.RESPONSE_CACHE_MIN_SIMILARITY,
+        ttl: float = settings.RESPONSE_CACHE_TTL,
+    ):
+        logger.info(
+            f"Initializing ResponseCache at {db_path} (max_entries: {max_entries}, "
+            f"min_similarity: {min_similarity}, ttl: {ttl}s)"
+        )
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    context_key TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_context ON responses (context_key)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def context_key(
+        documents: List[Document], index_version: Union[int, Tuple[int, ...]]
+    ) -> str:
+        # Chunk texts are hashed too, since the version is only as durable as
+        # the last save and chunk keys are reused when a source changes
+        parts = [str(index_version)]
+        for doc in documents:
+            parts.append(doc.metadata.get("chunk_key", ""))
+            parts.append(sha256_text(doc.page_content))
+        return sha256_text("\n".join(parts))
+
+    def _expiry_cutoff(self) -> float:
+        # A TTL of 0 keeps answers until they are evicted for size
+        return time.time() - self.ttl if self.ttl > 0 else 0.0
+
+    def lookup(self, embedding: np.ndarray, context_key: str) -> Optional[str]:
+        query_vector = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, embedding, answer FROM responses "
+                "WHERE context_key = ? AND created_at >= ?",
+                (context_key, self._expiry_cutoff()),
+            ).fetchall()
+
+            best_id, best_answer, best_score = None, None, self.min_similarity
+            for row_id, blob, answer in rows:
+                # Both vectors are normalized, so the dot product is cosine similarity
+                score = float(
+                    np.dot(np.frombuffer(blob, dtype=np.float32), query_vector)
+                )
+                if score >= best_score:
+                    best_id, best_answer, best_score = row_id, answer, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE responses SET last_used_at = ? WHERE id = ?",
+                (time.time(), best_id),
+            )
+            self.hits += 1
+        logger.info(f"🎯 Response cache hit (similarity: {best_score:.4f})")
+        return best_answer
+
+    def store(self, query: str, embedding: np.ndarray, context_key: str, answer: str):
+        if not answer or self.max_entries <= 0:
+            return
+        blob = np.asarray(embedding, dtype=np.float32).ravel().tobytes()
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO responses (context_key, query, embedding, answer, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (context_key, query, blob, answer, now, now),
+            )
+            conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (self._expiry_cutoff(),)
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM responses WHERE id IN "
+                    "(SELECT id FROM responses ORDER BY last_used_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                logger.info(
+                    f"Evicted {count - self.max_entries} least recently used responses"
+                )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def replay(answer: str) -> Iterator[str]:
+    # Cached answers are streamed word by word so the UI renders them like a live response
+    for match in re.finditer(r"\S+\s*", answer):
+        yield match.group(0)
@@ -0,0 +1,64 @@
+# app/services/retrieval.py
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
+
+from config import settings
+from langchain_core.documents import Document
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+
+
+@dataclass
+class RetrievalResult:
+    query: str
+    documents: List[Document] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    candidate_scores: List[float] = field(default_factory=list)
+    dropped_below_threshold: int = 0
+    dropped_by_drop_off: int = 0
+    elapsed_ms: float = 0.0
+    cached: bool = False
+    # A tuple of per-shard versions when results span several collections
+    index_version: Union[int, Tuple[int, ...]] = 0
+    mode: str = "dense"
+    lexical_matches: int = 0
+    reranked_from: int = 0
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_below_threshold + self.dropped_by_drop_off
+
+    def to_dict(self) -> dict:
+        return {
+            "kept": len(self.documents),
+            "scores": [round(score, 4) for score in self.scores],
+            "candidate_scores": [round(score, 4) for score in self.candidate_scores],
+            "dropped_below_threshold": self.dropped_below_threshold,
+            "dropped_by_drop_off": self.dropped_by_drop_off,
+            "mode": self.mode,
+            "lexical_matches": self.lexical_matches,
+            "reranked_from": self.reranked_from,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "timings_ms": {
+                stage: round(elapsed, 2) for stage, elapsed in self.timings_ms.items()
+            },
+            "cached": self.cached,
+        }
+
+
+def normalize_query(query: str) -> str:
+    # Case and whitespace variants of the same question share cache entries
+    return " ".join(query.split()).casefold()
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[int]], k: int = settings.RRF_K
+) -> List[Tuple[int, float]]:
+    # Ranks rather than raw scores are fused, so cosine and BM25 need no calibration
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -1,64 +1,728 @@
 # app/services/vector_db_manager.py
 
-from typing import List, Tuple
+import dataclasses
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import faiss
 import numpy as np
 import torch
+from config import settings
+from constants import FILE_SOURCE_PREFIX, URL_SOURCE_PREFIX
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
-from sentence_transformers import SentenceTransformer
+from langchain_core.retrievers import BaseRetriever
+from services.bm25_index import BM25Index, analyze, exact_match_terms
+from services.chunk_store import ChunkStore
+from services.chunker import DocumentChunker
+from services.deduplicator import DedupIndex, DedupSession, DedupStats
+from services.embedding_engine import EmbeddingEngine
+from services.index_factory import IndexFactory
+from services.index_store import IndexStore
+from services.retrieval import (
+    RETRIEVAL_MODES,
+    RetrievalResult,
+    normalize_query,
+    reciprocal_rank_fusion,
+)
+from utils.batcher import MicroBatcher
 from utils.logger import logger
+from utils.lru_cache import LRUCache
+from utils.metrics import metrics
+from utils.rwlock import ReadWriteLock
 
 
 class VectorDBManager:
-    def __init__(self):
+    def __init__(
+        self,
+        index_store: Optional[IndexStore] = None,
+        model_name: str = settings.EMBEDDING_MODEL,
+        chunk_splitter: str = settings.CHUNK_SPLITTER,
+        embedding_engine: Optional[EmbeddingEngine] = None,
+        embedding_cache: Optional[LRUCache] = None,
+    ):
         logger.info("Initializing VectorDBManager...")
         self.index = None
-        self.retrieval_model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.metadata = []
+        self.index_store = index_store
+        # Shards of one collection set share the model and its query cache
+        self.embedding_engine = (
+            embedding_engine
+            if embedding_engine is not None
+            else EmbeddingEngine(model_name)
+        )
+        self.index_factory = IndexFactory()
+        self.chunker = DocumentChunker(
+            self.embedding_engine.tokenizer, splitter=chunk_splitter
+        )
+        self.lexical_index = BM25Index()
+        self.chunks = ChunkStore()
+        self.sources: Dict[str, dict] = {}
+        self.dedup_index = DedupIndex() if settings.DEDUP_ENABLED else None
+        # Chunks referenced by more than one source, with every source that
+        # references them; any other chunk belongs to its metadata source_id
+        self.shared_chunks: Dict[int, List[str]] = {}
+        self.dedup_totals = DedupStats()
+        self.next_chunk_id = 0
+        self.index_version = 0
+        self.embedding_cache = (
+            embedding_cache
+            if embedding_cache is not None
+            else LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+        )
+        self.results_cache = LRUCache(
+            settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL
+        )
+        # Concurrent queries (e.g. from the HTTP server) are encoded in one
+        # call and searched with one batched index.search
+        self.query_batcher = MicroBatcher(
+            self._search_batch,
+            settings.QUERY_BATCH_MAX_SIZE,
+            settings.QUERY_BATCH_MAX_WAIT_MS,
+            name="query-batcher",
+        )
+        self._lock = ReadWriteLock()
         logger.info("VectorDBManager initialized successfully")
 
     def __del__(self):
         logger.info("Cleaning up VectorDBManager resources...")
         if hasattr(self, "index") and self.index is not None:
             self.index = None
-        if hasattr(self, "retrieval_model"):
-            del self.retrieval_model
+        if hasattr(self, "embedding_engine"):
+            del self.embedding_engine
             torch.cuda.empty_cache() if torch.cuda.is_available() else None
         logger.info("VectorDBManager cleanup completed")
 
-    def compute_embeddings(
-        self, documents: List[Document]
-    ) -> Tuple[np.ndarray, List[dict]]:
+    def compute_embeddings(self, documents: List[Document]) -> np.ndarray:
         logger.info(f"Computing embeddings for {len(documents)} documents...")
         texts = [doc.page_content for doc in documents]
-        embeddings = self.retrieval_model.encode(
-            texts, convert_to_numpy=True, show_progress_bar=True
-        )
+        with metrics.span("embed_documents"):
+            embeddings = self.embedding_engine.encode(texts, show_progress_bar=True)
         logger.info(f"Successfully computed embeddings of shape {embeddings.shape}")
+        return embeddings
 
-        metadata = []
-        for doc in documents:
-            meta = {
-                "source": doc.metadata.get("source_file")
-                or doc.metadata.get("source_url", "unknown"),
-                "text_snippet": doc.page_content[:200] + "...",
-            }
-            metadata.append(meta)
+    def _build_metadata(self, doc: Document) -> dict:
+        return {
+            "source": doc.metadata.get("source_file")
+            or doc.metadata.get("source_url", "unknown"),
+            "text_snippet": doc.page_content[:200] + "...",
+            "chunk_key": doc.metadata.get("chunk_key"),
+            "sources": doc.metadata.get("sources", [doc.metadata.get("source_id")]),
+        }
 
-        return embeddings, metadata
+    def _get_chunk(self, chunk_id: int) -> Optional[Document]:
+        doc = self.chunks.get(chunk_id)
+        # Read once: a concurrent commit may release the entry meanwhile
+        references = self.shared_chunks.get(chunk_id)
+        if doc is not None and references is not None:
+            doc.metadata["sources"] = list(references)
+        return doc
 
-    def build_faiss_index(self, embeddings: np.ndarray):
+    def build_faiss_index(
+        self, embeddings: np.ndarray, ids: Optional[np.ndarray] = None
+    ):
         logger.info(
             f"Building FAISS index for embeddings of shape {embeddings.shape}..."
         )
-        dim = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dim)
-        index.add(embeddings)
+        if ids is None:
+            ids = np.arange(len(embeddings), dtype=np.int64)
+        with metrics.span("index_build"):
+            index = self.index_factory.build(embeddings, ids)
         self.index = index
         logger.info("FAISS index built successfully")
         return index
 
+    def _rebuild_index(self, exclude_ids: Optional[np.ndarray] = None):
+        ids, vectors = self.index_factory.extract_vectors(self.index)
+        if exclude_ids is not None:
+            keep = ~np.isin(ids, exclude_ids)
+            ids, vectors = ids[keep], vectors[keep]
+        if len(ids) == 0:
+            self.index = None
+            return
+        self.build_faiss_index(vectors, ids)
+
+    def _ensure_index_type(self):
+        if self.index is None:
+            return
+        current = (
+            self.index_factory.describe(self.index),
+            self.index_factory.describe_encoding(self.index),
+        )
+        desired_type = self.index_factory.resolve_type(self.index.ntotal)
+        desired = (desired_type, self.index_factory.resolve_encoding(desired_type))
+        if current != desired:
+            logger.info(
+                f"Rebuilding {'/'.join(current)} index as {'/'.join(desired)} "
+                "for its size and settings"
+            )
+            self._rebuild_index()
+        else:
+            self.index_factory.configure_search(self.index)
+
+    def _bump_index_version(self):
+        # Called under the write lock; cached results never outlive the index
+        # they came from, while query embeddings stay valid for the same model
+        self.index_version += 1
+        self.results_cache.clear()
+
+    @property
+    def cache_stats(self) -> dict:
+        return {
+            "index_version": self.index_version,
+            "embeddings": self.embedding_cache.stats,
+            "results": self.results_cache.stats,
+        }
+
+    @property
+    def dedup_stats(self) -> dict:
+        return {
+            "enabled": self.dedup_index is not None,
+            "shared_chunks": len(self.shared_chunks),
+            **self.dedup_report(self.dedup_totals),
+        }
+
+    def dedup_report(self, stats: DedupStats) -> dict:
+        # Every duplicate is a vector that was neither embedded nor stored
+        bytes_per_vector = (
+            self.index_factory.bytes_per_vector(self.index)
+            if self.index is not None
+            else 0
+        )
+        return {
+            **stats.to_dict(),
+            "index_bytes_saved": stats.duplicates * bytes_per_vector,
+        }
+
+    @property
+    def index_config(self) -> dict:
+        return {
+            "embedding": self.embedding_engine.config,
+            "chunking": self.chunker.config,
+        }
+
+    def is_empty(self) -> bool:
+        return self.index is None or self.index.ntotal == 0
+
+    def is_source_current(self, source_id: str, content_hash: str) -> bool:
+        entry = self.sources.get(source_id)
+        return entry is not None and entry["content_hash"] == content_hash
+
+    def add_source(
+        self, source_id: str, documents: List[Document], content_hash: str
+    ) -> int:
+        return self.add_sources({source_id: (documents, content_hash)})[source_id]
+
+    def add_sources(
+        self, batch: Dict[str, Tuple[List[Document], str]]
+    ) -> Dict[str, int]:
+        added = {source_id: 0 for source_id in batch}
+        chunked = self.chunk_sources(batch)
+        if not chunked:
+            return added
+
+        # All sources are encoded in one pass so batches stay full; encoding
+        # happens outside the lock so searches keep running meanwhile
+        session = self.new_dedup_session()
+        self.deduplicate(session, chunked)
+        embeddings, lexical_terms = None, []
+        if session.unique:
+            logger.info(
+                f"➕ Indexing {len(session.unique)} chunks from {len(chunked)} "
+                f"sources ({session.stats.duplicates} duplicates skipped)"
+            )
+            embeddings, lexical_terms = self.embed_chunks(session.unique)
+        content_hashes = {source_id: batch[source_id][1] for source_id in chunked}
+        added.update(
+            self.commit_sources(session, content_hashes, embeddings, lexical_terms)
+        )
+        return added
+
+    def chunk_sources(
+        self, batch: Dict[str, Tuple[List[Document], str]]
+    ) -> Dict[str, List[Document]]:
+        # Unchanged sources are left out; changed sources without any chunks
+        # map to an empty list so that committing them removes the old version
+        chunked = {}
+        for source_id, (documents, content_hash) in batch.items():
+            if self.is_source_current(source_id, content_hash):
+                logger.info(f"Source unchanged, skipping: {source_id}")
+                continue
+
+            chunks = self.chunker.split_documents(documents, source_id)
+            if not chunks:
+                logger.warning(f"No documents to index for source: {source_id}")
+                if source_id not in self.sources:
+                    continue
+            chunked[source_id] = chunks
+        return chunked
+
+    def new_dedup_session(self) -> DedupSession:
+        return DedupSession(self.dedup_index, self.chunks.get_text)
+
+    def deduplicate(self, session: DedupSession, chunked: Dict[str, List[Document]]):
+        # Only the chunks left in session.unique need embedding; duplicates
+        # become references to the canonical chunk they match
+        with self._lock.read_lock(), metrics.span("deduplicate"):
+            for source_id, chunks in chunked.items():
+                session.add(source_id, chunks)
+
+    def embed_chunks(self, chunks: List[Document]) -> Tuple[np.ndarray, List[Counter]]:
+        embeddings = self.compute_embeddings(chunks)
+        return embeddings, [analyze(chunk.page_content) for chunk in chunks]
+
+    def commit_sources(
+        self,
+        session: DedupSession,
+        content_hashes: Dict[str, str],
+        embeddings: Optional[np.ndarray],
+        lexical_terms: List[Counter],
+    ) -> Dict[str, int]:
+        # Embeddings and terms follow the order of session.unique. Everything
+        # is swapped in under one write lock, so searches see either the
+        # previous index version or the complete new one.
+        with self._lock.write_lock():
+            embeddings, lexical_terms = self._restore_lost_canonicals(
+                session, embeddings, lexical_terms
+            )
+            old_entries = {
+                source_id: self.sources.pop(source_id)
+                for source_id in session.layout
+                if source_id in self.sources
+            }
+
+            chunk_ids = np.arange(
+                self.next_chunk_id,
+                self.next_chunk_id + len(session.unique),
+                dtype=np.int64,
+            )
+            self.next_chunk_id += len(session.unique)
+            if session.unique:
+                if self.index is None:
+                    self.build_faiss_index(embeddings, chunk_ids)
+                else:
+                    self.index.add_with_ids(embeddings, chunk_ids)
+
+            for chunk_id, doc, terms, fingerprint in zip(
+                chunk_ids.tolist(), session.unique, lexical_terms, session.fingerprints
+            ):
+                self.chunks.add(chunk_id, doc.page_content, doc.metadata)
+                self.lexical_index.add(chunk_id, terms)
+                if self.dedup_index is not None:
+                    self.dedup_index.add(
+                        chunk_id,
+                        fingerprint or self.dedup_index.fingerprint(doc.page_content),
+                    )
+
+            added = {}
+            for source_id, layout in session.layout.items():
+                old_ids = set(old_entries.get(source_id, {}).get("chunk_ids", []))
+                ids = [int(chunk_ids[position]) for position in sorted(layout.new)]
+                ids += list(layout.existing)
+                # New chunks matched by several sources of this ingest are
+                # shared from the start, with the first of them as the owner
+                for chunk_id in ids:
+                    if chunk_id not in old_ids:
+                        self._add_reference(chunk_id, source_id)
+                added[source_id] = len(ids)
+                if ids:
+                    self.sources[source_id] = {
+                        "content_hash": content_hashes[source_id],
+                        "chunk_ids": ids,
+                    }
+
+            # Old chunks are released only now, so a changed source that
+            # still shares them with another source never drops them
+            for source_id, entry in old_entries.items():
+                kept = set(self.sources.get(source_id, {}).get("chunk_ids", []))
+                self._release_chunks(
+                    source_id,
+                    [
+                        chunk_id
+                        for chunk_id in entry["chunk_ids"]
+                        if chunk_id not in kept
+                    ],
+                )
+            if session.unique:
+                self._ensure_index_type()
+            if session.layout:
+                self._bump_index_version()
+            self.dedup_totals.merge(session.stats)
+        for kind, count in (
+            ("exact", session.stats.exact_duplicates),
+            ("near", session.stats.near_duplicates),
+        ):
+            if count:
+                metrics.increment("duplicate_chunks_total", kind, count)
+        return added
+
+    def _restore_lost_canonicals(
+        self,
+        session: DedupSession,
+        embeddings: Optional[np.ndarray],
+        lexical_terms: List[Counter],
+    ) -> Tuple[Optional[np.ndarray], List[Counter]]:
+        # A canonical chunk matched during deduplication may have been removed
+        # with its last source since; its duplicate is then indexed after all.
+        # Rare enough that embedding under the write lock is acceptable.
+        lost = []
+        for layout in session.layout.values():
+            for chunk_id, doc in list(layout.existing.items()):
+                if chunk_id not in self.chunks:
+                    del layout.existing[chunk_id]
+                    layout.new.add(len(session.unique) + len(lost))
+                    lost.append(doc)
+        if not lost:
+            return embeddings, lexical_terms
+
+        logger.info(f"Re-indexing {len(lost)} chunks whose duplicates were removed")
+        lost_embeddings, lost_terms = self.embed_chunks(lost)
+        session.unique.extend(lost)
+        session.fingerprints.extend([None] * len(lost))
+        if embeddings is None:
+            return lost_embeddings, lost_terms
+        return np.vstack([embeddings, lost_embeddings]), lexical_terms + lost_terms
+
+    def _add_reference(self, chunk_id: int, source_id: str):
+        references = self.shared_chunks.get(chunk_id)
+        if references is None:
+            owner = self.chunks.get(chunk_id).metadata.get("source_id")
+            if owner == source_id:
+                return
+            self.shared_chunks[chunk_id] = [owner, source_id]
+        elif source_id not in references:
+            references.append(source_id)
+
+    def _release_chunks(self, source_id: str, chunk_ids: List[int]):
+        # Drops the source's references; chunks nobody references are deleted
+        orphaned = []
+        for chunk_id in chunk_ids:
+            references = self.shared_chunks.get(chunk_id)
+            if references is None:
+                orphaned.append(chunk_id)
+                continue
+            if source_id in references:
+                references.remove(source_id)
+            if not references:
+                del self.shared_chunks[chunk_id]
+                orphaned.append(chunk_id)
+                continue
+            owner = self.chunks.get(chunk_id).metadata.get("source_id")
+            if owner == source_id:
+                # Citations must never name a removed source
+                self._reassign_owner(chunk_id, references[0])
+                owner = references[0]
+            if references == [owner]:
+                del self.shared_chunks[chunk_id]
+        self._delete_chunks(orphaned)
+
+    def _reassign_owner(self, chunk_id: int, source_id: str):
+        # Only the source is known for the survivor, not its own page or
+        # chunk position, so those are left out rather than guessed
+        metadata = {"source_id": source_id, "chunk_key": f"{source_id}#d{chunk_id}"}
+        if source_id.startswith(FILE_SOURCE_PREFIX):
+            metadata["source_file"] = source_id[len(FILE_SOURCE_PREFIX) :]
+        elif source_id.startswith(URL_SOURCE_PREFIX):
+            url = source_id[len(URL_SOURCE_PREFIX) :]
+            metadata.update(source=url, source_url=url)
+        self.chunks.replace_metadata(chunk_id, metadata)
+
+    def _delete_chunks(self, chunk_ids: List[int]):
+        if chunk_ids and self.index is not None:
+            ids = np.array(chunk_ids, dtype=np.int64)
+            if self.index_factory.supports_removal(self.index):
+                self.index.remove_ids(ids)
+            else:
+                self._rebuild_index(exclude_ids=ids)
+        for chunk_id in chunk_ids:
+            text = self.chunks.remove(chunk_id)
+            if text is not None:
+                self.lexical_index.remove(chunk_id, analyze(text))
+
+    def remove_source(self, source_id: str) -> int:
+        with self._lock.write_lock():
+            return self._remove_source(source_id)
+
+    def _remove_source(self, source_id: str) -> int:
+        entry = self.sources.pop(source_id, None)
+        if entry is None:
+            logger.warning(f"Source not indexed: {source_id}")
+            return 0
+
+        chunk_ids = entry["chunk_ids"]
+        logger.info(f"➖ Removing {len(chunk_ids)} chunk references for {source_id}")
+        self._release_chunks(source_id, chunk_ids)
+        self._bump_index_version()
+        return len(chunk_ids)
+
+    def sync_sources(
+        self,
+        sources: Dict[str, str],
+        loader: Callable[[List[str]], Dict[str, List[Document]]],
+    ) -> bool:
+        logger.info(f"Synchronizing index with {len(sources)} sources...")
+        changed = False
+
+        for source_id in list(self.sources):
+            if source_id not in sources:
+                changed |= self.remove_source(source_id) > 0
+
+        stale = [
+            source_id
+            for source_id, content_hash in sources.items()
+            if not self.is_source_current(source_id, content_hash)
+        ]
+        if stale:
+            # Loading the whole batch at once lets the loader parse in parallel
+            changed |= any(source_id in self.sources for source_id in stale)
+            loaded = loader(stale)
+            added = self.add_sources(
+                {
+                    source_id: (documents, sources[source_id])
+                    for source_id, documents in loaded.items()
+                }
+            )
+            changed |= any(count > 0 for count in added.values())
+
+        logger.info(f"Index synchronized ({'updated' if changed else 'unchanged'})")
+        return changed
+
+    def load(self) -> bool:
+        if self.index_store is None:
+            return False
+
+        state = self.index_store.load(self.index_config)
+        if state is None:
+            return False
+
+        with self._lock.write_lock():
+            self.index = state["index"]
+            self.chunks = state["chunks"]
+            self.sources = state["sources"]
+            if state["lexical_arrays"] is not None:
+                self.lexical_index = BM25Index.from_arrays(state["lexical_arrays"])
+            else:
+                logger.info("No persisted BM25 index, building it from the chunk store")
+                self.lexical_index = BM25Index.build(dict(self.chunks.texts_by_id()))
+            self.shared_chunks = state["shared_chunks"]
+            self.dedup_index = self._load_dedup_index(state["dedup_arrays"])
+            self.next_chunk_id = state["next_chunk_id"]
+            # The version is persisted so on-disk caches keyed by it survive restarts
+            self.index_version = state["index_version"]
+            self._ensure_index_type()
+            self.results_cache.clear()
+        return True
+
+    def save(self):
+        if self.index_store is None:
+            return
+
+        with self._lock.read_lock():
+            self.index_store.save(
+                self.index,
+                self.chunks,
+                self.sources,
+                self.next_chunk_id,
+                self.index_config,
+                self.index_version,
+                self.lexical_index.to_arrays(),
+                (
+                    self.dedup_index.to_arrays(self.chunks.__contains__)
+                    if self.dedup_index is not None
+                    else None
+                ),
+                self.shared_chunks,
+            )
+
+    def _load_dedup_index(self, arrays: Optional[dict]) -> Optional[DedupIndex]:
+        if not settings.DEDUP_ENABLED:
+            return None
+        if arrays is not None:
+            index = DedupIndex.from_arrays(arrays)
+            if index is not None:
+                return index
+            logger.info("Deduplication settings changed, rebuilding the dedup index")
+        else:
+            logger.info("No persisted dedup index, building it from the chunk store")
+        return DedupIndex.build(dict(self.chunks.texts_by_id()))
+
+    def encode_query(self, query: str) -> np.ndarray:
+        key = normalize_query(query)
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedding_engine.encode([key])
+            self.embedding_cache.put(key, embedding)
+        return embedding
+
+    def _search_batch(
+        self, requests: List[Tuple[str, int]]
+    ) -> List[List[Tuple[int, float]]]:
+        embeddings = {}
+        for key, _ in requests:
+            if key not in embeddings:
+                embeddings[key] = self.embedding_cache.get(key)
+        missing = [key for key, embedding in embeddings.items() if embedding is None]
+        if missing:
+            with metrics.span("embed_query"):
+                encoded = self.embedding_engine.encode(missing)
+            for key, embedding in zip(missing, encoded):
+                embeddings[key] = embedding[np.newaxis, :]
+                self.embedding_cache.put(key, embeddings[key])
+
+        query_matrix = np.vstack([embeddings[key] for key, _ in requests])
+        max_k = max(k for _, k in requests)
+        with self._lock.read_lock():
+            if self.index is None:
+                return [[] for _ in requests]
+            with metrics.span("faiss_search"):
+                scores, indices = self.index.search(query_matrix, max_k)
+
+        # Each caller gets its own top-k slice of the shared max_k search
+        return [
+            [
+                (int(chunk_id), float(score))
+                for chunk_id, score in zip(indices[row, :k], scores[row, :k])
+                if chunk_id != -1
+            ]
+            for row, (_, k) in enumerate(requests)
+        ]
+
+    def _search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        # Embeddings are L2-normalized, so inner product is cosine similarity
+        return self.query_batcher((normalize_query(query), k))
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        if self.index is None:
+            logger.error("FAISS index not initialized")
+            raise ValueError(
+                "FAISS index not initialized. Call build_faiss_index() first."
+            )
+
+        hits = [
+            (self._get_chunk(chunk_id), score)
+            for chunk_id, score in self._search(query, k)
+        ]
+        return [(doc, score) for doc, score in hits if doc is not None]
+
+    def lexical_search(self, query: str, k: int = 4) -> List[Tuple[int, float]]:
+        terms = analyze(query)
+        with self._lock.read_lock():
+            return self.lexical_index.search(terms, k)
+
+    def _admit_lexical(
+        self,
+        query: str,
+        lexical: List[Tuple[int, float]],
+        dense: List[Tuple[int, float]],
+        k: int,
+    ) -> List[Tuple[int, float]]:
+        # Only exact matches on part numbers or error codes bypass the
+        # similarity threshold; other lexical hits must also pass it densely
+        admitted = {chunk_id for chunk_id, _ in dense}
+        codes = exact_match_terms(analyze(query))
+        if codes:
+            with self._lock.read_lock():
+                admitted.update(
+                    chunk_id for chunk_id, _ in self.lexical_index.search(codes, k)
+                )
+        return [
+            (chunk_id, score) for chunk_id, score in lexical if chunk_id in admitted
+        ]
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = settings.RETRIEVAL_TOP_K,
+        min_similarity: float = settings.RETRIEVAL_MIN_SIMILARITY,
+        drop_off: float = settings.RETRIEVAL_SCORE_DROP_OFF,
+        mode: str = settings.RETRIEVAL_MODE,
+    ) -> RetrievalResult:
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode '{mode}'. Expected one of {RETRIEVAL_MODES}."
+            )
+        start_time = time.perf_counter()
+        result = RetrievalResult(query=query, mode=mode)
+        if self.is_empty():
+            return result
+
+        result.index_version = self.index_version
+        cache_key = (
+            "retrieve",
+            normalize_query(query),
+            top_k,
+            min_similarity,
+            drop_off,
+            mode,
+            self.index_version,
+        )
+        cached = self.results_cache.get(cache_key)
+        if cached is not None:
+            return dataclasses.replace(
+                cached,
+                query=query,
+                documents=list(cached.documents),
+                scores=list(cached.scores),
+                timings_ms={},
+                elapsed_ms=(time.perf_counter() - start_time) * 1000,
+                cached=True,
+            )
+
+        # Fusion needs a deeper candidate list from each retriever than top_k
+        num_candidates = (
+            top_k if mode == "dense" else max(top_k, settings.HYBRID_CANDIDATES)
+        )
+        dense = []
+        if mode != "lexical":
+            with metrics.span("dense_search") as span:
+                candidates = self._search(query, num_candidates)
+            result.timings_ms["dense"] = span.elapsed_ms
+            result.candidate_scores = [score for _, score in candidates]
+            best_score = candidates[0][1] if candidates else 0.0
+
+            # Scores arrive sorted, so everything after the first cut is dropped too
+            for chunk_id, score in candidates:
+                if score < min_similarity:
+                    result.dropped_below_threshold += 1
+                elif score < best_score - drop_off:
+                    result.dropped_by_drop_off += 1
+                else:
+                    dense.append((chunk_id, score))
+
+        if mode == "dense":
+            ranked = dense
+        else:
+            with metrics.span("lexical_search") as span:
+                lexical = self.lexical_search(query, num_candidates)
+                if mode == "hybrid":
+                    lexical = self._admit_lexical(query, lexical, dense, num_candidates)
+            result.timings_ms["lexical"] = span.elapsed_ms
+            result.lexical_matches = len(lexical)
+            ranked = reciprocal_rank_fusion(
+                [
+                    [chunk_id for chunk_id, _ in dense],
+                    [chunk_id for chunk_id, _ in lexical],
+                ]
+            )
+
+        # Only the chunks that make the cut are read and materialized
+        for chunk_id, score in ranked:
+            doc = self._get_chunk(chunk_id)
+            if doc is None:
+                continue
+            result.documents.append(doc)
+            result.scores.append(score)
+            if len(result.documents) == top_k:
+                break
+
+        result.elapsed_ms = (time.perf_counter() - start_time) * 1000
+        self.results_cache.put(cache_key, result)
+        return result
+
+    def as_retriever(self, k: int = settings.RETRIEVAL_TOP_K) -> "VectorDBRetriever":
+        return VectorDBRetriever(vector_db=self, k=k)
+
     def search_index(self, query: str, top_k: int = 3) -> List[dict]:
         if self.index is None:
             logger.error("FAISS index not initialized")
@@ -67,19 +731,40 @@ class VectorDBManager:
             )
 
         logger.info(f"Searching index for query: {query[:50]}...")
-        query_embedding = self.retrieval_model.encode([query], convert_to_numpy=True)
-        distances, indices = self.index.search(query_embedding, top_k)
-        logger.info(f"Found {len(indices[0])} results")
+        cache_key = ("search", normalize_query(query), top_k, self.index_version)
+        cached = self.results_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Serving {len(cached)} cached results")
+            return [dict(result) for result in cached]
+
+        with metrics.span("search_index"):
+            hits = self._search(query, top_k)
+        logger.info(f"Found {len(hits)} results")
 
         results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.metadata):
+        for i, (chunk_id, score) in enumerate(hits):
+            doc = self._get_chunk(chunk_id)
+            if doc is not None:
+                meta = self._build_metadata(doc)
                 result = {
                     "rank": i + 1,
-                    "source": self.metadata[idx]["source"],
-                    "text_snippet": self.metadata[idx]["text_snippet"],
-                    "distance": float(distances[0][i]),
+                    "source": meta["source"],
+                    "text_snippet": meta["text_snippet"],
+                    "chunk_key": meta["chunk_key"],
+                    "sources": meta["sources"],
+                    "similarity": score,
                 }
                 results.append(result)
 
+        self.results_cache.put(cache_key, results)
         return results
+
+
+class VectorDBRetriever(BaseRetriever):
+    vector_db: Any
+    k: int = settings.RETRIEVAL_TOP_K
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.vector_db.retrieve(query, top_k=self.k).documents
@@ -0,0 +1,187 @@
+# app/services/web_fetcher.py
+
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+from bs4 import BeautifulSoup
+from config import settings
+from langchain_core.documents import Document
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.hashing import sha256_text
+from utils.logger import logger
+
+DEFAULT_USER_AGENT = "rag-chatbot/0.1"
+
+
+def _write_atomic(path: str, content: str):
+    # Readers see the old file or the complete new one, never a truncated one;
+    # a unique temp file keeps concurrent writers of one URL apart
+    with tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        dir=os.path.dirname(path),
+        suffix=".tmp",
+        delete=False,
+    ) as f:
+        f.write(content)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+class WebFetcher:
+    def __init__(
+        self,
+        cache_dir: str = settings.WEB_CACHE_DIR,
+        max_workers: int = settings.URL_FETCH_CONCURRENCY,
+        timeout: float = settings.URL_FETCH_TIMEOUT,
+        retries: int = settings.URL_FETCH_RETRIES,
+        cache_ttl: float = settings.WEB_CACHE_TTL,
+        session: Optional[requests.Session] = None,
+    ):
+        logger.info(
+            f"Initializing WebFetcher with cache_dir: {cache_dir}, max_workers: {max_workers}"
+        )
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.session = session or self._create_session(max_workers, retries)
+        self._cache_lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _create_session(self, pool_size: int, retries: int) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = os.environ.get("USER_AGENT", DEFAULT_USER_AGENT)
+        return session
+
+    def _cache_paths(self, url: str):
+        key = sha256_text(url)
+        return (
+            os.path.join(self.cache_dir, f"{key}.json"),
+            os.path.join(self.cache_dir, f"{key}.html"),
+        )
+
+    def _read_cache_entry(self, url: str) -> Optional[dict]:
+        meta_path, snapshot_path = self._cache_paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(snapshot_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def _read_snapshot(self, url: str) -> str:
+        _, snapshot_path = self._cache_paths(url)
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _write_cache_entry(self, url: str, html: str, response: requests.Response):
+        meta_path, snapshot_path = self._cache_paths(url)
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": sha256_text(html),
+            "fetched_at": time.time(),
+        }
+        with self._cache_lock:
+            # The old metadata goes first and the new one is written last, so
+            # a crash in between never pairs metadata with the wrong snapshot
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(meta_path)
+            _write_atomic(snapshot_path, html)
+            _write_atomic(meta_path, json.dumps(entry))
+
+    def _touch_cache_entry(self, url: str, entry: dict):
+        meta_path, _ = self._cache_paths(url)
+        entry["fetched_at"] = time.time()
+        with self._cache_lock:
+            _write_atomic(meta_path, json.dumps(entry))
+
+    def get_content_hash(self, url: str) -> Optional[str]:
+        entry = self._read_cache_entry(url)
+        return entry["content_hash"] if entry else None
+
+    def fetch_html(self, url: str) -> Optional[str]:
+        entry = self._read_cache_entry(url)
+        if entry and time.time() - entry["fetched_at"] < self.cache_ttl:
+            logger.debug(f"Serving fresh snapshot for {url}")
+            return self._read_snapshot(url)
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and entry:
+                logger.info(f"Not modified, using cached snapshot: {url}")
+                self._touch_cache_entry(url, entry)
+                return self._read_snapshot(url)
+            response.raise_for_status()
+        except Exception as e:
+            if entry:
+                logger.warning(f"Error fetching {url}, serving stale snapshot: {e}")
+                return self._read_snapshot(url)
+            logger.error(f"Error fetching URL {url}: {e}")
+            return None
+
+        if response.encoding is None or response.encoding == "ISO-8859-1":
+            response.encoding = response.apparent_encoding
+        html = response.text
+        self._write_cache_entry(url, html, response)
+        return html
+
+    def fetch_documents(self, url: str) -> List[Document]:
+        html = self.fetch_html(url)
+        if html is None:
+            return []
+
+        soup = BeautifulSoup(html, "html.parser")
+        metadata = {"source": url, "source_url": url}
+        if soup.title and soup.title.string:
+            metadata["title"] = soup.title.get_text()
+        if description := soup.find("meta", attrs={"name": "description"}):
+            metadata["description"] = description.get("content", "")
+        if html_tag := soup.find("html"):
+            metadata["language"] = html_tag.get("lang", "")
+        return [Document(page_content=soup.get_text(), metadata=metadata)]
+
+    def fetch_all(self, urls: List[str]) -> Dict[str, List[Document]]:
+        logger.info(
+            f"Fetching {len(urls)} URLs with up to {self.max_workers} concurrent requests"
+        )
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(self.fetch_documents, urls)
+            return dict(zip(urls, results))
+
+    def prefetch(self, urls: List[str]):
+        logger.info(f"Revalidating {len(urls)} cached URLs")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(self.fetch_html, urls))
@@ -0,0 +1,96 @@
+# app/ui/components.py
+
+import time
+from typing import TYPE_CHECKING, List
+
+import streamlit as st
+from config import settings
+from services.registry import get_collections
+
+if TYPE_CHECKING:
+    from services.collection_manager import Collection, CollectionManager
+    from services.ingestion_queue import IngestionJob, IngestionQueue
+
+
+def _create_collection(collections: "CollectionManager"):
+    name = st.session_state.new_collection.strip()
+    try:
+        collections.create(name)
+    except ValueError as e:
+        st.session_state.collection_error = str(e)
+        return
+    st.session_state.collection = name
+    st.session_state.new_collection = ""
+
+
+def collection_picker() -> "Collection":
+    # The first call imports torch and faiss and loads the model, so the
+    # spinner covers creating the manager as well as opening the collection
+    with st.spinner("Loading the document index..."):
+        collections = get_collections()
+        with st.sidebar:
+            st.selectbox("Collection", collections.names(), key="collection")
+            st.text_input(
+                "New collection", placeholder="e.g. manuals", key="new_collection"
+            )
+            st.button(
+                "Create collection", on_click=_create_collection, args=(collections,)
+            )
+            if error := st.session_state.pop("collection_error", None):
+                st.error(error)
+        return collections.get(st.session_state.collection)
+
+
+def _job_names(job: "IngestionJob") -> str:
+    names = ", ".join(source_id.split(":", 1)[1] for source_id in job.source_ids[:3])
+    if len(job.source_ids) > 3:
+        names += f" and {len(job.source_ids) - 3} more"
+    return names
+
+
+def indexing_jobs(
+    ingestion_queue: "IngestionQueue", collection: "Collection"
+) -> List["IngestionJob"]:
+    st.header("Indexing Jobs")
+    jobs = ingestion_queue.jobs(collection.name, limit=5)
+    for job in jobs:
+        names = _job_names(job)
+        if job.status == "failed":
+            st.error(f"Indexing failed for {names}: {job.error}")
+        elif job.finished:
+            added = job.result.get("added", {})
+            if added or not job.result.get("removed"):
+                st.success(
+                    f"Indexed {sum(added.values())} chunks from {len(added)} of "
+                    f"{len(job.source_ids)} sources ({names}), "
+                    f"{len(job.result.get('unchanged', []))} already up to date"
+                )
+            if removed := job.result.get("removed"):
+                st.success(f"Removed {len(removed)} sources from the index ({names})")
+            if saved := job.result.get("dedup", {}).get("embeddings_saved"):
+                st.info(
+                    f"Skipped {saved} duplicate chunks, saving "
+                    f"{job.result['dedup']['index_bytes_saved'] / 1024:.1f} KiB "
+                    "of index"
+                )
+            if job.result.get("empty"):
+                st.warning(
+                    f"No valid documents found in {len(job.result['empty'])} sources."
+                )
+        else:
+            st.progress(
+                job.progress,
+                text=f"{job.stage or job.status}: {names} ({job.sources_parsed}/"
+                f"{len(job.source_ids)} parsed, {job.chunks_embedded}/"
+                f"{job.chunks_total} chunks embedded)",
+            )
+    if not jobs:
+        st.info("No indexing jobs yet.")
+    return jobs
+
+
+def refresh_while_running(jobs: List["IngestionJob"]):
+    if any(not job.finished for job in jobs):
+        # Jobs run on background workers; rerunning only refreshes their progress
+        time.sleep(settings.INGEST_POLL_INTERVAL)
+        st.rerun()
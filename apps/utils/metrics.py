@@ -0,0 +1,225 @@
+# app/utils/metrics.py
+
+import bisect
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from utils.logger import logger
+
+# Seconds; spans range from sub-millisecond index lookups to multi-second LLM calls
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+METRIC_PREFIX = "rag"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Span:
+    def __init__(self, name: str):
+        self.name = name
+        self.elapsed = 0.0
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.elapsed * 1000
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = settings.METRICS_ENABLED):
+        self.enabled = enabled
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._profiler_lock = threading.Lock()
+        self.profile_stages = {
+            stage.strip()
+            for stage in settings.PROFILE_STAGES.split(",")
+            if stage.strip()
+        }
+        self._exporter: Optional[threading.Thread] = None
+
+    def observe(self, name: str, seconds: float, stage: str = ""):
+        if not self.enabled:
+            return
+        key = (name, stage)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, stage: str = "", amount: float = 1.0):
+        if not self.enabled:
+            return
+        key = (name, stage)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[Span]:
+        span = Span(stage)
+        profiler = self._start_profiler(stage)
+        start_time = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.elapsed = time.perf_counter() - start_time
+            if profiler is not None:
+                self._stop_profiler(profiler, stage)
+            self.observe("stage_duration_seconds", span.elapsed, stage)
+            logger.debug(f"⏱️ stage={stage} duration_ms={span.elapsed_ms:.2f}")
+
+    def _start_profiler(self, stage: str) -> Optional[cProfile.Profile]:
+        if not (self.profile_stages & {stage, "all"}):
+            return None
+        # Since Python 3.12 cProfile allows one active profiler per process, so
+        # concurrent and nested spans are skipped while another one profiles
+        if not self._profiler_lock.acquire(blocking=False):
+            logger.debug(f"Skipping profile of {stage}: another profile is running")
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            self._profiler_lock.release()
+            logger.warning(f"Skipping profile of {stage}: {e}")
+            return None
+        return profiler
+
+    def _stop_profiler(self, profiler: cProfile.Profile, stage: str):
+        try:
+            profiler.disable()
+        finally:
+            self._profiler_lock.release()
+        path = os.path.join(
+            settings.PROFILE_DIR,
+            f"{stage}-{time.strftime('%Y%m%d-%H%M%S')}-{threading.get_ident()}.prof",
+        )
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Could not write profile of {stage} to {path}: {e}")
+            return
+        logger.info(f"🔬 Profile of {stage} written to {path}")
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                f"{name}{{{stage}}}" if stage else name: {
+                    "count": histogram.count,
+                    "mean_ms": histogram.sum / histogram.count * 1000,
+                    "p50_le_ms": histogram.quantile(0.5) * 1000,
+                    "p99_le_ms": histogram.quantile(0.99) * 1000,
+                }
+                for (name, stage), histogram in sorted(self.histograms.items())
+                if histogram.count
+            }
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        declared = set()
+        for (name, stage), histogram in histograms:
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            labels = f'stage="{stage}",' if stage else ""
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels}le="+Inf"}} {histogram.count}')
+            suffix = f"{{{labels.rstrip(',')}}}" if stage else ""
+            lines.append(f"{metric}_sum{suffix} {histogram.sum}")
+            lines.append(f"{metric}_count{suffix} {histogram.count}")
+
+        for (name, stage), value in counters:
+            metric = f"{METRIC_PREFIX}_{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            suffix = f'{{stage="{stage}"}}' if stage else ""
+            lines.append(f"{metric}{suffix} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str):
+        # Written atomically so a textfile collector never reads a partial file
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def start_file_export(
+        self,
+        path: str = settings.METRICS_EXPORT_PATH,
+        interval: float = settings.METRICS_EXPORT_INTERVAL,
+    ):
+        if not path or self._exporter is not None:
+            return
+
+        def export():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_file(path)
+                except OSError as e:
+                    logger.error(f"Error writing metrics to {path}: {e}")
+
+        logger.info(f"📈 Exporting metrics to {path} every {interval:.0f}s")
+        self._exporter = threading.Thread(
+            target=export, name="metrics-export", daemon=True
+        )
+        self._exporter.start()
+
+
+metrics = MetricsRegistry()
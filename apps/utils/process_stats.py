@@ -0,0 +1,20 @@
+# app/utils/process_stats.py
+
+import os
+import resource
+
+
+def get_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the closest portable figure
+        return get_peak_rss_mb()
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
@@ -0,0 +1,24 @@
+# app/utils/thread_tokenizer.py
+
+import copy
+import threading
+
+
+class ThreadLocalTokenizer:
+    # Fast tokenizers keep padding and truncation as mutable state on the
+    # shared Rust object, and every call resets it to its own settings. One
+    # instance used from two threads (the query batcher encoding with padding
+    # while a request thread counts tokens unpadded) intermittently fails
+    # with "Unable to create tensor", so each thread gets a private copy.
+    def __init__(self, tokenizer):
+        self._template = copy.deepcopy(tokenizer)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self):
+        tokenizer = getattr(self._local, "tokenizer", None)
+        if tokenizer is None:
+            with self._lock:
+                tokenizer = copy.deepcopy(self._template)
+            self._local.tokenizer = tokenizer
+        return tokenizer
@@ -0,0 +1,171 @@
+# benchmarks/chunk_store.py
+#
+# RSS of the chunk texts and metadata in the previous layout (a dict of
+# LangChain Documents plus a dict of metadata dicts with text snippets)
+# against the columnar ChunkStore, both in memory and memory-mapped after a
+# save, plus the latency of materializing top-k chunks. Also compares the
+# size and recall@k of fp32, fp16 and int8 flat indexes on the same vectors.
+# Each layout is measured in its own process so RSS figures are comparable.
+#
+#   python benchmarks/chunk_store.py --chunks 50000 --output bench_results/chunk_store.json
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from common import Timer, synthetic_text, write_results
+
+LAYOUTS = ("dicts", "chunk_store", "chunk_store_mmap")
+
+
+def iter_chunks(num_chunks: int, words: int, seed: int):
+    rng = random.Random(seed)
+    for chunk_id in range(num_chunks):
+        source = f"doc_{chunk_id // 20:05d}.pdf"
+        yield chunk_id, synthetic_text(rng, words), {
+            "source_file": source,
+            "page": chunk_id % 20,
+            "source_id": f"file:{source}",
+            "chunk_index": chunk_id % 20,
+            "chunk_key": f"file:{source}#p{chunk_id % 20}#c{chunk_id % 20}",
+        }
+
+
+def run_child(args):
+    from langchain_core.documents import Document
+    from services.chunk_store import ChunkStore
+    from utils.process_stats import get_rss_mb
+
+    paths = [os.path.join(args.store_dir, name) for name in ("t.bin", "m.bin", "o.npz")]
+    gc.collect()
+    rss_before = get_rss_mb()
+    with Timer() as build:
+        if args.child == "dicts":
+            documents, metadata = {}, {}
+            for chunk_id, text, meta in iter_chunks(args.chunks, args.words, args.seed):
+                documents[chunk_id] = Document(page_content=text, metadata=meta)
+                metadata[chunk_id] = {
+                    "source": meta["source_file"],
+                    "text_snippet": text[:200] + "...",
+                    "chunk_key": meta["chunk_key"],
+                }
+            get = documents.get
+        elif args.child == "chunk_store":
+            store = ChunkStore()
+            for chunk_id, text, meta in iter_chunks(args.chunks, args.words, args.seed):
+                store.add(chunk_id, text, meta)
+            store.write(*paths)
+            get = store.get
+        else:
+            store = ChunkStore.read(*paths, use_mmap=True)
+            get = store.get
+    gc.collect()
+    rss_built = get_rss_mb()
+
+    rng = random.Random(args.seed)
+    with Timer() as lookups:
+        for _ in range(args.lookups):
+            for _ in range(args.top_k):
+                get(rng.randrange(args.chunks))
+    print(
+        json.dumps(
+            {
+                "rss_mb": rss_built - rss_before,
+                "load_seconds": build.elapsed,
+                "top_k_lookup_ms": lookups.elapsed * 1000 / args.lookups,
+                "rss_after_lookups_mb": get_rss_mb() - rss_before,
+            }
+        )
+    )
+
+
+def measure_layout(layout: str, args, store_dir: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", layout, "--store-dir", store_dir]
+        + [f"--chunks={args.chunks}", f"--words={args.words}", f"--seed={args.seed}"]
+        + [f"--lookups={args.lookups}", f"--top-k={args.top_k}"],
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure_encodings(num_vectors: int, dim: int, k: int) -> dict:
+    import faiss
+    from services.index_factory import VECTOR_ENCODINGS, IndexFactory
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((64, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 64, num_vectors)] + rng.standard_normal(
+        (num_vectors, dim)
+    ).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(num_vectors, 200, replace=False)] + 0.05
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    ids = np.arange(num_vectors, dtype=np.int64)
+
+    results, truth = {}, None
+    for encoding in VECTOR_ENCODINGS:
+        index = IndexFactory(index_type="flat", vector_encoding=encoding).build(
+            vectors, ids
+        )
+        with Timer() as timer:
+            _, found = index.search(queries, k)
+        if truth is None:
+            truth = found
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(truth, found)])
+        results[encoding] = {
+            "index_mb": len(faiss.serialize_index(index)) / (1024 * 1024),
+            "search_ms": timer.elapsed * 1000 / len(queries),
+            f"recall@{k}": float(recall),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=150)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=9)
+    parser.add_argument("--output", default="bench_results/chunk_store.json")
+    parser.add_argument("--child", choices=LAYOUTS, help=argparse.SUPPRESS)
+    parser.add_argument("--store-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        # chunk_store writes the files that chunk_store_mmap then maps
+        layouts = {
+            layout: measure_layout(layout, args, store_dir) for layout in LAYOUTS
+        }
+        on_disk = sum(
+            os.path.getsize(os.path.join(store_dir, name))
+            for name in os.listdir(store_dir)
+        )
+    results = {
+        "chunks": args.chunks,
+        "words_per_chunk": args.words,
+        "on_disk_mb": on_disk / (1024 * 1024),
+        "layouts": layouts,
+        "vector_encodings": measure_encodings(args.vectors, args.dim, 10),
+    }
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/chunking.py
+#
+# Compares retrieval recall and prompt size with whole-page indexing
+# (CHUNK_SPLITTER=none) against token-aware chunking. Each synthetic page hides
+# one fact at a random position; a query hits if a retrieved chunk contains it.
+#
+#   python benchmarks/chunking.py --pages 200 --output bench_results/chunking.json
+
+import argparse
+import random
+
+from common import Timer, synthetic_text, write_results
+from langchain_core.documents import Document
+from services.vector_db_manager import VectorDBManager
+
+DEVICES = ["router", "printer", "gateway", "controller", "sensor", "pump"]
+
+
+def build_corpus(num_pages: int, words_per_page: int, seed: int):
+    rng = random.Random(seed)
+    documents, queries = [], []
+    for i in range(num_pages):
+        device = f"{rng.choice(DEVICES)} model {i}"
+        code = f"RC-{rng.randint(100000, 999999)}"
+        fact = f"The factory reset code for the {device} is {code}."
+        words = synthetic_text(rng, words_per_page).split()
+        position = rng.randint(0, len(words))
+        text = " ".join(words[:position] + [fact] + words[position:])
+        documents.append(Document(page_content=text, metadata={"page": 0}))
+        queries.append((f"What is the factory reset code for the {device}?", code))
+    return documents, queries
+
+
+def evaluate(splitter: str, documents, queries, top_k: int) -> dict:
+    vector_db = VectorDBManager(chunk_splitter=splitter)
+    tokenizer = vector_db.embedding_engine.tokenizer
+
+    with Timer() as build_timer:
+        for i, doc in enumerate(documents):
+            vector_db.add_source(f"file:page_{i}.txt", [doc], str(i))
+
+    hits, prompt_tokens = 0, []
+    for query, answer in queries:
+        results = vector_db.similarity_search_with_score(query, k=top_k)
+        context = "\n\n".join(doc.page_content for doc, _ in results)
+        hits += any(answer in doc.page_content for doc, _ in results)
+        prompt_tokens.append(len(tokenizer.encode(context)))
+
+    return {
+        "splitter": splitter,
+        "chunks": vector_db.index.ntotal,
+        "index_seconds": build_timer.elapsed,
+        f"recall@{top_k}": hits / len(queries),
+        "mean_context_tokens": sum(prompt_tokens) / len(prompt_tokens),
+        "max_context_tokens": max(prompt_tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--words-per-page", type=int, default=600)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="bench_results/chunking.json")
+    args = parser.parse_args()
+
+    documents, queries = build_corpus(args.pages, args.words_per_page, args.seed)
+    results = {
+        "pages": args.pages,
+        "words_per_page": args.words_per_page,
+        "before": evaluate("none", documents, queries, args.top_k),
+        "after": evaluate("recursive", documents, queries, args.top_k),
+    }
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
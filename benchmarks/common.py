@@ -0,0 +1,79 @@
+# benchmarks/common.py
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS_DIR = os.path.join(ROOT_DIR, "apps")
+sys.path.insert(0, APPS_DIR)
+
+# Settings requires these; benchmarks never talk to Gemini or LangSmith
+for key in ("GOOGLE_API_KEY", "LANGSMITH_ENDPOINT", "LANGSMITH_API_KEY"):
+    os.environ.setdefault(key, "")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+os.environ.setdefault("LANGSMITH_PROJECT", "benchmarks")
+
+VOCABULARY = (
+    "install configure restart network firmware battery display sensor module "
+    "voltage warranty bracket cable adapter screen printer router gateway error "
+    "code manual service update reset password account license backup restore "
+    "timeout connection driver controller pressure valve pump filter motor"
+).split()
+
+
+def synthetic_text(rng: random.Random, num_words: int) -> str:
+    words = []
+    for i in range(num_words):
+        if i % 40 == 0:
+            words.append(f"E-{rng.randint(1000, 9999)}")
+        words.append(rng.choice(VOCABULARY))
+    return " ".join(words)
+
+
+def write_synthetic_corpus(
+    folder: str, num_files: int, words_per_file: int = 800, seed: int = 42
+) -> List[str]:
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(num_files):
+        path = os.path.join(folder, f"doc_{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_text(rng, words_per_file))
+        paths.append(path)
+    return paths
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(values: List[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def write_results(path: str, results: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,94 @@
+# benchmarks/compare.py
+#
+# Compares two benchmark result files (e.g. suite.json from run_all.py on the
+# base branch and on a PR) metric by metric. Latencies, durations and memory
+# should not grow; throughputs, recall and MRR should not shrink. Exits with
+# status 1 when any metric regresses by more than the tolerance.
+#
+#   python benchmarks/compare.py base.json head.json --tolerance 0.1
+
+import argparse
+import json
+import sys
+from typing import Dict, Optional
+
+LOWER_IS_BETTER = ("_ms", "_seconds", "_mb")
+HIGHER_IS_BETTER = ("per_second", "qps", "recall", "mrr", "hit_rate")
+# Durations of the run itself rather than of the code under test
+IGNORED = ("wall_seconds", "started_at", "uptime_seconds")
+
+
+def flatten(results, prefix: str = "") -> Dict[str, float]:
+    metrics = {}
+    if isinstance(results, dict):
+        items = results.items()
+    elif isinstance(results, list):
+        # Lists of per-level results are keyed by their position
+        items = ((str(i), value) for i, value in enumerate(results))
+    else:
+        items = ()
+    for key, value in items:
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            metrics[path] = float(value)
+        else:
+            metrics.update(flatten(value, path))
+    return metrics
+
+
+def direction(path: str) -> Optional[int]:
+    name = path.rsplit(".", 1)[-1].lower()
+    if name in IGNORED:
+        return None
+    if any(marker in name for marker in HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(base: dict, head: dict, tolerance: float):
+    base_metrics, head_metrics = flatten(base), flatten(head)
+    rows, regressions = [], 0
+    for path in sorted(base_metrics.keys() & head_metrics.keys()):
+        better = direction(path)
+        if better is None:
+            continue
+        before, after = base_metrics[path], head_metrics[path]
+        change = (after - before) / abs(before) if before else 0.0
+        regressed = change * better < -tolerance
+        regressions += regressed
+        rows.append((path, before, after, change, regressed))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--all", action="store_true", help="Show unchanged metrics")
+    args = parser.parse_args()
+
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, "r", encoding="utf-8") as f:
+        head = json.load(f)
+
+    rows, regressions = compare(base, head, args.tolerance)
+    for path, before, after, change, regressed in rows:
+        if not args.all and abs(change) <= args.tolerance:
+            continue
+        marker = "REGRESSION" if regressed else "improved" if change else ""
+        print(f"{path:70s} {before:12.4f} -> {after:12.4f} {change:+8.1%} {marker}")
+    print(
+        f"{len(rows)} metrics compared, {regressions} regressed beyond "
+        f"{args.tolerance:.0%}"
+    )
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/dedup.py
+#
+# Ingestion with and without near-duplicate detection on a synthetic crawl:
+# every page carries the same navigation and footer boilerplate, and a share
+# of the pages are republished copies with a word or two changed. Reports the
+# embeddings computed, vectors and index size, ingest time and recall@k of
+# each page's error-code query (a hit through a shared chunk counts).
+#
+#   python benchmarks/dedup.py --pages 300 --output bench_results/dedup.json
+
+import argparse
+import random
+
+import faiss
+from common import Timer, VOCABULARY, synthetic_text, write_results
+from langchain_core.documents import Document
+from services.vector_db_manager import VectorDBManager
+
+
+def boilerplate(rng: random.Random, paragraphs: int, words: int) -> str:
+    # Codes would keep the copies from ever being merged, so prose only
+    return "\n\n".join(
+        " ".join(rng.choice(VOCABULARY) for _ in range(words))
+        for _ in range(paragraphs)
+    )
+
+
+def build_pages(args):
+    rng = random.Random(args.seed)
+    header = boilerplate(rng, 1, args.words_per_section)
+    footer = boilerplate(rng, 2, args.words_per_section)
+    pages, queries = {}, []
+    for i in range(args.pages):
+        code = f"E-{rng.randint(10000, 99999)}"
+        body = f"Error {code} means the unit needs service. " + synthetic_text(
+            rng, args.words_per_section * 2
+        )
+        pages[f"url:page_{i}"] = "\n\n".join([header, body, footer])
+        queries.append((f"What does error {code} mean?", f"url:page_{i}"))
+
+    # Mirrors of earlier pages with a single word swapped in each paragraph
+    for i in range(int(args.pages * args.mirror_ratio)):
+        paragraphs = pages[f"url:page_{i}"].split("\n\n")
+        for p, paragraph in enumerate(paragraphs):
+            words = paragraph.split()
+            position = rng.randrange(len(words))
+            if not any(c.isdigit() for c in words[position]):
+                words[position] = rng.choice(VOCABULARY)
+            paragraphs[p] = " ".join(words)
+        pages[f"url:mirror_{i}"] = "\n\n".join(paragraphs)
+    return pages, queries
+
+
+def run(pages, queries, dedup: bool, top_k: int) -> dict:
+    vector_db = VectorDBManager()
+    if not dedup:
+        vector_db.dedup_index = None
+    batch = {
+        source_id: ([Document(page_content=text)], source_id)
+        for source_id, text in pages.items()
+    }
+    with Timer() as timer:
+        vector_db.add_sources(batch)
+
+    hits = 0
+    for query, target in queries:
+        result = vector_db.retrieve(query, top_k=top_k, min_similarity=-1.0)
+        hits += any(
+            target in doc.metadata.get("sources", [doc.metadata["source_id"]])
+            for doc in result.documents
+        )
+    stats = vector_db.dedup_stats
+    return {
+        "ingest_seconds": timer.elapsed,
+        "chunks": stats["chunks"] if dedup else len(vector_db.chunks),
+        "vectors": vector_db.index.ntotal,
+        "exact_duplicates": stats["exact_duplicates"],
+        "near_duplicates": stats["near_duplicates"],
+        "index_mb": len(faiss.serialize_index(vector_db.index)) / 1024**2,
+        f"recall@{top_k}": hits / len(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--words-per-section", type=int, default=150)
+    parser.add_argument("--mirror-ratio", type=float, default=0.3)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--output", default="bench_results/dedup.json")
+    args = parser.parse_args()
+
+    pages, queries = build_pages(args)
+    without = run(pages, queries, dedup=False, top_k=args.top_k)
+    with_dedup = run(pages, queries, dedup=True, top_k=args.top_k)
+    results = {
+        "pages": len(pages),
+        "without_dedup": without,
+        "with_dedup": with_dedup,
+        "embeddings_saved_ratio": 1 - with_dedup["vectors"] / without["vectors"],
+    }
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
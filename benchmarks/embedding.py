@@ -0,0 +1,50 @@
+# benchmarks/embedding.py
+#
+# Embedding throughput (chunks/s) per backend and batch size on synthetic
+# chunk-sized texts.
+#
+#   python benchmarks/embedding.py --backends torch,torch-int8 --batch-sizes 16,64
+
+import argparse
+import random
+
+from common import Timer, synthetic_text, write_results
+from services.embedding_engine import EmbeddingEngine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--backends", default="torch,torch-int8")
+    parser.add_argument("--batch-sizes", default="16,32,64,128")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--output", default="bench_results/embedding.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Mixed lengths, as produced by the chunker at the end of each page
+    texts = [synthetic_text(rng, rng.randint(20, 160)) for _ in range(args.texts)]
+
+    runs = []
+    for backend in args.backends.split(","):
+        engine = EmbeddingEngine(backend=backend, num_threads=args.threads)
+        engine.encode(texts[:32])
+        for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+            engine.batch_size = batch_size
+            with Timer() as timer:
+                engine.encode(texts)
+            runs.append(
+                {
+                    "backend": backend,
+                    "batch_size": batch_size,
+                    "seconds": timer.elapsed,
+                    "chunks_per_second": len(texts) / timer.elapsed,
+                }
+            )
+
+    write_results(args.output, {"texts": args.texts, "runs": runs})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/hybrid.py
+#
+# Offline eval of dense, BM25 and hybrid (reciprocal-rank fusion) retrieval.
+# Each synthetic chunk-sized document holds one troubleshooting fact. Half of
+# the queries quote its exact error code (what dense retrieval tends to miss),
+# half describe the symptom in words. Reports recall@k, MRR and latency.
+#
+#   python benchmarks/hybrid.py --documents 300 --output bench_results/hybrid.json
+
+import argparse
+import random
+import statistics
+
+from common import Timer, synthetic_text, write_results
+from langchain_core.documents import Document
+from services.vector_db_manager import VectorDBManager
+
+DEVICES = ["router", "printer", "gateway", "controller", "sensor", "pump", "valve"]
+SYMPTOMS = [
+    ("overheats after a few minutes", "clean the fan filter and check airflow"),
+    ("keeps dropping the connection", "update the firmware and replace the cable"),
+    ("shows a blank display", "reseat the display connector"),
+    ("loses pressure overnight", "replace the valve seal"),
+    ("rejects the stored password", "reset the account from the service menu"),
+]
+
+
+def build_eval_set(num_documents: int, words: int, seed: int):
+    rng = random.Random(seed)
+    documents, facts = [], []
+    for i in range(num_documents):
+        device = rng.choice(DEVICES)
+        symptom, fix = rng.choice(SYMPTOMS)
+        code = f"E-{rng.randint(10000, 99999)}"
+        fact = f"Error {code}: the {device} {symptom}. To fix it, {fix}."
+        filler = synthetic_text(rng, words).split()
+        position = rng.randint(0, len(filler))
+        text = " ".join(filler[:position] + [fact] + filler[position:])
+        documents.append(Document(page_content=text))
+        facts.append((device, symptom, code))
+
+    # A descriptive query is answered by any document with the same fault
+    queries = []
+    for i, (device, symptom, code) in enumerate(facts):
+        if i % 2 == 0:
+            queries.append(("code", f"What does error {code} mean?", {i}))
+        else:
+            answers = {
+                j for j, fact in enumerate(facts) if fact[:2] == (device, symptom)
+            }
+            queries.append(("descriptive", f"Why does my {device} {symptom}?", answers))
+    return documents, queries
+
+
+def evaluate(vector_db, queries, mode: str, top_k: int) -> dict:
+    by_kind = {}
+    latencies = []
+    for kind, query, answers in queries:
+        with Timer() as timer:
+            result = vector_db.retrieve(
+                query, top_k=top_k, min_similarity=-1.0, drop_off=2.0, mode=mode
+            )
+        latencies.append(timer.elapsed * 1000)
+        targets = {f"file:doc_{answer}.txt" for answer in answers}
+        found = [doc.metadata["source_id"] for doc in result.documents]
+        rank = next(
+            (i + 1 for i, source_id in enumerate(found) if source_id in targets), None
+        )
+        stats = by_kind.setdefault(kind, {"hits": 0, "reciprocal_ranks": []})
+        stats["hits"] += rank is not None
+        stats["reciprocal_ranks"].append(1 / rank if rank else 0.0)
+
+    latencies.sort()
+    report = {
+        kind: {
+            f"recall@{top_k}": stats["hits"] / len(stats["reciprocal_ranks"]),
+            "mrr": statistics.fmean(stats["reciprocal_ranks"]),
+        }
+        for kind, stats in by_kind.items()
+    }
+    report["p50_ms"] = latencies[len(latencies) // 2]
+    report["p99_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=300)
+    parser.add_argument("--words-per-document", type=int, default=120)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", default="bench_results/hybrid.json")
+    args = parser.parse_args()
+
+    documents, queries = build_eval_set(
+        args.documents, args.words_per_document, args.seed
+    )
+    vector_db = VectorDBManager()
+    vector_db.add_sources(
+        {f"file:doc_{i}.txt": ([doc], str(i)) for i, doc in enumerate(documents)}
+    )
+    # Caches would hide the latency differences between modes
+    vector_db.results_cache.max_size = 0
+
+    results = {
+        "documents": args.documents,
+        "chunks": vector_db.index.ntotal,
+        "queries": len(queries),
+        **{
+            mode: evaluate(vector_db, queries, mode, args.top_k)
+            for mode in ("dense", "lexical", "hybrid")
+        },
+    }
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/index.py
+#
+# recall@k and per-query latency of each index type against the exact flat
+# baseline, on clustered synthetic vectors with MiniLM's dimension.
+#
+#   python benchmarks/index.py --vectors 200000 --output bench_results/index.json
+
+import argparse
+
+import faiss
+import numpy as np
+from common import Timer, write_results
+from services.index_factory import IndexFactory
+
+
+def clustered_vectors(num_vectors: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, num_vectors // 500), dim))
+    labels = rng.integers(0, len(centers), num_vectors)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(num_vectors, dim))
+    # Match the app, which searches unit vectors by inner product
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        with Timer() as timer:
+            _, indices = index.search(query[None, :], k)
+        latencies.append(timer.elapsed * 1000)
+        found[i] = indices[0]
+    return {
+        f"recall@{k}": recall_at_k(found, truth),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="4,16,64")
+    parser.add_argument("--ef-search", default="32,64,128")
+    parser.add_argument("--output", default="bench_results/index.json")
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.vectors, args.dim, seed=1)
+    queries = clustered_vectors(args.queries, args.dim, seed=2)
+    ids = np.arange(args.vectors, dtype=np.int64)
+    faiss.omp_set_num_threads(1)
+
+    factory = IndexFactory(index_type="flat")
+    flat = factory.build(vectors, ids, "flat")
+    _, truth = flat.search(queries, args.k)
+
+    runs = [
+        {
+            "index_type": "flat",
+            "build_seconds": 0.0,
+            **measure(flat, queries, truth, args.k),
+        }
+    ]
+    sweeps = {
+        "ivf_flat": ("nprobe", args.nprobe),
+        "ivf_pq": ("nprobe", args.nprobe),
+        "hnsw": ("ef_search", args.ef_search),
+    }
+    for index_type, (param, values) in sweeps.items():
+        factory = IndexFactory(index_type=index_type)
+        with Timer() as build_timer:
+            index = factory.build(vectors, ids, index_type)
+        for value in (int(v) for v in values.split(",")):
+            setattr(factory, param, value)
+            factory.configure_search(index)
+            runs.append(
+                {
+                    "index_type": index_type,
+                    param: value,
+                    "build_seconds": build_timer.elapsed,
+                    **measure(index, queries, truth, args.k),
+                }
+            )
+
+    write_results(args.output, {"vectors": args.vectors, "dim": args.dim, "runs": runs})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/load_test.py
+#
+# Closed-loop load test of VectorDBManager.similarity_search_with_score: each
+# of N client threads issues unique queries back to back, with the query
+# micro-batcher disabled (max batch 1) and enabled. Reports p50/p99 latency
+# and QPS per concurrency level.
+#
+#   python benchmarks/load_test.py --concurrency 1,4,16,64 --output bench_results/load_test.json
+
+import argparse
+import random
+import threading
+import time
+
+from common import Timer, percentile, synthetic_text, write_results
+from langchain_core.documents import Document
+from services.vector_db_manager import VectorDBManager
+
+
+def run_level(vector_db, concurrency: int, requests_per_client: int, seed: int):
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def client(client_id: int):
+        rng = random.Random(seed * 1000 + client_id)
+        local = []
+        for _ in range(requests_per_client):
+            # Unique text per request so the query caches never short-circuit
+            query = f"{synthetic_text(rng, 12)} {rng.random()}"
+            start = time.perf_counter()
+            vector_db.similarity_search_with_score(query, k=4)
+            local.append((time.perf_counter() - start) * 1000)
+        with latencies_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    batches_before = vector_db.query_batcher.batches
+    items_before = vector_db.query_batcher.items
+    with Timer() as timer:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    latencies.sort()
+    batches = vector_db.query_batcher.batches - batches_before
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "qps": len(latencies) / timer.elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_batch_size": (vector_db.query_batcher.items - items_before) / batches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--words-per-document", type=int, default=300)
+    parser.add_argument("--concurrency", default="1,4,16,64")
+    parser.add_argument("--requests-per-client", type=int, default=50)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--output", default="bench_results/load_test.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vector_db = VectorDBManager()
+    vector_db.add_sources(
+        {
+            f"file:doc_{i}.txt": (
+                [Document(page_content=synthetic_text(rng, args.words_per_document))],
+                str(i),
+            )
+            for i in range(args.documents)
+        }
+    )
+
+    # Warm up kernels and the batcher thread so the first mode is not penalized
+    run_level(vector_db, 4, 10, seed=0)
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    modes = {
+        "unbatched": (1, 0.0),
+        "batched": (args.max_batch_size, args.max_wait_ms),
+    }
+    results = {
+        "documents": args.documents,
+        "vectors": vector_db.index.ntotal,
+        "max_batch_size": args.max_batch_size,
+        "max_wait_ms": args.max_wait_ms,
+    }
+    for mode, (max_batch_size, max_wait_ms) in modes.items():
+        vector_db.query_batcher.max_batch_size = max_batch_size
+        vector_db.query_batcher.max_wait = max_wait_ms / 1000
+        results[mode] = [
+            run_level(vector_db, level, args.requests_per_client, args.seed)
+            for level in levels
+        ]
+
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
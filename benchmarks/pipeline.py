@@ -0,0 +1,218 @@
+# benchmarks/pipeline.py
+#
+# End-to-end ingestion and retrieval benchmark on a synthetic (or existing)
+# corpus: extraction, chunking, embedding throughput, index build, query
+# latency percentiles, RSS per stage and recall@k of the configured index
+# against an exact flat search over the same vectors. Gemini is replaced by a
+# fake chat model, so answer latency covers only the pipeline around the LLM.
+#
+#   python benchmarks/pipeline.py --files 200 --output bench_results/pipeline.json
+#   python benchmarks/pipeline.py --corpus-dir ~/manuals --index-type hnsw
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+
+from common import (
+    VOCABULARY,
+    Timer,
+    summarize,
+    write_results,
+    write_synthetic_corpus,
+)
+
+ANSWER = "Sources:\n- Document: doc_00000.txt\n\nRestart the router, then reset it."
+
+
+def directory_size_mb(path: str) -> float:
+    total = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+    return total / (1024 * 1024)
+
+
+def make_queries(num_queries: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        f"How do I {rng.choice(VOCABULARY)} the {rng.choice(VOCABULARY)} "
+        f"after error E-{rng.randint(1000, 9999)}?"
+        for _ in range(num_queries)
+    ]
+
+
+def measure_recall(vector_db, queries, k: int) -> dict:
+    import faiss
+    import numpy as np
+
+    ids, vectors = vector_db.index_factory.extract_vectors(vector_db.index)
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    query_vectors = vector_db.embedding_engine.encode(queries)
+    _, exact_rows = exact.search(query_vectors, k)
+    _, approx_ids = vector_db.index.search(query_vectors, k)
+
+    overlaps = []
+    for exact_row, approx_row in zip(exact_rows, approx_ids):
+        truth = set(ids[exact_row[exact_row != -1]].tolist())
+        found = set(approx_row[approx_row != -1].tolist())
+        overlaps.append(len(truth & found) / max(1, len(truth)))
+    return {
+        "index_type": vector_db.index_factory.describe(vector_db.index),
+        f"recall@{k}": float(np.mean(overlaps)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--words-per-file", type=int, default=800)
+    parser.add_argument("--corpus-dir", help="Benchmark these files instead")
+    parser.add_argument("--index-type", help="Overrides INDEX_TYPE")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--answers", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--output", default="bench_results/pipeline.json")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    corpus_dir = os.path.abspath(args.corpus_dir) if args.corpus_dir else None
+    if args.index_type:
+        os.environ["INDEX_TYPE"] = args.index_type
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Parse cache, index and URL list all live under the scratch directory
+        os.chdir(workdir)
+        if corpus_dir is None:
+            corpus_dir = os.path.join(workdir, "data", "documents")
+            write_synthetic_corpus(
+                corpus_dir, args.files, args.words_per_file, seed=args.seed
+            )
+
+        from langchain_core.language_models.fake_chat_models import (
+            FakeListChatModel,
+        )
+        from services import registry
+        from services.ai_service import AIService
+        from services.collection_manager import Collection, CollectionManager
+        from services.document_manager import DocumentManager
+        from services.index_store import IndexStore
+        from services.vector_db_manager import VectorDBManager
+        from utils.metrics import metrics
+        from utils.process_stats import get_peak_rss_mb, get_rss_mb
+
+        rss = {"baseline": get_rss_mb()}
+        results = {}
+
+        document_manager = DocumentManager(upload_folder=corpus_dir)
+        with Timer() as hashing:
+            sources = document_manager.list_sources()
+        with Timer() as cold:
+            loaded = document_manager.load_sources(list(sources))
+        with Timer() as warm:
+            document_manager.load_sources(list(sources))
+        pages = sum(len(documents) for documents in loaded.values())
+        results["files"] = len(sources)
+        results["pages"] = pages
+        results["extraction"] = {
+            "hashing_seconds": hashing.elapsed,
+            "cold_seconds": cold.elapsed,
+            "cached_seconds": warm.elapsed,
+            "files_per_second": len(sources) / cold.elapsed,
+        }
+
+        vector_db = VectorDBManager(IndexStore(os.path.join(workdir, "index")))
+        rss["model_loaded"] = get_rss_mb()
+        with Timer() as chunking:
+            chunks = [
+                chunk
+                for source_id, documents in loaded.items()
+                for chunk in vector_db.chunker.split_documents(documents, source_id)
+            ]
+        results["chunks"] = len(chunks)
+        results["chunking"] = {
+            "seconds": chunking.elapsed,
+            "chunks_per_second": len(chunks) / chunking.elapsed,
+            "mean_chunk_chars": statistics.fmean(len(c.page_content) for c in chunks),
+        }
+
+        engine = vector_db.embedding_engine
+        embed_before = engine.total_seconds
+        with Timer() as ingest:
+            vector_db.add_sources(
+                {
+                    source_id: (documents, sources[source_id])
+                    for source_id, documents in loaded.items()
+                }
+            )
+        embed_seconds = engine.total_seconds - embed_before
+        with Timer() as save:
+            vector_db.save()
+        rss["indexed"] = get_rss_mb()
+        results["embedding"] = {
+            "seconds": embed_seconds,
+            "chunks_per_second": len(chunks) / embed_seconds,
+        }
+        ids, vectors = vector_db.index_factory.extract_vectors(vector_db.index)
+        with Timer() as build:
+            vector_db.index_factory.build(vectors, ids)
+        results["index"] = {
+            "ingest_seconds": ingest.elapsed,
+            "build_seconds": build.elapsed,
+            "save_seconds": save.elapsed,
+            "vectors": vector_db.index.ntotal,
+            "on_disk_mb": directory_size_mb(os.path.join(workdir, "index")),
+        }
+
+        # Every query must reach the encoder and the index
+        vector_db.results_cache.max_size = 0
+        vector_db.embedding_cache.clear()
+        queries = make_queries(args.queries, args.seed)
+        latencies, stage_timings = [], {}
+        for query in queries:
+            with Timer() as timer:
+                result = vector_db.retrieve(query)
+            latencies.append(timer.elapsed * 1000)
+            for stage, elapsed in result.timings_ms.items():
+                stage_timings.setdefault(stage, []).append(elapsed)
+        results["query"] = {
+            "queries": len(queries),
+            "retrieve": summarize(latencies),
+            "stages": {
+                stage: summarize(values) for stage, values in stage_timings.items()
+            },
+        }
+        results["recall"] = measure_recall(vector_db, queries, args.top_k)
+
+        # The benchmark index becomes the default collection instead of re-ingesting
+        collections = CollectionManager()
+        collections._collections[collections.default_collection] = Collection(
+            collections.default_collection, document_manager, vector_db
+        )
+        registry._collections = collections
+        service = AIService()
+        fake_llm = FakeListChatModel(responses=[ANSWER])
+        service.chain = service.prompt | fake_llm
+        service.summary_chain = service.summary_chain.first | fake_llm
+        answer_latencies = []
+        for query in queries[: args.answers]:
+            with Timer() as timer:
+                service.chat(query, service.new_session())
+            answer_latencies.append(timer.elapsed * 1000)
+        results["answer"] = summarize(answer_latencies)
+
+        results["stages"] = metrics.summary()
+        rss["final"] = get_rss_mb()
+        results["memory"] = {
+            **{f"rss_{stage}_mb": value for stage, value in rss.items()},
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+
+    write_results(output, results)
+
+
+if __name__ == "__main__":
+    main()
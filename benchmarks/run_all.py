@@ -0,0 +1,122 @@
+# benchmarks/run_all.py
+#
+# Runs the benchmark suite, each script in its own process, and merges the
+# results into one JSON document tagged with the commit and machine so CI
+# runs can be compared with benchmarks/compare.py. The "quick" preset keeps
+# a CI run to a few minutes on CPU; "full" uses each script's defaults.
+#
+#   python benchmarks/run_all.py --preset quick --output bench_results/suite.json
+#   python benchmarks/run_all.py --only pipeline,index
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT_DIR, Timer, write_results
+
+PRESETS = {
+    "quick": {
+        "pipeline": ["--files", "50", "--queries", "100", "--answers", "10"],
+        "index": ["--vectors", "20000", "--queries", "200"],
+        "embedding": ["--texts", "500", "--backends", "torch", "--batch-sizes", "32"],
+        "chunking": ["--pages", "100"],
+        "hybrid": ["--documents", "200"],
+        "ttft": ["--files", "30", "--queries", "10"],
+        "load_test": ["--documents", "200", "--concurrency", "1,8"],
+        "startup": ["--files", "50"],
+        "chunk_store": ["--chunks", "20000", "--vectors", "20000"],
+        "dedup": ["--pages", "100"],
+    },
+    "full": {
+        name: []
+        for name in (
+            "pipeline",
+            "index",
+            "embedding",
+            "chunking",
+            "hybrid",
+            "ttft",
+            "load_test",
+            "startup",
+            "chunk_store",
+            "dedup",
+        )
+    },
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(name: str, extra_args, workdir: str) -> dict:
+    output = os.path.join(workdir, f"{name}.json")
+    with Timer() as timer:
+        completed = subprocess.run(
+            [sys.executable, os.path.join(ROOT_DIR, "benchmarks", f"{name}.py")]
+            + extra_args
+            + ["--output", output],
+            env={**os.environ, "LOG_LEVEL": "WARNING"},
+            capture_output=True,
+            text=True,
+        )
+    if completed.returncode != 0:
+        print(f"{name} failed:\n{completed.stderr[-2000:]}", file=sys.stderr)
+        return {"error": completed.stderr.strip().splitlines()[-1:]}
+
+    with open(output, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    results["wall_seconds"] = timer.elapsed
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--only", help="Comma-separated benchmark names")
+    parser.add_argument("--output", default="bench_results/suite.json")
+    args = parser.parse_args()
+
+    benchmarks = PRESETS[args.preset]
+    names = args.only.split(",") if args.only else list(benchmarks)
+    unknown = [name for name in names if name not in benchmarks]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results = {
+        "commit": git_commit(),
+        "preset": args.preset,
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            print(f"Running {name}...", file=sys.stderr)
+            results["benchmarks"][name] = run_benchmark(name, benchmarks[name], workdir)
+
+    write_results(args.output, results)
+    if any("error" in result for result in results["benchmarks"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/startup.py
+#
+# Measures startup on a fixed synthetic corpus, once with an empty index
+# directory (cold build) and twice from the persisted index, memory-mapped and
+# read into memory (INDEX_MMAP=false, the baseline before mmap loading): how
+# long the UI imports take before a page can render, when the background
+# warm-up makes AIService ready, time to the first retrieval result, and RSS.
+#
+#   python benchmarks/startup.py --files 200 --output bench_results/startup.json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT_DIR, write_results, write_synthetic_corpus
+
+CHILD = """
+import json, os, sys, time
+sys.path.insert(0, os.path.join(sys.argv[1], "apps"))
+start = time.perf_counter()
+from services.registry import start_ai_service
+from utils.metrics import metrics
+from utils.process_stats import get_rss_mb
+ui_import = time.perf_counter() - start
+service = start_ai_service().result()
+ready = time.perf_counter() - start
+service.retrieve("How do I reset the router after error E-1234?")
+first_query = time.perf_counter() - start
+print(json.dumps({
+    "ui_import_seconds": ui_import,
+    "startup_seconds": ready,
+    "first_query_seconds": first_query,
+    "rss_mb": get_rss_mb(),
+    "vectors": service.vector_db.index.ntotal if service.vector_db.index else 0,
+}))
+"""
+
+
+def run_startup(workdir: str, **env: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, ROOT_DIR],
+        cwd=workdir,
+        env={**os.environ, "LOG_LEVEL": "WARNING", **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--words-per-file", type=int, default=800)
+    parser.add_argument("--output", default="bench_results/startup.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_synthetic_corpus(
+            os.path.join(workdir, "data", "documents"),
+            args.files,
+            args.words_per_file,
+        )
+        results = {
+            "files": args.files,
+            "words_per_file": args.words_per_file,
+            "cold": run_startup(workdir),
+            "warm": run_startup(workdir),
+            "warm_without_mmap": run_startup(workdir, INDEX_MMAP="false"),
+        }
+
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
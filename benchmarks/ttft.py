@@ -0,0 +1,119 @@
+# benchmarks/ttft.py
+#
+# Measures time-to-first-token and total answer time for the blocking
+# AIService.chat path and the async AIService.astream_chat path. Gemini is
+# replaced by a local fake chat model that streams one character per
+# --token-delay seconds, so only the pipeline around the LLM is measured.
+#
+#   python benchmarks/ttft.py --files 100 --queries 20 --output bench_results/ttft.json
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from common import VOCABULARY, summarize, write_results, write_synthetic_corpus
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+ANSWER = "Sources:\n- Document: doc_00000.txt\n\nRestart the router, then reset it."
+
+
+def clear_caches(service):
+    # Both paths see the same queries, so neither may reuse the other's work
+    service.vector_db.embedding_cache.clear()
+    service.vector_db.results_cache.clear()
+
+
+def measure_sync(service, queries):
+    clear_caches(service)
+    ttft, total = [], []
+    for query in queries:
+        start = time.perf_counter()
+        retrieval = service.retrieve(query)
+        for i, _ in enumerate(service.stream_answer(query, retrieval)):
+            if i == 0:
+                ttft.append((time.perf_counter() - start) * 1000)
+        total.append((time.perf_counter() - start) * 1000)
+    return {"ttft": summarize(ttft), "total": summarize(total)}
+
+
+async def measure_async(service, queries):
+    clear_caches(service)
+    ttft, total = [], []
+    for query in queries:
+        start = time.perf_counter()
+        first = None
+        async for _ in service.astream_chat(query):
+            if first is None:
+                first = time.perf_counter()
+                ttft.append((first - start) * 1000)
+        total.append((time.perf_counter() - start) * 1000)
+    return {"ttft": summarize(ttft), "total": summarize(total)}
+
+
+async def measure_cancellation(service, queries):
+    # A second message arrives while the first answer is still streaming
+    tokens = 0
+
+    async def consume_first():
+        nonlocal tokens
+        async for _ in service.astream_chat(queries[0]):
+            tokens += 1
+
+    first = asyncio.create_task(consume_first())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    async for _ in service.astream_chat(queries[1]):
+        break
+    await first
+    return {
+        "first_stream_tokens": tokens,
+        "first_stream_complete": tokens >= len(ANSWER),
+        "second_ttft_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--words-per-file", type=int, default=800)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--output", default="bench_results/ttft.json")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_synthetic_corpus(
+            os.path.join(workdir, "data", "documents"),
+            args.files,
+            args.words_per_file,
+        )
+        os.chdir(workdir)
+        from services.ai_service import AIService
+
+        service = AIService()
+        fake_llm = FakeListChatModel(responses=[ANSWER], sleep=args.token_delay)
+        service.chain = service.prompt | fake_llm
+        service.summary_chain = service.summary_chain.first | fake_llm
+
+        queries = [
+            f"How do I {VOCABULARY[i % len(VOCABULARY)]} the "
+            f"{VOCABULARY[(i * 7) % len(VOCABULARY)]}?"
+            for i in range(args.queries)
+        ]
+        results = {
+            "files": args.files,
+            "queries": args.queries,
+            "token_delay_seconds": args.token_delay,
+            "sync": measure_sync(service, queries),
+            "async": asyncio.run(measure_async(service, queries)),
+            "cancellation": asyncio.run(measure_cancellation(service, queries)),
+        }
+
+    write_results(output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# tests/conftest.py
+
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "apps"))
+
+# Settings requires these; tests never talk to Gemini or LangSmith
+for key in ("GOOGLE_API_KEY", "LANGSMITH_ENDPOINT", "LANGSMITH_API_KEY"):
+    os.environ.setdefault(key, "")
+os.environ.setdefault("LANGSMITH_TRACING", "false")
+os.environ.setdefault("LANGSMITH_PROJECT", "tests")
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def build_tokenizer():
+    # A word-level fast tokenizer built in memory, so no model is downloaded
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    words = sorted(
+        set(
+            "the a an is what how why does do my to of and for with in on at it this "
+            "that warranty pump valve filter error code manual replace reset router "
+            "printer pressure seal firmware device support contact returns service "
+            "install display network battery months every model means overheating "
+            "low help desk claims store official product assistance purchased any "
+            "from our installation shaft torque bolts".split()
+        )
+    )
+    vocab = {"[PAD]": 0, "[UNK]": 1, **{word: i + 2 for i, word in enumerate(words)}}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        model_max_length=1024,
+    )
+
+
+class FakeEmbeddingEngine:
+    # Hashed bag-of-words vectors: texts sharing words are similar, which is
+    # all the index, caches and deduplication need
+    dim = 64
+
+    def __init__(self):
+        self.tokenizer = build_tokenizer()
+        self.config = {"model": "fake-bow", "dim": self.dim}
+        self.calls = 0
+
+    def encode(self, texts, show_progress_bar: bool = False) -> np.ndarray:
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD_PATTERN.findall(text.lower()):
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+@pytest.fixture
+def tokenizer():
+    return build_tokenizer()
+
+
+@pytest.fixture
+def embedding_engine():
+    return FakeEmbeddingEngine()
+
+
+@pytest.fixture
+def vector_db(embedding_engine):
+    from services.vector_db_manager import VectorDBManager
+
+    return VectorDBManager(embedding_engine=embedding_engine)
+
+
+@pytest.fixture
+def collections(tmp_path, monkeypatch, embedding_engine):
+    # Collections and their caches live under a scratch working directory
+    from services.collection_manager import CollectionManager
+
+    monkeypatch.chdir(tmp_path)
+    manager = CollectionManager(collections_dir=str(tmp_path / "collections"))
+    monkeypatch.setattr(manager, "_get_embedding_engine", lambda: embedding_engine)
+    return manager
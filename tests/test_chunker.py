@@ -0,0 +1,32 @@
+# tests/test_chunker.py
+
+import threading
+
+from langchain_core.documents import Document
+from services.chunker import DocumentChunker
+
+
+def test_chunks_fit_the_token_budget(tokenizer):
+    chunker = DocumentChunker(tokenizer, chunk_size=20, chunk_overlap=0)
+    text = " ".join(["pump valve filter seal"] * 30)
+    chunks = chunker.split_documents([Document(page_content=text)], "file:a.txt")
+    assert len(chunks) > 1
+    assert all(len(tokenizer.tokenize(chunk.page_content)) <= 20 for chunk in chunks)
+    assert [chunk.metadata["chunk_key"] for chunk in chunks[:2]] == [
+        "file:a.txt#c0",
+        "file:a.txt#c1",
+    ]
+
+
+def test_chunking_leaves_the_model_tokenizer_alone(tokenizer):
+    # The query batcher truncates and pads with the model's tokenizer, and
+    # every fast tokenizer call resets that state on the shared instance
+    chunker = DocumentChunker(tokenizer, chunk_size=20, chunk_overlap=0)
+    tokenizer.backend_tokenizer.enable_truncation(max_length=128)
+    document = Document(page_content=" ".join(["pump valve"] * 50))
+    thread = threading.Thread(
+        target=chunker.split_documents, args=([document], "file:a.txt")
+    )
+    thread.start()
+    thread.join()
+    assert tokenizer.backend_tokenizer.truncation is not None
@@ -0,0 +1,61 @@
+# tests/test_collection_manager.py
+
+import threading
+
+from langchain_core.documents import Document
+from services.collection_manager import merge_results
+from services.retrieval import RetrievalResult
+
+
+def test_collections_share_the_parsed_document_cache(collections):
+    manuals = collections.create("manuals")
+    faqs = collections.create("faqs")
+    assert manuals.document_manager.document_cache is collections._document_cache
+    assert faqs.document_manager.document_cache is collections._document_cache
+
+
+def test_opening_one_collection_does_not_block_another(collections, monkeypatch):
+    manuals = collections.create("manuals")
+    collections.create("slow")
+    collections._collections.pop("slow")
+
+    opening, release = threading.Event(), threading.Event()
+    open_collection = collections._open
+
+    def slow_open(name):
+        opening.set()
+        release.wait(5)
+        return open_collection(name)
+
+    monkeypatch.setattr(collections, "_open", slow_open)
+    thread = threading.Thread(target=collections.get, args=("slow",))
+    thread.start()
+    try:
+        assert opening.wait(5)
+        loaded = []
+        reader = threading.Thread(
+            target=lambda: loaded.append(collections.get("manuals")), daemon=True
+        )
+        reader.start()
+        reader.join(2)
+        assert loaded == [manuals]
+    finally:
+        release.set()
+        thread.join()
+    assert "slow" in [collection.name for collection in collections.loaded()]
+
+
+def result(version: int, score: float) -> RetrievalResult:
+    return RetrievalResult(
+        query="q",
+        documents=[Document(page_content=f"chunk {score}")],
+        scores=[score],
+        index_version=version,
+    )
+
+
+def test_merged_index_version_tells_shard_states_apart():
+    first = merge_results("q", [result(1, 0.9), result(2, 0.8)])
+    second = merge_results("q", [result(2, 0.9), result(1, 0.8)])
+    assert first.index_version != second.index_version
+    assert first.index_version == (1, 2)
@@ -0,0 +1,65 @@
+# tests/test_context_builder.py
+
+import random
+import threading
+
+from services.context_builder import TokenCounter
+
+
+def test_count_and_truncate(tokenizer):
+    counter = TokenCounter(tokenizer)
+    assert counter.count("") == 0
+    assert counter.count("the pump warranty") == 3
+    assert counter.truncate("the pump warranty is two years", 3) == "the pump warranty"
+
+
+def test_counter_never_shares_the_tokenizer_between_threads(tokenizer):
+    counter = TokenCounter(tokenizer)
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(counter.tokenizer))
+    thread.start()
+    thread.join()
+    assert counter.tokenizer is not tokenizer
+    assert seen[0] is not counter.tokenizer
+
+
+def test_counting_alongside_padded_encoding(tokenizer):
+    # The embedding model pads and truncates with the same tokenizer on the
+    # query batcher thread while request threads count tokens
+    counter = TokenCounter(tokenizer)
+    rng = random.Random(3)
+    texts = [" ".join(["pump"] * rng.randint(1, 300)) for _ in range(32)]
+    errors = []
+    stop = threading.Event()
+
+    def encode():
+        while not stop.is_set():
+            try:
+                tokenizer(
+                    rng.sample(texts, 8),
+                    padding=True,
+                    truncation=True,
+                    max_length=128,
+                    return_tensors="np",
+                )
+            except Exception as e:
+                errors.append(e)
+
+    def count():
+        for text in texts * 20:
+            try:
+                assert counter.count(text) == len(text.split())
+                counter.truncate(text, 50)
+            except Exception as e:
+                errors.append(e)
+
+    encoder = threading.Thread(target=encode)
+    counters = [threading.Thread(target=count) for _ in range(3)]
+    encoder.start()
+    for thread in counters:
+        thread.start()
+    for thread in counters:
+        thread.join()
+    stop.set()
+    encoder.join()
+    assert errors == []
@@ -0,0 +1,68 @@
+# tests/test_dedup.py
+
+from langchain_core.documents import Document
+from services.index_store import IndexStore
+from services.vector_db_manager import VectorDBManager
+
+TEXT = "The pump warranty covers two years from purchase."
+
+
+def add(vector_db, source_id, text=TEXT):
+    # Metadata as the file and URL loaders set it
+    kind, name = source_id.split(":", 1)
+    metadata = {"source_file": name} if kind == "file" else {"source_url": name}
+    document = Document(page_content=text, metadata=metadata)
+    vector_db.add_sources({source_id: ([document], source_id)})
+
+
+def test_duplicate_chunks_are_shared(vector_db):
+    add(vector_db, "file:a.txt")
+    add(vector_db, "file:b.txt")
+    assert len(vector_db.chunks) == 1
+    [result] = vector_db.search_index("pump warranty", top_k=1)
+    assert result["sources"] == ["file:a.txt", "file:b.txt"]
+
+
+def test_removing_the_owner_cites_a_surviving_source(embedding_engine, tmp_path):
+    vector_db = VectorDBManager(
+        IndexStore(str(tmp_path / "index")), embedding_engine=embedding_engine
+    )
+    add(vector_db, "file:a.txt")
+    add(vector_db, "url:https://example.com/pump")
+    vector_db.remove_source("file:a.txt")
+
+    [result] = vector_db.search_index("pump warranty", top_k=1)
+    assert result["source"] == "https://example.com/pump"
+    assert result["chunk_key"].startswith("url:https://example.com/pump#")
+    assert result["sources"] == ["url:https://example.com/pump"]
+    [doc] = vector_db.retrieve("pump warranty", min_similarity=-1.0).documents
+    assert doc.metadata["source_id"] == "url:https://example.com/pump"
+    assert "source_file" not in doc.metadata
+    assert vector_db.shared_chunks == {}
+
+    # The new owner is written in place on save and survives a restart
+    vector_db.save()
+    restarted = VectorDBManager(
+        IndexStore(str(tmp_path / "index")), embedding_engine=embedding_engine
+    )
+    assert restarted.load()
+    [result] = restarted.search_index("pump warranty", top_k=1)
+    assert result["sources"] == ["url:https://example.com/pump"]
+
+    restarted.remove_source("url:https://example.com/pump")
+    assert restarted.is_empty()
+
+
+def test_removing_a_non_owner_keeps_the_owner(vector_db):
+    add(vector_db, "file:a.txt")
+    add(vector_db, "file:b.txt")
+    add(vector_db, "file:c.txt")
+    vector_db.remove_source("file:b.txt")
+    [result] = vector_db.search_index("pump warranty", top_k=1)
+    assert result["source"] == "a.txt"
+    assert result["sources"] == ["file:a.txt", "file:c.txt"]
+
+    vector_db.remove_source("file:a.txt")
+    [result] = vector_db.search_index("pump warranty", top_k=1)
+    assert result["source"] == "c.txt"
+    assert result["sources"] == ["file:c.txt"]
@@ -0,0 +1,209 @@
+# tests/test_ingestion_queue.py
+
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from services.ingestion_queue import (
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    IngestionQueue,
+)
+
+
+@pytest.fixture
+def ingestion_queue(collections, tmp_path):
+    ingestion_queue = IngestionQueue(
+        collections, db_path=str(tmp_path / "jobs.sqlite3"), workers=1
+    )
+    ingestion_queue.start()
+    return ingestion_queue
+
+
+def run(ingestion_queue, collection, source_ids):
+    job = ingestion_queue.submit(collection.name, source_ids)
+    job = ingestion_queue.wait(job.id, timeout=30)
+    assert job.status == JOB_DONE, job.error
+    return job
+
+
+def test_deleting_a_source_removes_it_through_the_queue(collections, ingestion_queue):
+    collection = collections.create("manuals")
+    document_manager = collection.document_manager
+    path = os.path.join(document_manager.upload_folder, "pump.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("The pump warranty covers two years from purchase.")
+    source_id = document_manager.file_source_id("pump.txt")
+
+    job = run(ingestion_queue, collection, [source_id])
+    assert job.result["added"] == {source_id: 1}
+    assert source_id in collection.vector_db.sources
+
+    document_manager.delete_file(path)
+    job = run(ingestion_queue, collection, [source_id])
+    assert job.result["removed"] == [source_id]
+    assert job.result["empty"] == []
+    assert source_id not in collection.vector_db.sources
+    assert collection.vector_db.is_empty()
+
+
+def running_job(db_path, job_id, owner, heartbeat_at):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, collection, source_ids, status, created_at, "
+            "owner, heartbeat_at) VALUES (?, 'default', '[]', ?, ?, ?, ?)",
+            (job_id, JOB_RUNNING, time.time(), owner, heartbeat_at),
+        )
+
+
+def test_restart_only_reclaims_jobs_of_dead_or_silent_processes(collections, tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    IngestionQueue(collections, db_path=db_path)
+    host = socket.gethostname()
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+    now = time.time()
+    # Another live process on this host, e.g. the HTTP server next to the app
+    running_job(db_path, "live", f"{host}:{os.getppid()}", now)
+    running_job(db_path, "dead", f"{host}:{finished.pid}", now)
+    running_job(db_path, "silent", f"{host}:{os.getppid()}", now - 120)
+    running_job(db_path, "remote", "elsewhere:1", now)
+    running_job(db_path, "legacy", "", None)
+
+    restarted = IngestionQueue(collections, db_path=db_path, heartbeat_timeout=60)
+    statuses = {job.id: job.status for job in restarted.jobs()}
+    assert statuses == {
+        "live": JOB_RUNNING,
+        "dead": JOB_QUEUED,
+        "silent": JOB_QUEUED,
+        "remote": JOB_RUNNING,
+        "legacy": JOB_QUEUED,
+    }
+    assert restarted.get("dead").owner == restarted.owner
+
+
+def test_jobs_only_run_in_the_process_that_submitted_them(
+    collections, embedding_engine, tmp_path, monkeypatch
+):
+    from services.collection_manager import CollectionManager
+
+    db_path = str(tmp_path / "jobs.sqlite3")
+    app_queue = IngestionQueue(collections, db_path=db_path, workers=1)
+    # The HTTP server next to the app, sharing the database and collections dir
+    server_collections = CollectionManager(collections_dir=collections.collections_dir)
+    monkeypatch.setattr(
+        server_collections, "_get_embedding_engine", lambda: embedding_engine
+    )
+    server_queue = IngestionQueue(server_collections, db_path=db_path, workers=1)
+    server_queue.owner = f"{socket.gethostname()}:{os.getppid()}"
+
+    collection = server_collections.create("manuals")
+    app_collection = collections.get("manuals")
+    path = os.path.join(collection.document_manager.upload_folder, "pump.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("The pump warranty covers two years from purchase.")
+    source_id = collection.document_manager.file_source_id("pump.txt")
+
+    app_queue.start()
+    job = server_queue.submit("manuals", [source_id])
+    assert app_queue.wait(job.id, timeout=0.5).status == JOB_QUEUED
+
+    server_queue.start()
+    job = server_queue.wait(job.id, timeout=30)
+    assert job.status == JOB_DONE, job.error
+    assert source_id in collection.vector_db.sources
+    assert source_id not in app_collection.vector_db.sources
+
+
+def test_worker_survives_a_failed_claim(collections, tmp_path, monkeypatch):
+    ingestion_queue = IngestionQueue(
+        collections,
+        db_path=str(tmp_path / "jobs.sqlite3"),
+        workers=1,
+        retry_backoff=0.01,
+    )
+    claim = ingestion_queue._claim
+    calls = []
+
+    def flaky_claim():
+        calls.append(None)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return claim()
+
+    monkeypatch.setattr(ingestion_queue, "_claim", flaky_claim)
+    ingestion_queue.start()
+    collection = collections.get("default")
+    path = os.path.join(collection.document_manager.upload_folder, "pump.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("The pump warranty covers two years from purchase.")
+
+    job = run(ingestion_queue, collection, ["file:pump.txt"])
+    assert job.result["added"] == {"file:pump.txt": 1}
+    assert len(calls) > 1
+
+
+def test_deleting_a_collection_waits_for_its_jobs(collections, ingestion_queue):
+    collection = collections.create("manuals")
+    document_manager = collection.document_manager
+    path = os.path.join(document_manager.upload_folder, "pump.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("The pump warranty covers two years from purchase.")
+    source_id = document_manager.file_source_id("pump.txt")
+
+    running, release = threading.Event(), threading.Event()
+    ingest = ingestion_queue._ingest
+
+    def slow_ingest(job, collection):
+        running.set()
+        release.wait(5)
+        return ingest(job, collection)
+
+    ingestion_queue._ingest = slow_ingest
+    first = ingestion_queue.submit("manuals", [source_id])
+    assert running.wait(5)
+    second = ingestion_queue.submit("manuals", [source_id])
+
+    deleting = threading.Thread(
+        target=ingestion_queue.delete_collection, args=("manuals",)
+    )
+    deleting.start()
+    deleting.join(0.3)
+    assert deleting.is_alive()
+    assert collections.exists("manuals")
+
+    release.set()
+    deleting.join(5)
+    assert not deleting.is_alive()
+    assert ingestion_queue.get(first.id).status == JOB_DONE
+    assert ingestion_queue.get(second.id).status == JOB_FAILED
+    assert not collections.exists("manuals")
+    assert "manuals" not in collections._open_locks
+
+
+def test_a_file_deleted_before_parsing_does_not_fail_the_job(
+    collections, ingestion_queue, monkeypatch
+):
+    collection = collections.create("manuals")
+    document_manager = collection.document_manager
+    for name in ("pump.txt", "router.txt"):
+        path = os.path.join(document_manager.upload_folder, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"The {name[:-4]} warranty covers two years from purchase.")
+    load_sources = document_manager.load_sources
+
+    def delete_then_load(source_ids):
+        os.remove(os.path.join(document_manager.upload_folder, "router.txt"))
+        return load_sources(source_ids)
+
+    monkeypatch.setattr(document_manager, "load_sources", delete_then_load)
+    job = run(ingestion_queue, collection, ["file:pump.txt", "file:router.txt"])
+    assert job.result["added"] == {"file:pump.txt": 1}
+    assert "file:router.txt" not in collection.vector_db.sources
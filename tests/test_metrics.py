@@ -0,0 +1,32 @@
+# tests/test_metrics.py
+
+import threading
+
+from config import settings
+from utils.metrics import MetricsRegistry
+
+
+def test_concurrent_profiled_spans_do_not_fail(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    registry = MetricsRegistry(enabled=True)
+    registry.profile_stages = {"retrieval"}
+    both_started = threading.Barrier(2, timeout=5)
+    errors = []
+
+    def request():
+        try:
+            with registry.span("retrieval"):
+                both_started.wait()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert errors == []
+    # Only one profile may be active per process, the other span is skipped
+    assert len(list(tmp_path.glob("retrieval-*.prof"))) == 1
+    assert registry.summary()["stage_duration_seconds{retrieval}"]["count"] == 2
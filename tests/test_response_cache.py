@@ -0,0 +1,183 @@
+# tests/test_response_cache.py
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from services import response_cache as response_cache_module
+from services.ai_service import AIService
+from services.context_builder import ContextBuilder, TokenCounter
+from services.response_cache import ResponseCache, replay
+from services.retrieval import RetrievalResult
+
+
+def unit(*values) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def rotated(cosine: float) -> np.ndarray:
+    # A unit vector whose cosine similarity with unit(1, 0) is `cosine`
+    return unit(cosine, np.sqrt(1 - cosine**2))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(
+        db_path=str(tmp_path / "responses.sqlite3"),
+        max_entries=3,
+        min_similarity=0.95,
+        ttl=60.0,
+    )
+
+
+def test_exact_hit(cache):
+    cache.store("what is the warranty", unit(1, 0), "ctx", "Two years.")
+    assert cache.lookup(unit(1, 0), "ctx") == "Two years."
+    assert cache.stats["hits"] == 1
+
+
+def test_semantic_hit_above_threshold(cache):
+    cache.store("what is the warranty", unit(1, 0), "ctx", "Two years.")
+    assert cache.lookup(rotated(0.97), "ctx") == "Two years."
+
+
+def test_semantic_miss_below_threshold(cache):
+    cache.store("what is the warranty", unit(1, 0), "ctx", "Two years.")
+    assert cache.lookup(rotated(0.90), "ctx") is None
+    assert cache.stats["misses"] == 1
+
+
+def test_context_key_changes_with_index_version():
+    documents = [Document(page_content="Warranty: two years.", metadata={})]
+    assert ResponseCache.context_key(documents, 1) != ResponseCache.context_key(
+        documents, 2
+    )
+
+
+def test_index_version_change_invalidates(cache):
+    documents = [Document(page_content="Warranty: two years.", metadata={})]
+    cache.store("q", unit(1, 0), ResponseCache.context_key(documents, 1), "Two years.")
+    assert cache.lookup(unit(1, 0), ResponseCache.context_key(documents, 2)) is None
+
+
+def test_size_eviction_drops_least_recently_used(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    for i in range(3):
+        now[0] += 1
+        cache.store(f"q{i}", unit(1, i), f"ctx{i}", f"answer {i}")
+    now[0] += 1
+    assert cache.lookup(unit(1, 0), "ctx0") == "answer 0"
+
+    now[0] += 1
+    cache.store("q3", unit(1, 3), "ctx3", "answer 3")
+    assert cache.lookup(unit(1, 0), "ctx0") == "answer 0"
+    assert cache.lookup(unit(1, 1), "ctx1") is None
+    assert cache.lookup(unit(1, 3), "ctx3") == "answer 3"
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    cache.store("q", unit(1, 0), "ctx", "Two years.")
+    now[0] += 59
+    assert cache.lookup(unit(1, 0), "ctx") == "Two years."
+    now[0] += 2
+    assert cache.lookup(unit(1, 0), "ctx") is None
+
+
+def test_replay_streams_word_by_word():
+    answer = "Sources:\n- Document: manual.pdf\n\nTwo years."
+    tokens = list(replay(answer))
+    assert len(tokens) > 1
+    assert "".join(tokens) == answer
+
+
+class FakeVectorDB:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def encode_query(self, query: str) -> np.ndarray:
+        return self.embeddings[query][np.newaxis, :]
+
+
+def make_service(tmp_path, tokenizer, responses, embeddings) -> AIService:
+    # Only what stream_answer touches; the Gemini chain is a fake chat model
+    service = AIService.__new__(AIService)
+    service.token_counter = TokenCounter(tokenizer)
+    service.context_builder = ContextBuilder(service.token_counter)
+    service.prompt = ChatPromptTemplate.from_messages(
+        [
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "{question}\n\nContext:\n{context}"),
+        ]
+    )
+    service.llm = FakeListChatModel(responses=responses)
+    service.chain = service.prompt | service.llm
+    service.response_cache = ResponseCache(
+        db_path=str(tmp_path / "responses.sqlite3"), min_similarity=0.95
+    )
+    service.vector_db = FakeVectorDB(embeddings)
+    service.session = service.new_session()
+    return service
+
+
+def retrieval_for(query: str, index_version: int = 1) -> RetrievalResult:
+    return RetrievalResult(
+        query=query,
+        documents=[
+            Document(
+                page_content="The pump warranty is two years.",
+                metadata={"chunk_key": "file:manual.txt#c0"},
+            )
+        ],
+        scores=[0.9],
+        index_version=index_version,
+    )
+
+
+def test_stream_answer_replays_cached_answer(tmp_path, tokenizer):
+    service = make_service(
+        tmp_path,
+        tokenizer,
+        responses=["The warranty is two years.", "A different answer."],
+        embeddings={
+            "what is the warranty": unit(1, 0),
+            "what is the pump warranty": rotated(0.97),
+        },
+    )
+    query = "what is the warranty"
+    first = list(service.stream_answer(query, retrieval_for(query)))
+    assert "".join(first) == "The warranty is two years."
+    assert service.llm.i == 1
+
+    # A close paraphrase over the same chunks replays without calling the LLM
+    paraphrase = "what is the pump warranty"
+    replayed = list(service.stream_answer(paraphrase, retrieval_for(paraphrase)))
+    assert "".join(replayed) == "The warranty is two years."
+    assert len(replayed) == len(list(replay("The warranty is two years.")))
+    assert service.llm.i == 1
+    assert service.response_cache.stats["hits"] == 1
+    assert len(service.session.memory.turns) == 2
+
+
+def test_stream_answer_misses_after_index_version_change(tmp_path, tokenizer):
+    service = make_service(
+        tmp_path,
+        tokenizer,
+        responses=[
+            "The warranty is two years.",
+            "The warranty is three years.",
+            "Unused.",
+        ],
+        embeddings={"what is the warranty": unit(1, 0)},
+    )
+    query = "what is the warranty"
+    list(service.stream_answer(query, retrieval_for(query, index_version=1)))
+    answer = "".join(
+        service.stream_answer(query, retrieval_for(query, index_version=2))
+    )
+    assert answer == "The warranty is three years."
+    assert service.llm.i == 2
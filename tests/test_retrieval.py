@@ -0,0 +1,62 @@
+# tests/test_retrieval.py
+
+import pytest
+from langchain_core.documents import Document
+from services.bm25_index import analyze
+
+PAGES = {
+    "file:warranty.txt": "The pump warranty covers two years from purchase.",
+    "file:display.txt": "What is on the display is what the device shows.",
+    "file:errors.txt": "Error E-4821 means the valve seal needs service.",
+}
+
+
+@pytest.fixture
+def indexed(vector_db):
+    vector_db.add_sources(
+        {
+            source_id: ([Document(page_content=text)], source_id)
+            for source_id, text in PAGES.items()
+        }
+    )
+    return vector_db
+
+
+def sources(result):
+    return [doc.metadata["source_id"] for doc in result.documents]
+
+
+def test_analyze_drops_stopwords():
+    assert analyze("What is the E-4821 code?") == {
+        "e-4821": 1,
+        "e": 1,
+        "4821": 1,
+        "code": 1,
+    }
+
+
+def test_stopword_only_lexical_match_returns_nothing(indexed):
+    result = indexed.retrieve("what is the", min_similarity=0.99, mode="hybrid")
+    assert result.documents == []
+    assert result.lexical_matches == 0
+
+
+def test_common_words_do_not_bypass_the_threshold(indexed):
+    result = indexed.retrieve(
+        "what is the warranty", min_similarity=0.99, mode="hybrid"
+    )
+    assert result.documents == []
+    dense = indexed.retrieve("what is the warranty", min_similarity=0.99, mode="dense")
+    assert dense.documents == []
+
+
+def test_error_codes_bypass_the_threshold(indexed):
+    result = indexed.retrieve(
+        "what does E-4821 mean", min_similarity=0.99, mode="hybrid"
+    )
+    assert sources(result) == ["file:errors.txt"]
+
+
+def test_lexical_mode_ignores_stopwords(indexed):
+    result = indexed.retrieve("what is the warranty", mode="lexical")
+    assert sources(result) == ["file:warranty.txt"]
@@ -0,0 +1,155 @@
+# tests/test_web_fetcher.py
+
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from services.web_fetcher import WebFetcher
+
+LAST_MODIFIED = "Wed, 01 Oct 2025 08:00:00 GMT"
+
+
+class Origin(BaseHTTPRequestHandler):
+    requests = Counter()
+    not_modified = Counter()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_page(self, body: str, **headers):
+        content = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_status(self, status: int):
+        if status == 304:
+            self.not_modified[self.path] += 1
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self.send_status(304)
+            return self.send_page("<title>Pump</title>Warranty: two years", ETag='"v1"')
+        if self.path == "/dated":
+            if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                return self.send_status(304)
+            return self.send_page("Router manual", Last_Modified=LAST_MODIFIED)
+        if self.path == "/flaky":
+            if self.requests[self.path] < 3:
+                return self.send_status(503)
+            return self.send_page("Back after an outage")
+        if self.path == "/slow":
+            time.sleep(1)
+            return self.send_page("Too late")
+        self.send_status(404)
+
+
+@pytest.fixture
+def origin():
+    Origin.requests.clear()
+    Origin.not_modified.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Origin)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def fetcher(tmp_path, **kwargs) -> WebFetcher:
+    kwargs.setdefault("cache_ttl", 0)
+    return WebFetcher(cache_dir=str(tmp_path / "web"), **kwargs)
+
+
+def test_a_fetched_page_is_cached(origin, tmp_path):
+    web_fetcher = fetcher(tmp_path, cache_ttl=300)
+    page = url(origin, "/etag")
+
+    assert "two years" in web_fetcher.fetch_html(page)
+    assert "two years" in web_fetcher.fetch_html(page)
+    assert Origin.requests["/etag"] == 1
+    assert web_fetcher.get_content_hash(page) is not None
+    assert web_fetcher.fetch_documents(page)[0].metadata["title"] == "Pump"
+
+
+@pytest.mark.parametrize("path", ["/etag", "/dated"])
+def test_revalidation_serves_the_snapshot_when_not_modified(origin, tmp_path, path):
+    web_fetcher = fetcher(tmp_path)
+    page = url(origin, path)
+    first = web_fetcher.fetch_html(page)
+    content_hash = web_fetcher.get_content_hash(page)
+
+    assert web_fetcher.fetch_html(page) == first
+    assert Origin.requests[path] == 2
+    assert Origin.not_modified[path] == 1
+    assert web_fetcher.get_content_hash(page) == content_hash
+
+
+def test_server_errors_are_retried_with_backoff(origin, tmp_path):
+    web_fetcher = fetcher(tmp_path, retries=3)
+
+    started = time.perf_counter()
+    assert web_fetcher.fetch_html(url(origin, "/flaky")) == "Back after an outage"
+    assert Origin.requests["/flaky"] == 3
+    # urllib3 retries the first error at once and backs off 0.5 * 2 after the second
+    assert time.perf_counter() - started >= 0.9
+
+
+def test_a_timeout_without_a_snapshot_returns_nothing(origin, tmp_path):
+    web_fetcher = fetcher(tmp_path, timeout=0.2, retries=0)
+
+    started = time.perf_counter()
+    assert web_fetcher.fetch_html(url(origin, "/slow")) is None
+    assert time.perf_counter() - started < 1
+    assert web_fetcher.fetch_documents(url(origin, "/slow")) == []
+
+
+def test_a_stale_snapshot_is_served_while_the_origin_is_down(origin, tmp_path):
+    web_fetcher = fetcher(tmp_path, retries=0)
+    page = url(origin, "/etag")
+    first = web_fetcher.fetch_html(page)
+
+    origin.shutdown()
+    origin.server_close()
+    assert web_fetcher.fetch_html(page) == first
+
+
+def test_fetchers_sharing_a_cache_dir_write_the_same_url(origin, tmp_path):
+    fetchers = [fetcher(tmp_path), fetcher(tmp_path)]
+    page = url(origin, "/dated")
+    errors = []
+
+    def write(web_fetcher):
+        try:
+            for _ in range(20):
+                web_fetcher._write_cache_entry(
+                    page, "Router manual", SimpleNamespace(headers={})
+                )
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(f,)) for f in fetchers * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert errors == []
+    assert not list((tmp_path / "web").glob("*.tmp"))
+    assert fetchers[0].fetch_html(page) == "Router manual"